@@ -0,0 +1,160 @@
+import numpy as np
+
+from utils.discounting import model_discount_factors
+from utils.precision import accumulate, get_dtype
+
+
+PREPAYMENT_MODELS = ('cpr', 'psa')
+
+
+def single_monthly_mortality(prepayment_speeds, ages, payment_frequency, prepayment_model='cpr'):
+    """
+    Convert prepayment speeds into the fraction of the outstanding balance prepaid each period.
+
+    With the 'cpr' model a speed is a constant conditional prepayment rate per year (0.06 for 6% CPR).
+    With the 'psa' model a speed is a percentage of the PSA benchmark (100 for 100% PSA), whose CPR
+    ramps up by 0.2% a month to 6% at month 30 and stays there.
+
+    :param prepayment_speeds: The prepayment speed of each scenario, shape (n_scenarios,).
+    :param ages: The loan age at the end of each period, in periods, shape (n_loans, n_periods + 1).
+    :param payment_frequency: The number of payments per year.
+    :param prepayment_model: 'cpr' or 'psa'.
+    :return: The per-period prepayment fraction, shape (n_scenarios, n_loans, n_periods + 1).
+    """
+    if prepayment_model not in PREPAYMENT_MODELS:
+        raise ValueError(f"Unknown prepayment model '{prepayment_model}', expected one of {PREPAYMENT_MODELS}")
+
+    speeds = np.asarray(prepayment_speeds, dtype=ages.dtype)[:, None, None]
+    if prepayment_model == 'cpr':
+        cpr = np.broadcast_to(speeds, (speeds.shape[0],) + ages.shape)
+    else:
+        age_months = ages * (12 / payment_frequency)
+        cpr = speeds / 100 * 0.06 * np.minimum(age_months / 30, 1)[None, :, :]
+
+    return 1 - (1 - np.minimum(cpr, 1)) ** (1 / payment_frequency)
+
+
+class AmortizationResult:
+    """
+    Per-scenario, per-loan and per-period cash flow components of an amortizing loan pool.
+
+    Every array has shape (n_scenarios, n_loans, n_periods + 1). Column 0 is time 0, where only
+    the starting balance is set; columns past a loan's maturity are zero.
+    """
+
+    def __init__(self, times, n_periods, balance, interest, scheduled_principal, prepayment, balloon):
+        self.times = times
+        self.n_periods = n_periods
+        self.balance = balance
+        self.interest = interest
+        self.scheduled_principal = scheduled_principal
+        self.prepayment = prepayment
+        self.balloon = balloon
+
+    @property
+    def payments(self):
+        """
+        The total amount paid by each loan each period.
+        """
+        return self.interest + self.scheduled_principal + self.prepayment + self.balloon
+
+    def pool_cash_flows(self) -> dict:
+        """
+        Aggregate every component over the loans of the pool.
+
+        :return: A dict of arrays of shape (n_scenarios, n_periods + 1).
+        """
+        return {
+            'balance': accumulate(self.balance, axis=1),
+            'interest': accumulate(self.interest, axis=1),
+            'scheduled_principal': accumulate(self.scheduled_principal, axis=1),
+            'prepayment': accumulate(self.prepayment, axis=1),
+            'balloon': accumulate(self.balloon, axis=1),
+            'payments': accumulate(self.payments, axis=1),
+        }
+
+    def present_value(self, inflation_model, payment_frequency):
+        """
+        Discount the payments of every loan with a discount rate model.
+
+        :param inflation_model: A `DiscountRateModel`, or None for nominal values.
+        :param payment_frequency: The number of payments per year used for the pool.
+        :return: The present value of each loan's payments, shape (n_scenarios, n_loans).
+        """
+        payments = self.payments
+        discount_factors = model_discount_factors(inflation_model, self.times, payment_frequency, payments.dtype)
+
+        return accumulate(payments * discount_factors, axis=-1)
+
+
+def amortize_pool(balances, coupon_rates, maturities, payment_frequency, baloon_payments,
+                  prepayment_speeds=0, prepayment_model='cpr', ages=0, dtype=None) -> AmortizationResult:
+    """
+    Amortize a pool of level-payment loans with balloon payments under one or more prepayment scenarios.
+
+    Each loan's scheduled payment is the level payment that pays it down to its balloon at maturity,
+    as in `PartiallyAmortizingBond`. Prepayments reduce the balance, the later scheduled principal and
+    the balloon in proportion, so the balance of every loan in every scenario is its scheduled
+    balance times the surviving fraction of the pool. No loop runs over loans or periods.
+
+    :param balances: The starting balances (face values) of the loans.
+    :param coupon_rates: The annual coupon rates of the loans.
+    :param maturities: The times to maturity (in years).
+    :param payment_frequency: The number of payments per year, shared by the pool.
+    :param baloon_payments: The balloon payment due at maturity of each loan.
+    :param prepayment_speeds: A scalar or a vector of prepayment speeds, one per scenario.
+    :param prepayment_model: 'cpr' or 'psa', see `single_monthly_mortality`.
+    :param ages: The number of periods each loan has already been outstanding.
+    :param dtype: The dtype of the per-loan arrays, overriding the precision policy.
+    :return: An `AmortizationResult`.
+    """
+    dtype = get_dtype(dtype)
+    maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+    balances, coupon_rates, baloon_payments, ages = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=dtype)) for x in (balances, coupon_rates, baloon_payments, ages)))
+    speeds = np.atleast_1d(np.asarray(prepayment_speeds, dtype=dtype))
+
+    n_periods = np.broadcast_to(maturities * payment_frequency, balances.shape).astype(int)
+    periods = np.arange(n_periods.max() + 1)
+    active = periods[None, :] <= n_periods[:, None]
+    k = np.minimum(periods[None, :], n_periods[:, None]).astype(dtype)
+    times = periods / payment_frequency
+
+    # Level payment and scheduled balance of each loan without prepayment
+    r = (coupon_rates / payment_frequency)[:, None]
+    n = n_periods[:, None].astype(dtype)
+    has_rate = r != 0
+    safe_r = np.where(has_rate, r, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth_n = (1 + r) ** n
+        level_payment = np.where(has_rate,
+                                 safe_r * (balances[:, None] - baloon_payments[:, None] / growth_n) / (1 - growth_n ** -1.0),
+                                 (balances[:, None] - baloon_payments[:, None]) / np.maximum(n, 1))
+        growth_k = (1 + r) ** k
+        scheduled_balance = np.where(has_rate,
+                                     balances[:, None] * growth_k - level_payment * (growth_k - 1) / safe_r,
+                                     balances[:, None] - level_payment * k)
+    scheduled_balance = np.where(active, scheduled_balance, 0)
+
+    # Surviving fraction of each loan after prepayments, per scenario
+    smm = single_monthly_mortality(speeds, ages[:, None] + periods[None, :].astype(dtype), payment_frequency, prepayment_model)
+    smm = np.where(active & (periods[None, :] > 0), smm, 0)
+    survival = np.cumprod(1 - smm, axis=-1)
+
+    previous_balance = np.zeros_like(survival)
+    previous_balance[..., 1:] = survival[..., :-1] * scheduled_balance[None, :, :-1]
+    previous_scheduled = np.zeros_like(scheduled_balance)
+    previous_scheduled[:, 1:] = scheduled_balance[:, :-1]
+
+    interest = np.where(active[None, :, :], previous_balance * r[None, :, :], 0)
+    scheduled_principal = np.zeros_like(survival)
+    scheduled_principal[..., 1:] = survival[..., :-1] * (previous_scheduled - scheduled_balance)[None, :, 1:]
+    scheduled_principal = np.where(active[None, :, :], scheduled_principal, 0)
+    prepayment = smm * (previous_balance - scheduled_principal)
+
+    balance = survival * scheduled_balance[None, :, :]
+    at_maturity = (periods[None, :] == n_periods[:, None])[None, :, :]
+    balloon = np.where(at_maturity, balance, 0)
+    balance = np.where(at_maturity, 0, balance)
+
+    return AmortizationResult(times, n_periods, balance, interest, scheduled_principal, prepayment, balloon)
@@ -1,7 +1,10 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
 import os
 
+from utils.schedules import PaymentSchedule, get_schedule
+
 class Bond:
     """
     Base class for all bond types.
@@ -23,14 +26,50 @@ class Bond:
         self.maturity = maturity
         self.inflation_model = inflation_model
 
+    @property
+    def schedule(self) -> PaymentSchedule:
+        """
+        The payment time grid of the bond, shared with every bond of the same maturity and payment frequency.
+        """
+        return get_schedule(self.maturity, self.payment_frequency)
+
+    def cash_flow_amounts(self) -> np.ndarray:
+        """
+        Calculate the cash flow amounts of the bond at every time of `self.schedule`.
+        This method should be overridden by subclasses.
+
+        :return: An array of cash flows aligned with `self.schedule.times`.
+        """
+        raise NotImplementedError("Subclasses must implement cash_flow_amounts().")
+
+    def path_cash_flow_amounts(self, discount_rates: np.ndarray) -> np.ndarray:
+        """
+        Calculate the cash flow amounts of the bond along simulated discount rate paths.
+        Bonds whose cash flows depend on the rates override this; the default ignores them.
+
+        :param discount_rates: Discount rates at every time of `self.schedule`, one row per path.
+        :return: An array of cash flows broadcastable against `discount_rates`.
+        """
+        return self.cash_flow_amounts()
+
+    def path_cash_flow_tangents(self, discount_rates: np.ndarray, rate_tangents: np.ndarray) -> np.ndarray:
+        """
+        Calculate the derivative of `path_cash_flow_amounts` along a direction of change in the rates.
+        Bonds whose cash flows depend on the rates override this; the default is zero.
+
+        :param discount_rates: Discount rates at every time of `self.schedule`, one row per path.
+        :param rate_tangents: The change in `discount_rates`, with a leading axis for each direction.
+        :return: An array broadcastable against `rate_tangents`.
+        """
+        return np.zeros(1, dtype=np.asarray(rate_tangents).dtype)
+
     def calculate_cash_flows(self) -> list:
         """
         Calculate the cash flows of the bond.
-        This method should be overridden by subclasses.
 
         :return: A list of tuples (time, cash_flow), where `time` is the time at which the cash flow occurs.
         """
-        raise NotImplementedError("Subclasses must implement calculate_cash_flows().")
+        return list(zip(self.schedule.times.tolist(), self.cash_flow_amounts().tolist()))
 
     def calculate_pv_of_cash_flows(self) -> list:
         """
@@ -41,23 +80,11 @@ class Bond:
         if not self.inflation_model:
             return self.calculate_cash_flows()
 
-        cash_flows = self.calculate_cash_flows()
-        times = [time for time, _ in cash_flows]  # Extract times from cash flows
-        discount_rates = self.inflation_model.get_discount_rates(times)  # Get discount rates for all times
-        period_rates = [dr / self.payment_frequency for dr in discount_rates]
+        # Discount factors are computed once per schedule and model, and shared between bonds
+        schedule = self.schedule
+        present_values = self.cash_flow_amounts() * schedule.discount_factors(self.inflation_model)
 
-        # Compute the cumulative discount factor over time
-        cumulative_discount_factors = [1]  # Start with 1 for time = 0
-        for i in range(1, len(period_rates)):
-            cumulative_discount_factors.append(cumulative_discount_factors[-1] * (1 + period_rates[i]) ** -1)
-
-        # Apply discounting correctly
-        present_values = [
-            (time, cash_flow * cumulative_discount_factor)
-            for (time, cash_flow), cumulative_discount_factor in zip(cash_flows, cumulative_discount_factors)
-        ]
-
-        return present_values
+        return list(zip(schedule.times.tolist(), present_values.tolist()))
     
     def profit(self, present_value=False):
         """
@@ -67,17 +94,20 @@ class Bond:
             return sum([cf[1] for cf in self.calculate_pv_of_cash_flows()])
         return sum([cf[1] for cf in self.calculate_cash_flows()])
     
-    def plot_cash_flows(bond, title="Cash Flows", filepath="_data/graphs/", inflation_adjusted=False):
+    def plot_cash_flows(bond, title="Cash Flows", filepath="_data/graphs/", inflation_adjusted=False, cash_flows=None,
+                        discount_rates=None):
         """
         Plot the cash flow diagram for a bond and save the plots to separate files.
 
         :param bond: The bond object.
         :param filepath: The directory where the plots will be saved (default: '_data/graphs/').
         :param inflation_adjusted: Whether to plot inflation-adjusted cash flows and discount rates.
+        :param cash_flows: The cash flows to plot if already computed, e.g. by a `ValuationPlan`.
+        :param discount_rates: The discount rates at the cash flow times if already computed.
         """
-        if inflation_adjusted:
+        if cash_flows is None and inflation_adjusted:
             cash_flows = bond.calculate_pv_of_cash_flows()
-        else:
+        elif cash_flows is None:
             cash_flows = bond.calculate_cash_flows()
 
         times = [cf[0] for cf in cash_flows]
@@ -93,7 +123,9 @@ class Bond:
             filename_base = f"{bond.__class__.__name__[:5]}-not_adjusted-{bond.face_value}"
 
         # Plot cash flows and cumulative sum
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
+        # Figures are built without pyplot's global state, so charts can be saved from writer threads
+        fig1 = Figure(figsize=(10, 6))
+        ax1 = fig1.subplots()
         bars = ax1.bar(times, amounts, width=0.4, color='blue', alpha=0.7, label="Cash Flows")
         for bar in bars:
             height = bar.get_height()
@@ -110,12 +142,13 @@ class Bond:
         # Save the cash flow plot
         cash_flow_filename = os.path.join(filepath, f"{filename_base}-cash_flows.png")
         fig1.savefig(cash_flow_filename)
-        plt.close(fig1)
 
         # Plot discount rates if inflation_adjusted is True
         if inflation_adjusted:
-            discount_rates = bond.inflation_model.get_discount_rates(times)
-            fig2, ax2 = plt.subplots(figsize=(10, 6))
+            if discount_rates is None:
+                discount_rates = bond.inflation_model.get_discount_rates(times)
+            fig2 = Figure(figsize=(10, 6))
+            ax2 = fig2.subplots()
             ax2.plot(times, discount_rates, color='red', marker='o', label="Discount Rate")
             ax2.set_xlabel("Time (Years)", fontsize=10)
             ax2.set_ylabel("Discount Rate (%)", color='red', fontsize=10)
@@ -126,9 +159,8 @@ class Bond:
             # Save the discount rate plot
             discount_rate_filename = os.path.join(filepath, f"{filename_base}-discount_rates.png")
             fig2.savefig(discount_rate_filename)
-            plt.close(fig2)
 
-    def table_cash_flows(self) -> pd.DataFrame:
+    def table_cash_flows(self, nominal_cash_flows=None, real_cash_flows=None, discount_rates=None) -> pd.DataFrame:
         """
         Create a DataFrame with the bond's cash flow data, including:
         - Time (Years)
@@ -137,11 +169,15 @@ class Bond:
         - Cumulative Sum of Real Cash Flows
         - Discount Rate at Each Payment Time
 
+        The cash flows and discount rates are computed unless passed in, e.g. by a `ValuationPlan`.
+
         :return: A pandas DataFrame containing the bond data.
         """
         # Calculate nominal and real cash flows
-        nominal_cash_flows = self.calculate_cash_flows()
-        real_cash_flows = self.calculate_pv_of_cash_flows()
+        if nominal_cash_flows is None:
+            nominal_cash_flows = self.calculate_cash_flows()
+        if real_cash_flows is None:
+            real_cash_flows = self.calculate_pv_of_cash_flows()
 
         # Extract times, nominal amounts, and real amounts
         times = [cf[0] for cf in nominal_cash_flows]
@@ -152,7 +188,8 @@ class Bond:
         cumulative_real_amounts = [sum(real_amounts[:i+1]) for i in range(len(real_amounts))]
 
         # Get discount rates at each payment time
-        discount_rates = self.inflation_model.get_discount_rates(times)
+        if discount_rates is None:
+            discount_rates = self.inflation_model.get_discount_rates(times)
 
         # Create a DataFrame
         data = {
@@ -0,0 +1,244 @@
+"""
+Immutable, hashable records of the terms of a bond.
+
+A spec holds one bond's terms in `__slots__` and nothing else: no discount rate model and no
+per-instance dict. A million specs take a fraction of the memory of `Bond` objects, pickle as a
+tuple of their terms, and can be used as dict keys or shared between threads and caches. Sweeps
+derive new specs with `replace()` instead of mutating a bond in place, and the valuation methods
+take the discount rate model as an argument. They value the terms directly, through the shared
+schedules and the same cash flow functions as the `Bond` classes, without building a bond;
+`to_bond()` is only for code that needs a `Bond` object.
+"""
+from operator import attrgetter
+
+from bonds.fixed_rate_bond import FixedRateBond, fixed_rate_amounts
+from bonds.floating_rate_note import FloatingRateNote, floating_rate_amounts
+from bonds.partially_amortizing_bond import PartiallyAmortizingBond, amortizing_amounts
+from bonds.phantom_income_engine import value_zero_coupon_batch
+from bonds.zero_coupon_bond import ZeroCouponBond, zero_coupon_amounts
+from utils.schedules import PaymentSchedule, get_schedule
+
+
+class BondSpec:
+    """
+    Base class of the frozen bond terms. Subclasses list their terms in `fields`, in positional
+    order, and the `Bond` class they describe in `bond_class`; term names match its constructor.
+    """
+    __slots__ = ('face_value', 'price', 'maturity', 'payment_frequency')
+
+    fields = ('face_value', 'price', 'maturity', 'payment_frequency')
+    bond_class = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Slot setters bypass __setattr__, which is what makes the instances immutable
+        cls._setters = tuple(getattr(cls, name).__set__ for name in cls.fields)
+        cls._converters = tuple(int if name == 'payment_frequency' else float for name in cls.fields)
+        cls._getter = attrgetter(*cls.fields)
+
+    def __init__(self, *values, **terms):
+        if terms or len(values) != len(self.fields):
+            values = self._merge_terms(values, terms)
+        for set_term, convert, value in zip(self._setters, self._converters, values):
+            set_term(self, convert(value))
+
+    @classmethod
+    def _merge_terms(cls, values: tuple, terms: dict) -> tuple:
+        """
+        Order positional and keyword terms as `fields`, rejecting unknown, repeated and missing ones.
+        """
+        if len(values) > len(cls.fields):
+            raise TypeError(f"{cls.__name__} takes at most {len(cls.fields)} terms")
+        for name, value in zip(cls.fields, values):
+            if name in terms:
+                raise TypeError(f"{cls.__name__} got term '{name}' twice")
+            terms[name] = value
+        unknown = set(terms) - set(cls.fields)
+        if unknown:
+            raise TypeError(f"{cls.__name__} has no terms {sorted(unknown)}")
+        missing = [name for name in cls.fields if name not in terms]
+        if missing:
+            raise TypeError(f"{cls.__name__} is missing terms {missing}")
+
+        return tuple(terms[name] for name in cls.fields)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable; use replace()")
+
+    def astuple(self) -> tuple:
+        """
+        The terms in the order of `fields`.
+        """
+        return self._getter(self)
+
+    def asdict(self) -> dict:
+        """
+        The terms as keyword arguments of `bond_class`, without the inflation model.
+        """
+        return {name: getattr(self, name) for name in self.fields}
+
+    def replace(self, **changes) -> 'BondSpec':
+        """
+        A copy of the spec with some terms changed, e.g. `spec.replace(coupon_rate=0.04)`.
+        """
+        unknown = set(changes) - set(self.fields)
+        if unknown:
+            raise TypeError(f"{self.__class__.__name__} has no terms {sorted(unknown)}")
+
+        return self.__class__(*[changes[name] if name in changes else getattr(self, name) for name in self.fields])
+
+    def __reduce__(self):
+        return self.__class__, self._getter(self)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._getter(self) == other._getter(other)
+
+    def __hash__(self):
+        return hash((self.__class__.__name__,) + self._getter(self))
+
+    def __repr__(self):
+        terms = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{self.__class__.__name__}({terms})"
+
+    @property
+    def schedule(self) -> PaymentSchedule:
+        """
+        The payment time grid of the bond, shared with every bond of the same maturity and payment frequency.
+        """
+        return get_schedule(self.maturity, self.payment_frequency)
+
+    def to_bond(self, inflation_model=None):
+        """
+        Build the `Bond` these terms describe, for code that needs a `Bond` object.
+
+        :param inflation_model: The discount rate model to attach to the bond.
+        """
+        return self.bond_class(inflation_model=inflation_model, **self.asdict())
+
+    def cash_flow_amounts(self, inflation_model=None):
+        """
+        The cash flows of the bond at every time of `self.schedule`, computed from the terms by the
+        same function as the `Bond` class uses.
+
+        :param inflation_model: The discount rate model, for cash flows that depend on the rates.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def calculate_cash_flows(self, inflation_model=None) -> list:
+        """
+        The cash flows of the bond as a list of tuples (time, cash_flow).
+        """
+        return list(zip(self.schedule.times.tolist(), self.cash_flow_amounts(inflation_model).tolist()))
+
+    def calculate_pv_of_cash_flows(self, inflation_model=None) -> list:
+        """
+        The present values of the bond's cash flows as a list of tuples (time, present_value).
+        """
+        if not inflation_model:
+            return self.calculate_cash_flows(inflation_model)
+
+        schedule = self.schedule
+        present_values = self.cash_flow_amounts(inflation_model) * schedule.discount_factors(inflation_model)
+
+        return list(zip(schedule.times.tolist(), present_values.tolist()))
+
+    def profit(self, inflation_model=None, present_value=False) -> float:
+        """
+        The net profit of the bond investment under the given discount rate model.
+        """
+        if present_value:
+            return sum([cf[1] for cf in self.calculate_pv_of_cash_flows(inflation_model)])
+        return sum([cf[1] for cf in self.calculate_cash_flows(inflation_model)])
+
+    @classmethod
+    def from_bond(cls, bond) -> 'BondSpec':
+        """
+        The spec of an existing bond, of the spec type registered for its class.
+        """
+        spec_class = SPEC_CLASSES.get(bond.__class__)
+        if spec_class is None:
+            raise TypeError(f"No spec type for {bond.__class__.__name__}")
+        if bond.__class__ is FloatingRateNote:
+            return spec_class(face_value=bond.face_value, price=bond.price, maturity=bond.maturity,
+                              payment_frequency=bond.payment_frequency, spread_bps=bond.spread * 100)
+        return spec_class(**{name: getattr(bond, name) for name in spec_class.fields})
+
+
+class FixedRateSpec(BondSpec):
+    __slots__ = ('coupon_rate',)
+
+    fields = ('face_value', 'price', 'coupon_rate', 'maturity', 'payment_frequency')
+    bond_class = FixedRateBond
+
+    def cash_flow_amounts(self, inflation_model=None):
+        return fixed_rate_amounts(self.face_value, self.price, self.coupon_rate, self.payment_frequency,
+                                  self.schedule.n_periods)
+
+
+class ZeroCouponSpec(BondSpec):
+    __slots__ = ('tax_rate',)
+
+    fields = ('face_value', 'price', 'maturity', 'tax_rate', 'payment_frequency')
+    bond_class = ZeroCouponBond
+
+    def cash_flow_amounts(self, inflation_model=None):
+        return zero_coupon_amounts(self.face_value, self.price, self.schedule.n_periods)
+
+    def calculate_cash_flows(self, inflation_model=None) -> list:
+        return [(0, -self.price), (self.maturity, self.face_value)]
+
+    def calculate_pv_of_cash_flows(self, inflation_model=None) -> list:
+        # The face value is discounted through every period, as in `ZeroCouponBond`
+        result = value_zero_coupon_batch(self.face_value, self.price, self.maturity, self.payment_frequency,
+                                         self.tax_rate, inflation_model)
+
+        return [(0, -self.price), (self.maturity, float(result.pv_face_value[0]))]
+
+
+class FloatingRateSpec(BondSpec):
+    __slots__ = ('spread_bps',)
+
+    fields = ('face_value', 'price', 'maturity', 'payment_frequency', 'spread_bps')
+    bond_class = FloatingRateNote
+
+    def cash_flow_amounts(self, inflation_model=None):
+        schedule = self.schedule
+        return floating_rate_amounts(self.face_value, self.price, self.spread_bps / 100, self.payment_frequency,
+                                     schedule.n_periods, schedule.discount_rates(inflation_model))
+
+
+class AmortizingSpec(BondSpec):
+    __slots__ = ('coupon_rate', 'baloon_payment')
+
+    fields = ('face_value', 'price', 'maturity', 'coupon_rate', 'payment_frequency', 'baloon_payment')
+    bond_class = PartiallyAmortizingBond
+
+    def cash_flow_amounts(self, inflation_model=None):
+        return amortizing_amounts(self.face_value, self.price, self.coupon_rate, self.maturity, self.payment_frequency,
+                                  self.baloon_payment)
+
+
+# Spec types by the bond type names of the input tables, and by the bond class they describe
+SPEC_TYPES = {
+    'fixed': FixedRateSpec,
+    'zero': ZeroCouponSpec,
+    'floating': FloatingRateSpec,
+    'amortizing': AmortizingSpec,
+}
+
+SPEC_CLASSES = {spec_class.bond_class: spec_class for spec_class in SPEC_TYPES.values()}
+
+
+def spec_from_row(row: dict) -> BondSpec:
+    """
+    The spec of the bond described by a row of an input table.
+
+    :param row: A mapping with a `type` key and the terms of that bond type; other keys are ignored.
+    """
+    spec_class = SPEC_TYPES[row['type']]
+    return spec_class(**{name: row[name] for name in spec_class.fields})
@@ -0,0 +1,279 @@
+import copy
+
+import numpy as np
+
+from bonds.amortization_engine import amortize_pool
+from bonds.base_bond import Bond
+from bonds.bond_spec import SPEC_CLASSES, BondSpec
+from bonds.fixed_rate_bond import FixedRateBond
+from bonds.floating_rate_note import FloatingRateNote
+from bonds.index_linked_bond import IndexLinkedBond
+from bonds.partially_amortizing_bond import PartiallyAmortizingBond
+
+
+# Default search interval of each target, as a function of the bond
+BREAKEVEN_TARGETS = {
+    'coupon_rate': lambda bond: (0.0, 1.0),
+    'price': lambda bond: (0.0, 2.0 * bond.face_value),
+    'spread': lambda bond: (-1.0, 1.0),
+    'baloon_payment': lambda bond: (0.0, 2.0 * bond.face_value),
+}
+
+
+class BreakevenResult:
+    """
+    The breakeven values of a batch of bonds and how they were found.
+    """
+
+    def __init__(self, target: str, values: np.ndarray, converged: np.ndarray, linear: np.ndarray, evaluations: np.ndarray):
+        self.target = target
+        self.values = values
+        self.converged = converged
+        self.linear = linear
+        self.evaluations = evaluations
+
+    def __str__(self):
+        return (f"BreakevenResult(target={self.target}, bonds={len(self.values)}, converged={int(self.converged.sum())}, "
+                f"evaluations={int(self.evaluations.sum())})")
+
+
+def _discount_factors(bond: Bond) -> np.ndarray:
+    schedule = bond.schedule
+    return schedule.discount_factors(bond.inflation_model if bond.inflation_model else None)
+
+
+def _present_profit(bond: Bond) -> float:
+    """
+    The present value profit of a bond, from its cash flow amounts and the schedule's discount factors.
+    """
+    if type(bond).calculate_pv_of_cash_flows is not Bond.calculate_pv_of_cash_flows:
+        return bond.profit(present_value=True)
+    return float(np.sum(bond.cash_flow_amounts() * _discount_factors(bond)))
+
+
+def _amount_slopes(bond: Bond, target: str):
+    """
+    The derivative of the bond's cash flow amounts with respect to `target`, when the amounts are
+    linear in it and the profit is their discounted sum.
+
+    :return: An array aligned with `bond.schedule.times`, or None when the profit is not linear in `target`.
+    """
+    n_periods = bond.schedule.n_periods
+    slopes = np.zeros(n_periods + 1)
+    if target == 'price':
+        # The price is only paid at time 0; no other cash flow depends on it
+        slopes[0] = -1.0
+        return slopes
+    if type(bond).calculate_pv_of_cash_flows is not Bond.calculate_pv_of_cash_flows:
+        return None
+
+    coupon_slope = bond.face_value / bond.payment_frequency
+    if target == 'coupon_rate' and isinstance(bond, IndexLinkedBond):
+        slopes[1:] = coupon_slope * bond.index_ratios()[1:]
+    elif (target == 'coupon_rate' and isinstance(bond, FixedRateBond)) or (target == 'spread' and isinstance(bond, FloatingRateNote)):
+        slopes[1:] = coupon_slope
+    elif target == 'baloon_payment' and isinstance(bond, PartiallyAmortizingBond):
+        # The level payment r (B g - L) / (g - 1), with g = (1 + r) ** n, falls by r / (g - 1) per unit of balloon L
+        r = bond.coupon_rate / bond.payment_frequency
+        slopes[1:] = -r / np.expm1(n_periods * np.log1p(r)) if r != 0 else -1.0 / max(n_periods, 1)
+        slopes[-1] += 1.0
+    else:
+        return None
+
+    return slopes
+
+
+def _variant(bond: Bond, name: str, value: float) -> Bond:
+    """
+    A bond with the terms of `bond` but one of them changed; `bond` itself is left unchanged.
+    """
+    if bond.__class__ in SPEC_CLASSES:
+        terms = {'spread_bps': value * 100} if name == 'spread' else {name: value}
+        return BondSpec.from_bond(bond).replace(**terms).to_bond(bond.inflation_model)
+    variant = copy.copy(bond)
+    setattr(variant, name, value)
+    return variant
+
+
+class _AmortizingCouponProfits:
+    """
+    The present value profits of partially amortizing bonds as functions of their coupon rates, which
+    set the level payment non-linearly. Every evaluation amortizes the whole batch at once, one
+    `amortize_pool` call per payment frequency.
+    """
+
+    def __init__(self, bonds: list):
+        self.face_values = np.array([bond.face_value for bond in bonds], dtype=float)
+        self.prices = np.array([bond.price for bond in bonds], dtype=float)
+        self.maturities = np.array([bond.maturity for bond in bonds], dtype=float)
+        self.frequencies = np.array([bond.payment_frequency for bond in bonds])
+        self.baloon_payments = np.array([bond.baloon_payment for bond in bonds], dtype=float)
+        width = max((bond.schedule.n_periods for bond in bonds), default=0) + 1
+        self.discount_factors = np.zeros((len(bonds), width))
+        for row, bond in enumerate(bonds):
+            factors = _discount_factors(bond)
+            self.discount_factors[row, :len(factors)] = factors
+
+    def __call__(self, rows: np.ndarray, coupon_rates: np.ndarray) -> np.ndarray:
+        profits = np.empty(len(rows))
+        for frequency in np.unique(self.frequencies[rows]):
+            group = self.frequencies[rows] == frequency
+            loans = rows[group]
+            payments = amortize_pool(self.face_values[loans], coupon_rates[group], self.maturities[loans], int(frequency),
+                                     self.baloon_payments[loans]).payments[0]
+            factors = self.discount_factors[loans, 1:payments.shape[1]]
+            profits[group] = np.sum(payments[:, 1:] * factors, axis=1) - self.prices[loans]
+
+        return profits
+
+
+def _profit_function(bonds: list, target: str):
+    """
+    The present value profits of the bonds as a function of (row indices, target values), evaluated
+    without touching the bonds: in one batch for the coupons of amortizing bonds, and on derived
+    bonds for any other non-linear case.
+    """
+    amortizing = np.array([target == 'coupon_rate' and isinstance(bond, PartiallyAmortizingBond)
+                           and type(bond).calculate_pv_of_cash_flows is Bond.calculate_pv_of_cash_flows
+                           for bond in bonds], dtype=bool)
+    rows = np.flatnonzero(amortizing)
+    batch = _AmortizingCouponProfits([bonds[i] for i in rows])
+    positions = np.full(len(bonds), -1)
+    positions[rows] = np.arange(len(rows))
+
+    def profits(active: np.ndarray, values: np.ndarray) -> np.ndarray:
+        result = np.empty(len(active))
+        in_batch = amortizing[active]
+        if in_batch.any():
+            result[in_batch] = batch(positions[active[in_batch]], values[in_batch])
+        for i in np.flatnonzero(~in_batch):
+            result[i] = _variant(bonds[active[i]], target, float(values[i])).profit(present_value=True)
+        return result
+
+    return profits
+
+
+def solve_breakeven(bonds: list, target: str, initial=None, bracket=None, tolerance: float = 1e-9,
+                    max_iterations: int = 60) -> BreakevenResult:
+    """
+    Solve for the value of `target` at which each bond's present value profit is zero.
+
+    The price, the coupon of a fixed-rate or index-linked bond, the spread of a floating rate note
+    and a balloon payment all enter the profit linearly. For those the derivative of every cash flow
+    with respect to the target is known from the terms, so the profit is `profit + slope * change`
+    with `slope` its discounted sum, and the root is solved in closed form for the whole batch. The
+    remaining bonds (the coupon of an amortizing bond) are solved together by Newton steps on secant
+    slopes, safeguarded by bisection of a bracketing interval. The bonds are never modified.
+
+    :param bonds: The bonds, each with its own discount rate model.
+    :param target: The attribute to solve for: 'coupon_rate', 'price', 'spread' or 'baloon_payment'.
+    :param initial: Newton starting values, e.g. the roots of a neighbouring sweep point (default: the current values).
+    :param bracket: A (low, high) interval containing the non-linear roots (default: `BREAKEVEN_TARGETS[target]`).
+    :param tolerance: Solve to an absolute profit error of `tolerance * face_value`.
+    :param max_iterations: The maximum number of safeguarded Newton iterations.
+    :return: A `BreakevenResult`; values are NaN where there is no root (in the bracket, for non-linear targets).
+    """
+    if target not in BREAKEVEN_TARGETS:
+        raise ValueError(f"Unknown breakeven target '{target}'; choose from {list(BREAKEVEN_TARGETS)}")
+    missing = [bond.__class__.__name__ for bond in bonds if not hasattr(bond, target)]
+    if missing:
+        raise ValueError(f"Bonds of types {sorted(set(missing))} have no term '{target}'")
+    n = len(bonds)
+    current = np.array([getattr(bond, target) for bond in bonds], dtype=float)
+    current_profits = np.array([_present_profit(bond) for bond in bonds])
+    evaluations = np.ones(n, dtype=int)
+    values = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+
+    # Closed form for the targets the profit is linear in
+    linear = np.zeros(n, dtype=bool)
+    slopes = np.full(n, np.nan)
+    for i, bond in enumerate(bonds):
+        amount_slopes = _amount_slopes(bond, target)
+        if amount_slopes is not None:
+            linear[i] = True
+            slopes[i] = np.sum(amount_slopes * _discount_factors(bond))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roots = current - current_profits / slopes
+    solved = linear & np.isfinite(roots)
+    values[solved] = roots[solved]
+    converged[solved] = True
+
+    active = np.flatnonzero(~linear)
+    if len(active):
+        profits = _profit_function(bonds, target)
+        tolerances = tolerance * np.array([max(bonds[i].face_value, 1.0) for i in active])
+        bounds = np.array([bracket if bracket is not None else BREAKEVEN_TARGETS[target](bonds[i]) for i in active],
+                          dtype=float).reshape(len(active), 2)
+        low, high = bounds[:, 0], bounds[:, 1]
+        low_profits, high_profits = profits(active, low), profits(active, high)
+        evaluations[active] += 2
+        keep = np.sign(low_profits) != np.sign(high_profits)
+        active, tolerances, low, high, low_profits = active[keep], tolerances[keep], low[keep], high[keep], low_profits[keep]
+
+        start = current[active] if initial is None else np.asarray(initial, dtype=float)[active]
+        x = np.clip(np.where(np.isfinite(start), start, (low + high) / 2), low, high)
+        fx = profits(active, x)
+        step = 1e-4 * np.maximum(high - low, 1e-12)
+        step = np.where(x + step <= high, step, -step)
+        slope = (profits(active, x + step) - fx) / step
+        evaluations[active] += 2
+        for _ in range(max_iterations):
+            done = np.abs(fx) <= tolerances
+            values[active[done]] = x[done]
+            converged[active[done]] = True
+            keep = ~done
+            active, tolerances, low, high, low_profits, x, fx, slope = (
+                active[keep], tolerances[keep], low[keep], high[keep], low_profits[keep], x[keep], fx[keep], slope[keep])
+            if not len(active):
+                break
+
+            # Shrink the bracket around the root
+            same_side = np.sign(fx) == np.sign(low_profits)
+            low = np.where(same_side, x, low)
+            low_profits = np.where(same_side, fx, low_profits)
+            high = np.where(same_side, high, x)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = x - fx / slope
+            inside = np.isfinite(newton) & (newton > low) & (newton < high)
+            new_x = np.where(inside, newton, (low + high) / 2)
+            new_fx = profits(active, new_x)
+            evaluations[active] += 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = np.where(new_x != x, (new_fx - fx) / (new_x - x), slope)
+            x, fx = new_x, new_fx
+
+            values[active] = x
+            collapsed = high - low <= 1e-15 * np.maximum(np.abs(x), 1)
+            converged[active[collapsed]] = True
+            keep = ~collapsed
+            active, tolerances, low, high, low_profits, x, fx, slope = (
+                active[keep], tolerances[keep], low[keep], high[keep], low_profits[keep], x[keep], fx[keep], slope[keep])
+            if not len(active):
+                break
+
+    return BreakevenResult(target, values, converged, linear, evaluations)
+
+
+def breakeven_curve(bond, target: str, parameter: str, sweep, **kwargs) -> np.ndarray:
+    """
+    Breakeven values of one bond along a sweep of another of its parameters. The points are solved
+    in sweep order on bonds derived from its terms, each Newton search starting from the root of the
+    previous point; targets solved in closed form need no start.
+
+    :param bond: The bond; it is left unchanged.
+    :param target: The attribute to solve for, as in `solve_breakeven`.
+    :param parameter: The attribute that is swept, e.g. 'price' or 'baloon_payment'.
+    :param sweep: The values of `parameter`.
+    :param kwargs: Passed on to `solve_breakeven`.
+    :return: The breakeven value at every sweep point.
+    """
+    roots = np.empty(len(sweep))
+    initial = None
+    for i, value in enumerate(sweep):
+        result = solve_breakeven([_variant(bond, parameter, float(value))], target, initial=initial, **kwargs)
+        roots[i] = result.values[0]
+        if result.converged[0]:
+            initial = result.values
+    return roots
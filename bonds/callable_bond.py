@@ -0,0 +1,48 @@
+from bonds.fixed_rate_bond import FixedRateBond
+from bonds.trinomial_tree import TrinomialTree, value_on_tree
+
+
+class CallableBond(FixedRateBond):
+    """
+    A fixed-rate bond with embedded call and/or put options.
+
+    The scheduled cash flows are those of the underlying `FixedRateBond`; the options are only
+    valued on a `TrinomialTree`.
+    """
+
+    def __init__(self, face_value: float, price: float, coupon_rate: float, maturity: float, payment_frequency: int,
+                 inflation_model, call_schedule: list = None, put_schedule: list = None):
+        """
+        Initialize a bond with embedded options.
+
+        :param face_value: The face value (principal) of the bond.
+        :param price: The current price of the bond.
+        :param coupon_rate: The annual coupon rate (e.g., 0.05 for 5%).
+        :param maturity: The time to maturity (in years).
+        :param payment_frequency: The number of coupon payments per year.
+        :param inflation_model: The discount rate model; a `VasicekDiscountRateModel` for `tree_value`.
+        :param call_schedule: A list of tuples (time, call_price) at which the issuer may redeem the bond,
+                              after the coupon due at that time.
+        :param put_schedule: A list of tuples (time, put_price) at which the holder may sell the bond back.
+        """
+        super().__init__(face_value, price, coupon_rate, maturity, payment_frequency, inflation_model)
+        self.call_schedule = list(call_schedule or [])
+        self.put_schedule = list(put_schedule or [])
+
+    def tree_value(self, tree: TrinomialTree = None, steps_per_year: int = 48) -> float:
+        """
+        The model price of the bond, including its options.
+
+        :param tree: The tree to price on; built from the bond's Vasicek model if omitted.
+        :param steps_per_year: The number of tree steps per year when building the tree.
+        :return: The value at time 0 of the bond's flows after time 0.
+        """
+        if tree is None:
+            tree = TrinomialTree.from_model(self.inflation_model, self.maturity, steps_per_year)
+        return float(value_on_tree([self], tree)[0])
+
+    def option_adjusted_profit(self, tree: TrinomialTree = None, steps_per_year: int = 48) -> float:
+        """
+        The net present profit of buying the bond at its price, with the options exercised optimally.
+        """
+        return self.tree_value(tree, steps_per_year) - self.price
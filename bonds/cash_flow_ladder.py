@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from bonds.portfolio import Portfolio
+
+
+LADDER_GROUPS = ('bond_type', 'model')
+
+
+def bucket_edges(horizon: float, width: float) -> np.ndarray:
+    """
+    Evenly spaced bucket edges from time 0 to at least `horizon`.
+
+    :param horizon: The last time the ladder must cover (in years).
+    :param width: The width of each bucket (in years).
+    :return: An increasing array of edges; bucket i covers [edges[i], edges[i + 1]).
+    """
+    n_buckets = max(int(np.ceil(horizon / width - 1e-9)), 1)
+    return np.arange(n_buckets + 1) * width
+
+
+def bucket_indices(edges, times, right_closed: bool = False) -> np.ndarray:
+    """
+    The bucket of every time. Times equal to the last edge fall in the last bucket, and times
+    outside the grid get -1.
+
+    :param right_closed: Use buckets (edges[i], edges[i + 1]] instead, so a time on an edge falls in
+                         the bucket ending there; times equal to the first edge fall in the first bucket.
+    """
+    edges = np.asarray(edges, dtype=float)
+    times = np.asarray(times, dtype=float)
+    if right_closed:
+        buckets = np.searchsorted(edges, times, side='left') - 1
+        buckets[times == edges[0]] = 0
+    else:
+        buckets = np.searchsorted(edges, times, side='right') - 1
+        buckets[times == edges[-1]] = len(edges) - 2
+    buckets[(times < edges[0]) | (times > edges[-1])] = -1
+
+    return buckets
+
+
+def aggregate_flows(times, amounts, edges, groups=None, n_groups: int = 1) -> np.ndarray:
+    """
+    Scatter-add cash flows into time buckets, optionally split into groups, in one `np.bincount`.
+
+    :param times: The time of every cash flow.
+    :param amounts: The amount of every cash flow.
+    :param edges: The bucket edges.
+    :param groups: The group index of every cash flow (all zero if omitted).
+    :param n_groups: The number of groups.
+    :return: The total per group and bucket, shape (n_groups, len(edges) - 1).
+    """
+    n_buckets = len(edges) - 1
+    buckets = bucket_indices(edges, times)
+    inside = buckets >= 0
+    keys = buckets[inside] if groups is None else np.asarray(groups)[inside] * n_buckets + buckets[inside]
+    totals = np.bincount(keys, weights=np.asarray(amounts, dtype=float)[inside], minlength=n_groups * n_buckets)
+
+    return totals.reshape(n_groups, n_buckets)
+
+
+def _ladder_frame(edges, labels: list, by: tuple, nominal: np.ndarray, discounted: np.ndarray) -> pd.DataFrame:
+    n_buckets = len(edges) - 1
+    data = {
+        'bucket_start': np.tile(edges[:-1], len(labels)),
+        'bucket_end': np.tile(edges[1:], len(labels)),
+    }
+    for position, column in enumerate(by):
+        data[column] = np.repeat([label[position] for label in labels], n_buckets)
+    data['nominal'] = nominal.ravel()
+    data['discounted'] = discounted.ravel()
+
+    return pd.DataFrame(data)
+
+
+def _check_groups(by) -> tuple:
+    by = tuple(by)
+    unknown = set(by) - set(LADDER_GROUPS)
+    if unknown:
+        raise ValueError(f"Cannot split a ladder by {sorted(unknown)}; choose from {LADDER_GROUPS}")
+    return by
+
+
+def _model_name(model) -> str:
+    return model.__class__.__name__ if model is not None else 'None'
+
+
+def build_ladder(bonds: list, edges, by=()) -> pd.DataFrame:
+    """
+    Total nominal and discounted cash flow per time bucket across a book of bonds.
+
+    Bonds with the same type, schedule and inflation model are summed into one row first, so the
+    discount factors of each group are applied once and the bucketing is a single scatter-add
+    over the distinct groups rather than over every bond's flows.
+
+    :param bonds: The bonds of the book.
+    :param edges: The bucket edges, e.g. from `bucket_edges`. Flows outside the edges are left out.
+    :param by: Columns to split the ladder by: any of 'bond_type' and 'model'.
+    :return: A DataFrame with one row per bucket (and group), with columns bucket_start, bucket_end,
+             the `by` columns, nominal and discounted.
+    """
+    by = _check_groups(by)
+    edges = np.asarray(edges, dtype=float)
+
+    # Running sum of the cash flows of each (type, schedule, model) group
+    totals = {}
+    for bond in bonds:
+        schedule = bond.schedule
+        key = (bond.__class__, id(schedule), id(bond.inflation_model))
+        group = totals.get(key)
+        if group is None:
+            totals[key] = [bond, schedule, np.array(bond.cash_flow_amounts(), dtype=float)]
+        else:
+            group[2] += bond.cash_flow_amounts()
+
+    labels = {}
+    times, nominal, discounted, codes = [], [], [], []
+    for bond, schedule, amounts in totals.values():
+        label = tuple({'bond_type': bond.__class__.__name__, 'model': _model_name(bond.inflation_model)}[column] for column in by)
+        code = labels.setdefault(label, len(labels))
+        times.append(schedule.times)
+        nominal.append(amounts)
+        discounted.append(amounts * schedule.discount_factors(bond.inflation_model))
+        codes.append(np.full(len(amounts), code))
+
+    if not totals:
+        labels = {(): 0} if not by else {}
+        empty = np.zeros((len(labels), len(edges) - 1))
+        return _ladder_frame(edges, list(labels), by, empty, empty)
+
+    times, codes = np.concatenate(times), np.concatenate(codes)
+    nominal_ladder = aggregate_flows(times, np.concatenate(nominal), edges, codes, len(labels))
+    discounted_ladder = aggregate_flows(times, np.concatenate(discounted), edges, codes, len(labels))
+
+    return _ladder_frame(edges, list(labels), by, nominal_ladder, discounted_ladder)
+
+
+def portfolio_ladder(portfolio: Portfolio, edges, discount_rates=None, by_type: bool = False) -> pd.DataFrame:
+    """
+    Cash flow ladder of a `Portfolio` cash flow matrix, without touching individual bonds.
+
+    Rows are summed per bond type with `np.add.at`, then grid columns are scatter-added into buckets.
+
+    :param portfolio: The portfolio.
+    :param edges: The bucket edges.
+    :param discount_rates: Rates at the portfolio times for the discounted ladder (no discounting if omitted).
+    :param by_type: Split the ladder by bond type.
+    :return: A DataFrame as returned by `build_ladder`.
+    """
+    edges = np.asarray(edges, dtype=float)
+    if by_type:
+        types, codes = np.unique(np.asarray(portfolio.bond_types), return_inverse=True)
+        labels = [(bond_type,) for bond_type in types]
+    else:
+        codes = np.zeros(portfolio.n_bonds, dtype=int)
+        labels = [()]
+
+    grouped = np.zeros((len(labels), len(portfolio.times)))
+    np.add.at(grouped, codes, portfolio.amounts)
+
+    discount_factors = np.ones(len(portfolio.times)) if discount_rates is None else portfolio.discount_factors(discount_rates)
+    buckets = bucket_indices(edges, portfolio.times)
+    inside = buckets >= 0
+    nominal = np.zeros((len(labels), len(edges) - 1))
+    discounted = np.zeros_like(nominal)
+    np.add.at(nominal, (slice(None), buckets[inside]), grouped[:, inside])
+    np.add.at(discounted, (slice(None), buckets[inside]), (grouped * discount_factors)[:, inside])
+
+    return _ladder_frame(edges, labels, ('bond_type',) if by_type else (), nominal, discounted)
@@ -0,0 +1,301 @@
+"""
+Cash flow matching and immunization of a liability ladder over a large universe of bonds.
+
+The universe is laid out once as matrices: the nominal cash flows of every bond in every time
+bucket, and the present value, duration and convexity moments of every bond under one discount
+curve. Both problems are then linear programs in the holdings x >= 0 (units of each bond):
+
+    matching      minimise price . x  such that the flows of x, plus surplus carried forward at a
+                  zero rate, cover the liabilities of every bucket
+    immunization  minimise price . x  such that the present value and the first moment (dollar
+                  duration) of x equal those of the liabilities, and its second moment (convexity)
+                  is at least theirs
+
+They are solved with SciPy's HiGHS solver when SciPy is installed, on sparse constraint matrices.
+Otherwise a built-in solver minimises the cost plus a quadratic penalty on the constraint
+violations by accelerated projected gradient steps, raising the penalty until the constraints
+hold to the tolerance. It needs only products with the constraint matrices, so each step is
+linear in the size of the universe; its holdings are close to, not exactly, the cheapest, and
+spread over more bonds than the vertex a simplex solver returns.
+"""
+import time
+
+import numpy as np
+
+from bonds.cash_flow_ladder import bucket_indices
+from bonds.portfolio import Portfolio
+
+try:
+    from scipy import optimize, sparse
+except ImportError:
+    optimize = sparse = None
+
+
+SOLVERS = ('auto', 'highs', 'projected_gradient')
+
+
+class MatchingMatrices:
+    """
+    The cash flows and discount moments of a bond universe, built once and reused for any number
+    of liability ladders.
+    """
+
+    def __init__(self, bonds: list, edges, inflation_model=None):
+        """
+        :param bonds: The candidate bonds; one unit of a bond costs its price.
+        :param edges: The bucket edges of the liability ladder, e.g. from `bucket_edges`.
+        :param inflation_model: The discount rate model of the curve, or None for no discounting.
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        self.n_buckets = len(self.edges) - 1
+        self.costs = np.array([bond.price for bond in bonds], dtype=float)
+
+        portfolio = Portfolio.from_bonds(bonds, dtype=np.float64)
+        times = portfolio.times
+        rates = np.zeros(len(times)) if inflation_model is None else np.asarray(inflation_model.get_discount_rates(times), dtype=float)
+        self.times = times
+        self.log_discount = np.log(portfolio.discount_factors(rates))
+
+        # Flows after the purchase at time 0, in buckets (edges[i], edges[i + 1]] so a flow counts
+        # towards the liabilities due at the end of its bucket; the grid is sorted, so each bucket
+        # is a run of columns
+        future = portfolio.amounts[:, 1:]
+        buckets = bucket_indices(self.edges, times[1:], right_closed=True)
+        inside = np.flatnonzero(buckets >= 0)
+        self.flows = np.zeros((len(bonds), self.n_buckets))
+        if len(inside):
+            present, starts = np.unique(buckets[inside], return_index=True)
+            self.flows[:, present] = np.add.reduceat(future[:, inside], starts, axis=1)
+
+        discounted = future * np.exp(self.log_discount[1:])
+        self.present_values = discounted.sum(axis=1)
+        self.durations = discounted @ times[1:]
+        self.convexities = discounted @ times[1:] ** 2
+
+    @property
+    def n_bonds(self) -> int:
+        return len(self.costs)
+
+    def discount_factors(self, times) -> np.ndarray:
+        """
+        Discount factors at any times, interpolated in log space on the universe grid and
+        extrapolated beyond it at the last forward rate.
+        """
+        times = np.asarray(times, dtype=float)
+        log_discount = np.interp(times, self.times, self.log_discount)
+        if len(self.times) > 1:
+            slope = (self.log_discount[-1] - self.log_discount[-2]) / (self.times[-1] - self.times[-2])
+            log_discount = np.where(times > self.times[-1], self.log_discount[-1] + slope * (times - self.times[-1]), log_discount)
+
+        return np.exp(log_discount)
+
+    def bucket_liabilities(self, liabilities: list) -> np.ndarray:
+        """
+        The total liability due at the end of every bucket. A liability is paid from the flows of
+        the buckets ending on or before its time, so it is counted in the last bucket that ends by
+        then: on its own edge, or brought forward to the previous edge when it falls between edges.
+        Flows arriving after a liability never cover it.
+
+        :param liabilities: A list of tuples (time, amount).
+        :raises ValueError: If a liability falls before the end of the first bucket or after the last edge.
+        """
+        times, amounts = _split(liabilities)
+        buckets = np.searchsorted(self.edges, times, side='right') - 2
+        if np.any(buckets < 0) or np.any(times > self.edges[-1]):
+            raise ValueError(f"Liabilities must fall within [{self.edges[min(1, self.n_buckets)]}, {self.edges[-1]}], "
+                             "from the end of the first bucket to the last edge")
+
+        return np.bincount(buckets, weights=amounts, minlength=self.n_buckets)
+
+
+class MatchingResult:
+    """
+    The holdings that solve a matching or immunization problem, and how well they solve it.
+    """
+
+    def __init__(self, problem: str, holdings: np.ndarray, cost: float, residuals: np.ndarray, solver: str,
+                 solve_seconds: float, converged: bool):
+        """
+        :param holdings: The units of every bond.
+        :param cost: The price of the holdings.
+        :param residuals: The shortfall in every bucket (matching), or the present value, duration and
+                          convexity shortfalls (immunization); zero or negative when the constraints hold.
+        """
+        self.problem = problem
+        self.holdings = holdings
+        self.cost = cost
+        self.residuals = residuals
+        self.solver = solver
+        self.solve_seconds = solve_seconds
+        self.converged = converged
+
+    @property
+    def selected(self) -> np.ndarray:
+        """
+        The indices of the bonds held.
+        """
+        return np.flatnonzero(self.holdings > 1e-9 * max(self.holdings.max(initial=0.0), 1.0))
+
+    def __str__(self):
+        return (f"MatchingResult(problem={self.problem}, cost={self.cost:.2f}, bonds={len(self.selected)}, "
+                f"max_shortfall={max(self.residuals.max(initial=0.0), 0.0):.3g}, solver={self.solver}, "
+                f"seconds={self.solve_seconds:.3f})")
+
+
+def _split(cash_flows: list) -> tuple:
+    if not cash_flows:
+        return np.zeros(0), np.zeros(0)
+    times, amounts = zip(*cash_flows)
+    return np.asarray(times, dtype=float), np.asarray(amounts, dtype=float)
+
+
+def _choose_solver(solver: str) -> str:
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}'; choose from {SOLVERS}")
+    if solver == 'auto':
+        return 'highs' if optimize is not None else 'projected_gradient'
+    if solver == 'highs' and optimize is None:
+        raise ImportError("The 'highs' solver requires scipy")
+    return solver
+
+
+def _solve_highs(costs, a_eq, b_eq, a_ub, b_ub, upper):
+    bounds = np.column_stack([np.zeros(len(costs)), upper])
+    result = optimize.linprog(costs, A_ub=None if a_ub is None else sparse.csr_matrix(a_ub), b_ub=b_ub,
+                              A_eq=None if a_eq is None else sparse.csr_matrix(a_eq), b_eq=b_eq,
+                              bounds=bounds, method='highs')
+    if result.x is None:
+        return np.zeros(len(costs)), False
+    return result.x, bool(result.success)
+
+
+def _spectral_norm(a: np.ndarray, iterations: int = 50) -> float:
+    """
+    The largest eigenvalue of a.T @ a, by power iteration.
+    """
+    vector = np.random.default_rng(0).standard_normal(a.shape[1])
+    estimate = 0.0
+    for _ in range(iterations):
+        image = a.T @ (a @ vector)
+        estimate = np.linalg.norm(image)
+        if estimate == 0:
+            break
+        vector = image / estimate
+
+    return estimate
+
+
+def _solve_projected_gradient(costs, a_eq, b_eq, a_ub, b_ub, upper, tolerance: float = 1e-7,
+                              max_iterations: int = 20000, inner_iterations: int = 500):
+    """
+    Minimise costs . z + (penalty / 2) |violation(z)|^2 over 0 <= z <= upper by accelerated
+    projected gradient steps (FISTA), where the violation is a_eq z - b_eq for the equalities and
+    max(a_ub z - b_ub, 0) for the inequalities. The penalty starts small, so the early steps
+    follow the costs, and is raised tenfold each time the steps settle, until the constraints
+    hold to `tolerance` relative to the largest right hand side.
+    """
+    blocks = [(a, b) for a, b in ((a_eq, b_eq), (a_ub, b_ub)) if a is not None]
+    a = np.vstack([a for a, _ in blocks])
+    b = np.concatenate([b for _, b in blocks])
+    equality = np.zeros(len(b), dtype=bool)
+    if a_eq is not None:
+        equality[:len(b_eq)] = True
+
+    # Scale every constraint row to unit norm and the costs to unit maximum
+    norms = np.linalg.norm(a, axis=1)
+    norms[norms == 0] = 1
+    a, b = a / norms[:, None], b / norms
+    costs = costs / max(np.abs(costs).max(initial=0.0), 1e-300)
+    scale = max(np.abs(b).max(initial=0.0), 1.0)
+    lipschitz = max(_spectral_norm(a), 1e-300)
+
+    def violation(z):
+        residuals = a @ z - b
+        return np.where(equality, residuals, np.maximum(residuals, 0))
+
+    z = np.zeros(len(costs))
+    penalty = 1.0 / scale
+    iterations = 0
+    while iterations < max_iterations:
+        step = 1.0 / (penalty * lipschitz)
+        y, previous, momentum = z.copy(), z.copy(), 1.0
+        for _ in range(inner_iterations):
+            z = np.clip(y - step * (costs + penalty * (a.T @ violation(y))), 0, upper)
+            iterations += 1
+            if np.max(np.abs(z - previous), initial=0.0) <= 1e-12 * max(np.max(np.abs(z), initial=0.0), 1.0):
+                break
+            next_momentum = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+            y = z + ((momentum - 1) / next_momentum) * (z - previous)
+            previous, momentum = z, next_momentum
+
+        if np.abs(violation(z)).max(initial=0.0) <= tolerance * scale:
+            return z, True
+        penalty *= 10
+
+    return z, False
+
+
+def _solve(costs, a_eq, b_eq, a_ub, b_ub, upper, solver: str):
+    solver = _choose_solver(solver)
+    start = time.perf_counter()
+    if solver == 'highs':
+        z, converged = _solve_highs(costs, a_eq, b_eq, a_ub, b_ub, upper)
+    else:
+        z, converged = _solve_projected_gradient(costs, a_eq, b_eq, a_ub, b_ub, upper)
+
+    return z, converged, solver, time.perf_counter() - start
+
+
+def match_cash_flows(matrices: MatchingMatrices, liabilities: list, carry: bool = True, max_units=None,
+                     solver: str = 'auto') -> MatchingResult:
+    """
+    The cheapest holdings whose cash flows cover the liabilities in every bucket.
+
+    :param matrices: The universe, from `MatchingMatrices`.
+    :param liabilities: A list of tuples (time, amount).
+    :param carry: Carry surplus cash forward to later buckets at a zero rate; otherwise every
+                  bucket must be covered by its own flows.
+    :param max_units: An upper bound on the units of each bond, a scalar or one per bond (default: none).
+    :param solver: 'highs' (requires scipy), 'projected_gradient', or 'auto' for the first available.
+    :return: A `MatchingResult`; the residuals are the uncovered liability of each bucket, or with
+             `carry` the cash missing when each bucket is paid.
+    """
+    targets = matrices.bucket_liabilities(liabilities)
+    upper = np.broadcast_to(np.inf if max_units is None else np.asarray(max_units, dtype=float), (matrices.n_bonds,))
+
+    if carry:
+        # With surplus carried forward at a zero rate, every bucket is covered exactly when the
+        # flows up to it cover the liabilities up to it
+        flows, targets = np.cumsum(matrices.flows, axis=1), np.cumsum(targets)
+    else:
+        flows = matrices.flows
+    holdings, converged, solver, seconds = _solve(matrices.costs, None, None, -flows.T, -targets, upper, solver)
+    residuals = targets - flows.T @ holdings
+
+    return MatchingResult('matching', holdings, float(matrices.costs @ holdings), residuals, solver, seconds, converged)
+
+
+def immunize(matrices: MatchingMatrices, liabilities: list, max_units=None, solver: str = 'auto') -> MatchingResult:
+    """
+    The cheapest holdings with the present value and dollar duration of the liabilities and at
+    least their convexity, so small shifts of the curve move both sides alike.
+
+    :param matrices: The universe, from `MatchingMatrices`.
+    :param liabilities: A list of tuples (time, amount).
+    :param max_units: An upper bound on the units of each bond, a scalar or one per bond (default: none).
+    :param solver: 'highs' (requires scipy), 'projected_gradient', or 'auto' for the first available.
+    :return: A `MatchingResult`; the residuals are the present value, duration and convexity shortfalls.
+    """
+    times, amounts = _split(liabilities)
+    discounted = amounts * matrices.discount_factors(times)
+    targets = np.array([discounted.sum(), discounted @ times, discounted @ times ** 2])
+    upper = np.broadcast_to(np.inf if max_units is None else np.asarray(max_units, dtype=float), (matrices.n_bonds,))
+
+    a_eq = np.vstack([matrices.present_values, matrices.durations])
+    a_ub = -matrices.convexities[None, :]
+    holdings, converged, solver, seconds = _solve(matrices.costs, a_eq, targets[:2], a_ub, -targets[2:], upper, solver)
+
+    achieved = np.array([matrices.present_values @ holdings, matrices.durations @ holdings, matrices.convexities @ holdings])
+    residuals = np.array([abs(targets[0] - achieved[0]), abs(targets[1] - achieved[1]), targets[2] - achieved[2]])
+
+    return MatchingResult('immunization', holdings, float(matrices.costs @ holdings), residuals, solver, seconds, converged)
@@ -1,5 +1,7 @@
 # bonds/fixed_rate_bond.py
 
+import numpy as np
+
 from bonds.base_bond import Bond
 
 class FixedRateBond(Bond):
@@ -20,22 +22,29 @@ class FixedRateBond(Bond):
         super().__init__(face_value, payment_frequency, price, maturity, inflation_model)
         self.coupon_rate = coupon_rate
 
-    def calculate_cash_flows(self) -> list:
+    def cash_flow_amounts(self) -> np.ndarray:
         """
-        Calculate the cash flows of the fixed-rate bond.
+        Calculate the cash flows of the fixed-rate bond on its payment schedule.
 
-        :return: A list of tuples (time_period, cash_flow).
+        :return: An array of cash flows aligned with `self.schedule.times`.
         """
-        cash_flows = [(0, -self.price)]
-        n_periods = int(self.maturity * self.payment_frequency)
-        coupon_payment = (self.coupon_rate / self.payment_frequency) * self.face_value
+        return fixed_rate_amounts(self.face_value, self.price, self.coupon_rate, self.payment_frequency,
+                                  self.schedule.n_periods)
+
 
-        for t in range(1, n_periods):
-            time_period = t / self.payment_frequency
-            cash_flows.append((time_period, coupon_payment))
+def fixed_rate_amounts(face_value: float, price: float, coupon_rate: float, payment_frequency: int,
+                       n_periods: int) -> np.ndarray:
+    """
+    The cash flows of a fixed-rate bond from its terms, shared by `FixedRateBond` and `FixedRateSpec`.
+
+    :param n_periods: The number of payment periods of the bond's schedule.
+    :return: An array of n_periods + 1 cash flows, the price paid at time 0 first.
+    """
+    coupon_payment = (coupon_rate / payment_frequency) * face_value
+    cash_flows = np.full(n_periods + 1, coupon_payment)
+    cash_flows[0] = -price
 
-        # Add face value repayment and final coupon payment at maturity
-        final_payment = self.face_value + coupon_payment
-        cash_flows.append((self.maturity, final_payment))
+    # Add face value repayment to the final coupon payment at maturity
+    cash_flows[-1] += face_value
 
-        return cash_flows
\ No newline at end of file
+    return cash_flows
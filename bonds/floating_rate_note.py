@@ -1,5 +1,6 @@
+import numpy as np
+
 from bonds.base_bond import Bond
-from inflation_models.discount_rate_model import DiscountRateModel
 
 class FloatingRateNote(Bond):
     """
@@ -21,26 +22,58 @@ class FloatingRateNote(Bond):
         super().__init__(face_value, payment_frequency, price, maturity, inflation_model)
         self.spread = spread_bps / 100
 
-    def calculate_cash_flows(self) -> list:
+    def cash_flow_amounts(self) -> np.ndarray:
         """
-        Calculate the cash flows of the floating rate note.
+        Calculate the cash flows of the floating rate note on its payment schedule.
         The coupon payments are based on the reference rate at each payment time.
 
-        :return: A list of tuples (time, cash_flow), where `time` is the time at which the cash flow occurs.
+        :return: An array of cash flows aligned with `self.schedule.times`.
+        """
+        return self.path_cash_flow_amounts(self.schedule.discount_rates(self.inflation_model))
+
+    def path_cash_flow_amounts(self, discount_rates: np.ndarray) -> np.ndarray:
+        """
+        Calculate the cash flows of the floating rate note along one or more reference rate paths.
+
+        :param discount_rates: Reference rates at every time of `self.schedule`, 1-D or one row per path.
+        :return: An array of cash flows with the same shape as `discount_rates`.
+        """
+        return floating_rate_amounts(self.face_value, self.price, self.spread, self.payment_frequency,
+                                     self.schedule.n_periods, discount_rates)
+
+    def path_cash_flow_tangents(self, discount_rates: np.ndarray, rate_tangents: np.ndarray) -> np.ndarray:
         """
-        cash_flows = [(0, -self.price)]
-        n_periods = int(self.maturity * self.payment_frequency)
-        
-        times = [t / self.payment_frequency for t in range(1, n_periods)]
+        Calculate the derivative of the cash flows along a direction of change in the reference rates.
 
-        for time_period, mrr in zip(times, self.inflation_model.get_discount_rates(times)):
-            coupon_rate = self.spread + mrr
-            coupon_payment = (coupon_rate / self.payment_frequency) * self.face_value
+        :param discount_rates: Reference rates at every time of `self.schedule`, one row per path.
+        :param rate_tangents: The change in `discount_rates`, with a leading axis for each direction.
+        :return: An array with the shape of `rate_tangents`.
+        """
+        coupon_tangents = np.asarray(rate_tangents) * (self.face_value / self.payment_frequency)
+
+        tangents = coupon_tangents.copy()
+        tangents[..., 0] = 0
+        tangents[..., -1] = coupon_tangents[..., max(self.schedule.n_periods - 1, 1)]
+
+        return tangents
+
+
+def floating_rate_amounts(face_value: float, price: float, spread: float, payment_frequency: int, n_periods: int,
+                          discount_rates: np.ndarray) -> np.ndarray:
+    """
+    The cash flows of a floating rate note from its terms, shared by `FloatingRateNote` and `FloatingRateSpec`.
+
+    :param spread: The spread over the reference rate, in the units of `FloatingRateNote.spread`.
+    :param n_periods: The number of payment periods of the note's schedule.
+    :param discount_rates: Reference rates at every time of the schedule, 1-D or one row per path.
+    :return: An array of cash flows with the same shape as `discount_rates`.
+    """
+    coupon_payments = ((spread + np.asarray(discount_rates)) / payment_frequency) * face_value
 
-            cash_flows.append((time_period, coupon_payment))
+    cash_flows = coupon_payments.copy()
+    cash_flows[..., 0] = -price
 
-        # Add face value repayment and final coupon payment at maturity
-        final_payment = self.face_value + coupon_payment
-        cash_flows.append((self.maturity, final_payment))
+    # The final coupon is fixed at the last reset before maturity, paid with the face value
+    cash_flows[..., -1] = face_value + coupon_payments[..., max(n_periods - 1, 1)]
 
-        return cash_flows
\ No newline at end of file
+    return cash_flows
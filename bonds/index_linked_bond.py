@@ -0,0 +1,90 @@
+import numpy as np
+
+from bonds.base_bond import Bond
+from inflation_models.cpi_index import CPIIndex
+
+
+class IndexLinkedBond(Bond):
+    """
+    A bond whose coupons and principal are scaled by the ratio of a price index to its base value.
+    """
+
+    def __init__(self, face_value: float, price: float, coupon_rate: float, maturity: float, payment_frequency: int,
+                 inflation_model, cpi_index: CPIIndex, base_time: float = 0.0, indexation_lag: float = 0.25,
+                 interpolate: bool = False):
+        """
+        Initialize an index-linked bond.
+
+        :param face_value: The face value (principal) of the bond before indexation.
+        :param price: The current price of the bond.
+        :param coupon_rate: The annual real coupon rate (e.g., 0.0125 for 1.25%).
+        :param maturity: The time to maturity (in years).
+        :param payment_frequency: The number of coupon payments per year.
+        :param inflation_model: The discount rate model to use for cash flow calculations.
+        :param cpi_index: The price index the bond is linked to, shared by every linker on that index.
+        :param base_time: The time (in years from the valuation date, usually negative) of the base index value.
+        :param indexation_lag: The lag of the reference index in years (0.25 for three months, 8 / 12 for old-style gilts).
+        :param interpolate: Interpolate the reference index between monthly fixings.
+        """
+        super().__init__(face_value, payment_frequency, price, maturity, inflation_model)
+        self.coupon_rate = coupon_rate
+        self.cpi_index = cpi_index
+        self.base_time = base_time
+        self.indexation_lag = indexation_lag
+        self.interpolate = interpolate
+
+    def index_ratios(self) -> np.ndarray:
+        """
+        The index ratio at every time of the bond's schedule.
+
+        :return: An array aligned with `self.schedule.times`.
+        """
+        return self.cpi_index.index_ratios(self.schedule.times, self.base_time, self.indexation_lag, self.interpolate)
+
+    def cash_flow_amounts(self) -> np.ndarray:
+        """
+        Calculate the indexed cash flows of the bond on its payment schedule.
+
+        :return: An array of cash flows aligned with `self.schedule.times`.
+        """
+        coupon_payment = (self.coupon_rate / self.payment_frequency) * self.face_value
+        cash_flows = np.full(self.schedule.n_periods + 1, coupon_payment)
+
+        # Indexed principal repaid with the final coupon
+        cash_flows[-1] += self.face_value
+        cash_flows *= self.index_ratios()
+        cash_flows[0] = -self.price
+
+        return cash_flows
+
+
+def index_linked_cash_flows(bonds: list):
+    """
+    The cash flows of many linkers on one index, with the index looked up for all of them at once.
+
+    :param bonds: `IndexLinkedBond`s sharing one `CPIIndex`, lag and interpolation.
+    :return: A tuple (times, amounts) of arrays with one row per bond, padded with zeros after maturity.
+    """
+    if not bonds:
+        return np.zeros((0, 0)), np.zeros((0, 0))
+    first = bonds[0]
+    if any(bond.cpi_index is not first.cpi_index or bond.indexation_lag != first.indexation_lag
+           or bond.interpolate != first.interpolate for bond in bonds):
+        raise ValueError("Linkers valued together must share an index, lag and interpolation")
+
+    width = max(bond.schedule.n_periods for bond in bonds) + 1
+    times = np.zeros((len(bonds), width))
+    nominal = np.zeros((len(bonds), width))
+    for row, bond in enumerate(bonds):
+        n = bond.schedule.n_periods + 1
+        times[row, :n] = bond.schedule.times
+        times[row, n:] = bond.maturity
+        nominal[row, 1:n] = (bond.coupon_rate / bond.payment_frequency) * bond.face_value
+        nominal[row, n - 1] += bond.face_value
+
+    base_times = np.array([bond.base_time for bond in bonds])[:, None]
+    ratios = first.cpi_index.index_ratios(times, base_times, first.indexation_lag, first.interpolate)
+    amounts = nominal * ratios
+    amounts[:, 0] = [-bond.price for bond in bonds]
+
+    return times, amounts
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from utils.interpolation import get_operator
+
+
+DEFAULT_PILLARS = (0.25, 0.5, 1, 2, 3, 5, 7, 10, 15, 20, 30)
+
+
+class KeyRateProfile:
+    """
+    Sensitivities of many bonds to bumps of the discount rate curve at each pillar.
+
+    A key-rate bump at pillar p moves the rate at every payment time by the linear interpolation
+    weight of that time on pillar p, so the bumps of all pillars add up to a parallel shift.
+    """
+
+    def __init__(self, pillars, sensitivities: np.ndarray, present_values: np.ndarray):
+        """
+        :param pillars: The pillar times.
+        :param sensitivities: d(present value) / d(rate at each pillar), shape (n_bonds, n_pillars).
+        :param present_values: The present value of each bond's flows after time 0.
+        """
+        self.pillars = np.asarray(pillars, dtype=float)
+        self.sensitivities = sensitivities
+        self.present_values = present_values
+
+    @property
+    def durations(self) -> np.ndarray:
+        """
+        Key-rate durations, -(1 / PV) dPV/dr, shape (n_bonds, n_pillars).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return -self.sensitivities / self.present_values[:, None]
+
+    @property
+    def dv01(self) -> np.ndarray:
+        """
+        The loss in present value for a one basis point rise at each pillar, shape (n_bonds, n_pillars).
+        """
+        return -self.sensitivities * 1e-4
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The key-rate durations as a DataFrame with one row per bond and one column per pillar.
+        """
+        return pd.DataFrame(self.durations, columns=[f"{pillar:g}y" for pillar in self.pillars])
+
+
+def project_onto_pillars(values: np.ndarray, times, pillars) -> np.ndarray:
+    """
+    Spread values at the given times onto the pillars with the linear interpolation weights,
+    i.e. the product of `values` with the sparse (times x pillars) interpolation matrix.
+
+    :param values: An array whose last axis is aligned with `times`.
+    :return: An array with the last axis replaced by one entry per pillar.
+    """
+    return get_operator(pillars, times).apply_transpose(values)
+
+
+def key_rate_profile(bonds: list, pillars=DEFAULT_PILLARS) -> KeyRateProfile:
+    """
+    Key-rate sensitivities of every bond at every pillar, without revaluing the bonds per bump.
+
+    Discount factors are 1 / prod(1 + r_k / f), so a bump of the rate at payment time k changes
+    the present value by -(1 / f) / (1 + r_k / f) times the present value of the flows from k
+    onwards. Each bond's flows are discounted once to get that sensitivity per payment time, which
+    is then projected onto the pillars by the interpolation weights. Bonds sharing a schedule and
+    a model are handled as one matrix. Rate-dependent cash flows (floating rate notes) are
+    differentiated through `Bond.path_cash_flow_tangents`.
+
+    :param bonds: The bonds. Bonds without an inflation model are discounted at a zero rate.
+    :param pillars: Increasing pillar times, at least two.
+    :return: A `KeyRateProfile`.
+    """
+    pillars = np.asarray(pillars, dtype=float)
+    if len(pillars) < 2 or np.any(np.diff(pillars) <= 0):
+        raise ValueError("Key-rate pillars must be at least two increasing times")
+
+    groups = {}
+    for row, bond in enumerate(bonds):
+        groups.setdefault((id(bond.schedule), id(bond.inflation_model)), []).append(row)
+
+    sensitivities = np.zeros((len(bonds), len(pillars)))
+    present_values = np.zeros(len(bonds))
+    for rows in groups.values():
+        first = bonds[rows[0]]
+        schedule, model = first.schedule, first.inflation_model
+        rates = schedule.discount_rates(model)
+        discount_factors = schedule.discount_factors(model)
+        amounts = np.array([bonds[row].cash_flow_amounts() for row in rows])
+
+        discounted = amounts * discount_factors
+        # Present value of the flows from each payment time onwards
+        tails = np.cumsum(discounted[:, ::-1], axis=1)[:, ::-1]
+        per_time = -tails / (schedule.payment_frequency + rates)
+        per_time[:, 0] = 0
+        group_sensitivities = project_onto_pillars(per_time, schedule.times, pillars)
+
+        # Cash flows that move with the rates, bumped along each pillar's interpolation weights
+        directions = get_operator(pillars, schedule.times).dense().T
+        for position, row in enumerate(rows):
+            tangents = bonds[row].path_cash_flow_tangents(rates[None, :], directions)
+            if np.any(tangents):
+                group_sensitivities[position] += (tangents * discount_factors).sum(axis=-1)
+
+        sensitivities[rows] = group_sensitivities
+        present_values[rows] = discounted[:, 1:].sum(axis=1)
+
+    return KeyRateProfile(pillars, sensitivities, present_values)
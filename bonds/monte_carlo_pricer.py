@@ -0,0 +1,149 @@
+import numpy as np
+
+from utils import kernels
+from utils.interpolation import get_operator
+from utils.precision import accumulate
+from utils.streaming_stats import QuantileSketch, RunningMoments
+
+
+DEFAULT_QUANTILES = (0.01, 0.05, 0.5, 0.95, 0.99)
+
+GREEK_PARAMETERS = ('r0', 'a', 'b', 'sigma')
+
+
+class MonteCarloResult:
+    """
+    Summary statistics of the simulated present value of a bond's cash flows.
+    """
+
+    def __init__(self, moments: RunningMoments, sketch: QuantileSketch, quantiles, n_chunks: int, converged: bool):
+        self.mean = moments.mean
+        self.std = moments.std
+        self.std_error = moments.std_error
+        self.n_paths = moments.count
+        self.quantiles = dict(zip(quantiles, sketch.quantiles(quantiles).tolist()))
+        self.n_chunks = n_chunks
+        self.converged = converged
+
+    def __str__(self):
+        return f"MonteCarloResult(mean={self.mean:.6f}, std_error={self.std_error:.6f}, n_paths={self.n_paths})"
+
+
+class MonteCarloGreeks:
+    """
+    The simulated present value of a bond's cash flows and its derivatives with respect to the model parameters.
+    """
+
+    def __init__(self, value: RunningMoments, greeks: dict, n_chunks: int):
+        self.mean = value.mean
+        self.std_error = value.std_error
+        self.n_paths = value.count
+        self.greeks = {name: moments.mean for name, moments in greeks.items()}
+        self.greek_std_errors = {name: moments.std_error for name, moments in greeks.items()}
+        self.n_chunks = n_chunks
+
+    def __str__(self):
+        greeks = ', '.join(f"{name}={value:.6f}" for name, value in self.greeks.items())
+        return f"MonteCarloGreeks(mean={self.mean:.6f}, {greeks}, n_paths={self.n_paths})"
+
+
+def chunk_seed(seed_sequence: np.random.SeedSequence, chunk_index: int) -> np.random.SeedSequence:
+    """
+    The seed of one chunk of paths, derived from the run's seed and the chunk's position only,
+    so a chunk draws the same shocks however many chunks run before or alongside it.
+    """
+    return np.random.SeedSequence(seed_sequence.entropy, spawn_key=(chunk_index,))
+
+
+def price_monte_carlo(bond, model, n_paths: int, chunk_size: int = 10000, seed=None, target_std_error=None,
+                      min_paths: int = 0, quantiles=DEFAULT_QUANTILES, dtype=None, sketch_size: int = 4096) -> MonteCarloResult:
+    """
+    Price a bond by Monte Carlo over simulated discount rate paths, one chunk of paths at a time.
+
+    Each path is discounted the same way as `Bond.calculate_pv_of_cash_flows`, and its present value
+    (the profit including the purchase price) is folded into running moments and a quantile sketch
+    before the next chunk is simulated. Peak memory is proportional to `chunk_size` and does not grow
+    with `n_paths`, and results are bit-reproducible for a given seed and chunk size.
+
+    :param bond: The bond to price. Its own inflation model is ignored.
+    :param model: A stochastic model with a `times` grid and a `simulate_paths(n_paths, seed, dtype)` method,
+                  such as `VasicekDiscountRateModel`.
+    :param n_paths: The maximum number of paths to simulate.
+    :param chunk_size: The number of paths simulated and discounted at once.
+    :param seed: Seed for the random number generator.
+    :param target_std_error: Stop early once the standard error of the mean falls to this level.
+    :param min_paths: The minimum number of paths before stopping early.
+    :param quantiles: The quantiles of the present value to estimate.
+    :param dtype: 'float32' or 'float64' for the path matrices, overriding the precision policy.
+    :param sketch_size: The capacity of each level of the quantile sketch.
+    :return: A `MonteCarloResult`.
+    """
+    interpolate = get_operator(model.times, bond.schedule.times)
+    seed_sequence = np.random.SeedSequence(seed)
+
+    moments = RunningMoments()
+    sketch = QuantileSketch(sketch_size)
+    converged = False
+    n_chunks = 0
+    for n_chunks, start in enumerate(range(0, n_paths, chunk_size), start=1):
+        paths = model.simulate_paths(min(chunk_size, n_paths - start), seed=chunk_seed(seed_sequence, n_chunks - 1), dtype=dtype)
+        discount_rates = interpolate(paths)
+        discount_factors = kernels.discount_factors(discount_rates / bond.payment_frequency, dtype=paths.dtype)
+        present_values = accumulate(bond.path_cash_flow_amounts(discount_rates) * discount_factors, axis=1)
+
+        moments.update(present_values)
+        sketch.update(present_values)
+        if target_std_error is not None and moments.count >= min_paths and moments.std_error <= target_std_error:
+            converged = True
+            break
+
+    return MonteCarloResult(moments, sketch, list(quantiles), n_chunks, converged)
+
+
+def price_monte_carlo_greeks(bond, model, n_paths: int, chunk_size: int = 10000, seed=None, dtype=None) -> MonteCarloGreeks:
+    """
+    Price a bond by Monte Carlo together with pathwise derivatives of the price with respect to every
+    model parameter, on the same paths and chunks as `price_monte_carlo`.
+
+    Each path's present value is differentiated exactly: the derivatives of the simulated rates come
+    from `model.simulate_paths_with_tangents`, and are carried through the interpolation onto the
+    bond's schedule, the cash flows (`Bond.path_cash_flow_tangents`) and the discount factors
+    1 / prod(1 + r / f), whose log-derivative is -sum((dr / f) / (1 + r / f)). All the sensitivities
+    therefore cost a few more array passes over the chunk rather than a re-simulation per bumped
+    parameter, and carry none of the noise of differencing two Monte Carlo prices.
+
+    :param bond: The bond to price. Its own inflation model is ignored.
+    :param model: A stochastic model with a `times` grid and a `simulate_paths_with_tangents(n_paths, seed, dtype)`
+                  method, such as `VasicekDiscountRateModel`.
+    :param n_paths: The number of paths to simulate.
+    :param chunk_size: The number of paths simulated and differentiated at once.
+    :param seed: Seed for the random number generator.
+    :param dtype: 'float32' or 'float64' for the path matrices, overriding the precision policy.
+    :return: A `MonteCarloGreeks`.
+    """
+    interpolate = get_operator(model.times, bond.schedule.times)
+    seed_sequence = np.random.SeedSequence(seed)
+
+    value = RunningMoments()
+    greeks = {}
+    n_chunks = 0
+    for n_chunks, start in enumerate(range(0, n_paths, chunk_size), start=1):
+        count = min(chunk_size, n_paths - start)
+        paths, path_tangents = model.simulate_paths_with_tangents(count, seed=chunk_seed(seed_sequence, n_chunks - 1), dtype=dtype)
+        discount_rates = interpolate(paths)
+        rate_tangents = interpolate(np.stack([np.broadcast_to(path_tangents[name], paths.shape) for name in path_tangents]))
+
+        period_rates = discount_rates / bond.payment_frequency
+        discount_factors = kernels.discount_factors(period_rates, dtype=paths.dtype)
+        log_factor_tangents = -(rate_tangents / bond.payment_frequency) / (1 + period_rates)
+        log_factor_tangents[..., 0] = 0
+        log_factor_tangents = np.cumsum(log_factor_tangents, axis=-1)
+
+        cash_flows = bond.path_cash_flow_amounts(discount_rates)
+        cash_flow_tangents = bond.path_cash_flow_tangents(discount_rates, rate_tangents)
+        value.update(accumulate(cash_flows * discount_factors, axis=1))
+        present_value_tangents = accumulate((cash_flow_tangents + cash_flows * log_factor_tangents) * discount_factors, axis=-1)
+        for name, chunk in zip(path_tangents, present_value_tangents):
+            greeks.setdefault(name, RunningMoments()).update(chunk)
+
+    return MonteCarloGreeks(value, greeks, n_chunks)
@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+from bonds.amortization_engine import amortize_pool
 from bonds.base_bond import Bond
 
 class PartiallyAmortizingBond(Bond):
@@ -19,26 +23,48 @@ class PartiallyAmortizingBond(Bond):
         self.coupon_rate = coupon_rate
         self.baloon_payment = baloon_payment
 
-    def calculate_cash_flows(self) -> list:
+    def calculate_amortization_schedule(self, prepayment_speed: float = 0, prepayment_model: str = 'cpr') -> pd.DataFrame:
+        """
+        Split the bond's payments into interest, scheduled principal, prepayment and balloon.
+
+        :param prepayment_speed: The prepayment speed, as a CPR or a PSA percentage.
+        :param prepayment_model: 'cpr' or 'psa'.
+        :return: A pandas DataFrame with one row per period, starting at time 0.
         """
-        Calculate the cash flows of the fixed-rate bond.
+        result = amortize_pool(self.face_value, self.coupon_rate, self.maturity, self.payment_frequency,
+                               self.baloon_payment, prepayment_speed, prepayment_model)
+
+        return pd.DataFrame({
+            "Time (Years)": result.times,
+            "Balance": result.balance[0, 0],
+            "Interest": result.interest[0, 0],
+            "Scheduled Principal": result.scheduled_principal[0, 0],
+            "Prepayment": result.prepayment[0, 0],
+            "Balloon": result.balloon[0, 0],
+        })
 
-        :return: A list of tuples (time_period, cash_flow).
+    def cash_flow_amounts(self) -> np.ndarray:
         """
-        cash_flows = [(0, -self.price)]
-        n_periods = int(self.maturity * self.payment_frequency)
-        r_period = (self.coupon_rate / self.payment_frequency)
-        pv_baloon_payment = self.baloon_payment / (1 + r_period) ** n_periods 
-        print(pv_baloon_payment)
-        periodic_payment = (r_period * (self.face_value - pv_baloon_payment)) / (1 - (1 + r_period) ** -n_periods)
-        print(periodic_payment)
-                            
-        for t in range(1, n_periods):
-            time_period = t / self.payment_frequency
-            cash_flows.append((time_period, periodic_payment))
-
-        # Add face value repayment and final coupon payment at maturity
-        final_payment = self.baloon_payment + periodic_payment
-        cash_flows.append((self.maturity, final_payment))
-
-        return cash_flows
\ No newline at end of file
+        Calculate the cash flows of the partially amortizing bond on its payment schedule.
+
+        :return: An array of cash flows aligned with `self.schedule.times`.
+        """
+        return amortizing_amounts(self.face_value, self.price, self.coupon_rate, self.maturity, self.payment_frequency,
+                                  self.baloon_payment)
+
+
+def amortizing_amounts(face_value: float, price: float, coupon_rate: float, maturity: float, payment_frequency: int,
+                       baloon_payment: float) -> np.ndarray:
+    """
+    The cash flows of a partially amortizing bond from its terms, shared by `PartiallyAmortizingBond`
+    and `AmortizingSpec`.
+
+    :return: An array of cash flows on the bond's payment schedule, the price paid at time 0 first.
+    """
+    result = amortize_pool(face_value, coupon_rate, maturity, payment_frequency, baloon_payment)
+
+    # Level payments each period, with the balloon payment added at maturity
+    cash_flows = result.payments[0, 0]
+    cash_flows[0] = -price
+
+    return cash_flows
@@ -0,0 +1,87 @@
+import numpy as np
+
+from utils.discounting import model_discount_factors
+from utils.precision import accumulate, get_dtype
+
+
+class PhantomIncomeResult:
+    """
+    Phantom income, tax and after-tax values for a batch of zero-coupon bonds.
+
+    Period arrays are laid out on a common grid of `n_periods + 1` columns starting at time 0,
+    where `n_periods` is the longest schedule in the batch. Columns past a bond's maturity hold
+    zero income. Arrays indexed by tax rate have the tax rates along their second axis.
+    """
+
+    def __init__(self, times, n_periods, phantom_income, discount_factors, face_values, prices, tax_rates):
+        self.times = times
+        self.n_periods = n_periods
+        self.phantom_income = phantom_income
+        self.discount_factors = discount_factors
+        self.tax_rates = tax_rates
+
+        rows = np.arange(len(face_values))
+        self.pv_phantom_income = accumulate(phantom_income * discount_factors, axis=1)
+        self.total_phantom_income = accumulate(phantom_income, axis=1)
+        self.pv_face_value = face_values * discount_factors[rows, n_periods].astype(np.float64)
+
+        self.profit = face_values - prices
+        self.pv_profit = self.pv_face_value - prices
+        self.after_tax_profit = self.profit[:, None] - tax_rates[None, :] * self.total_phantom_income[:, None]
+        self.after_tax_pv = self.pv_profit[:, None] - tax_rates[None, :] * self.pv_phantom_income[:, None]
+
+    def tax_payments(self, present_value=False):
+        """
+        Tax owed on the phantom income of every bond, for every tax rate and period.
+
+        :param present_value: Whether to discount the tax payments.
+        :return: An array of shape (n_bonds, n_tax_rates, n_periods + 1).
+        """
+        income = self.phantom_income * self.discount_factors if present_value else self.phantom_income
+
+        return self.tax_rates[None, :, None] * income[:, None, :]
+
+
+def value_zero_coupon_batch(face_values, prices, maturities, payment_frequency, tax_rates, inflation_model=None,
+                            dtype=None) -> PhantomIncomeResult:
+    """
+    Compute the phantom (accreted) income of many zero-coupon bonds, the tax owed on it and the
+    after-tax profit and present value under every tax rate at once.
+
+    Each period's phantom income is `ytm * price * (1 + ytm) ** (t - 1)`, as in
+    `ZeroCouponBond.calculate_phantom_payments`, and is discounted with the same cumulative
+    discount factors as every other bond cash flow.
+
+    :param face_values: The face values of the bonds.
+    :param prices: The purchase prices of the bonds.
+    :param maturities: The times to maturity (in years).
+    :param payment_frequency: The number of accrual periods per year, shared or per bond.
+    :param tax_rates: The tax rates to evaluate every bond under.
+    :param inflation_model: The discount rate model, or None for nominal values.
+    :param dtype: The dtype of the (bonds x periods) arrays, overriding the precision policy.
+    :return: A `PhantomIncomeResult`.
+    """
+    face_values = np.atleast_1d(np.asarray(face_values, dtype=float))
+    prices = np.atleast_1d(np.asarray(prices, dtype=float))
+    maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+    tax_rates = np.atleast_1d(np.asarray(tax_rates, dtype=float))
+    face_values, prices, maturities, frequency = np.broadcast_arrays(
+        face_values, prices, maturities, np.asarray(payment_frequency, dtype=float))
+
+    exact_periods = maturities * frequency
+    n_periods = exact_periods.astype(int)
+    ytm = (face_values / prices) ** (1 / exact_periods) - 1
+
+    # Periods past a bond's maturity are clipped to it, so they add no new discount rates
+    periods = np.arange(n_periods.max() + 1)
+    clipped = np.minimum(periods[None, :], n_periods[:, None])
+    times = clipped / frequency[:, None]
+
+    dtype = get_dtype(dtype)
+    accrued = (1 + ytm[:, None]) ** (clipped - 1)
+    phantom_income = np.where(periods[None, :] <= n_periods[:, None], ytm[:, None] * prices[:, None] * accrued, 0).astype(dtype)
+    phantom_income[:, 0] = 0
+
+    discount_factors = model_discount_factors(inflation_model, times, frequency, dtype)
+
+    return PhantomIncomeResult(times, n_periods, phantom_income, discount_factors, face_values, prices, tax_rates)
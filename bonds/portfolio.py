@@ -0,0 +1,84 @@
+import numpy as np
+
+from utils import kernels
+from utils.interpolation import get_operator
+from utils.precision import get_dtype
+
+
+class Portfolio:
+    """
+    The cash flows of many bonds laid out on one common time grid, one row per bond.
+
+    Discounting on the grid follows `Bond.calculate_pv_of_cash_flows`: the rate at each grid time
+    applies to the step that ends there, scaled by the length of the step. On a grid with the same
+    spacing as a bond's schedule this gives exactly the bond's own present value.
+    Cash flows that depend on the discount rates (floating rate notes) are fixed at the values
+    projected by each bond's own inflation model.
+    """
+
+    def __init__(self, times, amounts, bond_types=None):
+        """
+        :param times: The common time grid, starting at time 0.
+        :param amounts: The cash flows of each bond at each grid time, shape (n_bonds, n_times).
+        :param bond_types: The class name of each bond, for breakdowns.
+        """
+        self.times = np.asarray(times, dtype=float)
+        self.amounts = amounts
+        self.bond_types = bond_types
+        self.steps = np.diff(self.times, prepend=0.0)
+
+    @classmethod
+    def from_bonds(cls, bonds: list, dtype=None) -> 'Portfolio':
+        """
+        Place the scheduled cash flows of every bond on the union of their schedules.
+
+        :param bonds: The bonds of the portfolio.
+        :param dtype: The dtype of the cash flow matrix, overriding the precision policy.
+        :return: A `Portfolio`.
+        """
+        schedules = {id(bond.schedule): bond.schedule for bond in bonds}
+        times = np.unique(np.concatenate([schedule.times for schedule in schedules.values()]))
+        columns = {key: np.searchsorted(times, schedule.times) for key, schedule in schedules.items()}
+
+        amounts = np.zeros((len(bonds), len(times)), dtype=get_dtype(dtype))
+        for row, bond in enumerate(bonds):
+            amounts[row, columns[id(bond.schedule)]] = bond.cash_flow_amounts()
+
+        return cls(times, amounts, [bond.__class__.__name__ for bond in bonds])
+
+    @property
+    def n_bonds(self) -> int:
+        return self.amounts.shape[0]
+
+    def rates_from_paths(self, path_times, paths) -> np.ndarray:
+        """
+        Interpolate simulated rate paths onto the portfolio grid.
+
+        :param path_times: The simulation time grid.
+        :param paths: Rates on the simulation grid, shape (n_paths, len(path_times)).
+        :return: Rates at the portfolio times, shape (n_paths, n_times).
+        """
+        return get_operator(path_times, self.times).apply(paths)
+
+    def discount_factors(self, discount_rates) -> np.ndarray:
+        """
+        Cumulative discount factors on the grid for one or more rate scenarios.
+
+        :param discount_rates: Rates at the portfolio times, shape (n_times,) or (n_scenarios, n_times).
+        :return: An array with the shape of `discount_rates`.
+        """
+        discount_rates = np.asarray(discount_rates)
+        return kernels.discount_factors(discount_rates * self.steps.astype(discount_rates.dtype), dtype=discount_rates.dtype)
+
+    def present_values(self, discount_rates, by_bond=True) -> np.ndarray:
+        """
+        Present value of every bond under every rate scenario, as one matrix product.
+
+        :param discount_rates: Rates at the portfolio times, shape (n_times,) or (n_scenarios, n_times).
+        :param by_bond: Return one value per bond, or only the portfolio total per scenario.
+        :return: An array of shape (n_scenarios, n_bonds), or (n_scenarios,) without `by_bond`.
+        """
+        discount_factors = self.discount_factors(discount_rates)
+        if by_bond:
+            return discount_factors @ self.amounts.T
+        return discount_factors @ self.amounts.sum(axis=0, dtype=np.float64).astype(discount_factors.dtype)
@@ -0,0 +1,176 @@
+"""
+Value at risk and expected shortfall of a `Portfolio` over streamed rate scenarios.
+
+A scenario is a discount rate curve on a time grid. Scenario sources are generators of chunks
+of curves, shape (n_scenarios, n_grid), read from a memory-mapped file or simulated on the fly.
+Each chunk is revalued with one broadcast discounting pass, its profit and loss is folded into
+running moments, a quantile sketch and a fixed-size buffer of the largest losses, and the chunk
+is dropped, so peak memory depends on the chunk size but not on the number of scenarios. VaR and
+ES are exact whenever the tail beyond the confidence level fits in the buffer, and come from the
+sketch otherwise. Exact mode keeps every loss instead.
+"""
+import numpy as np
+
+from bonds.monte_carlo_pricer import chunk_seed
+from bonds.portfolio import Portfolio
+from utils.interpolation import get_operator
+from utils.streaming_stats import QuantileSketch, RunningMoments
+
+
+DEFAULT_CONFIDENCES = (0.99, 0.975)
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def file_scenarios(path: str, chunk_size: int = 10000):
+    """
+    Stream rate curves from a `.npy` file of shape (n_scenarios, n_grid), memory-mapped so only
+    one chunk is read at a time.
+    """
+    curves = np.load(path, mmap_mode='r')
+    for start in range(0, curves.shape[0], chunk_size):
+        yield np.array(curves[start:start + chunk_size])
+
+
+def historical_scenarios(path: str, base_rates, horizon_days: int = 1, chunk_size: int = 10000):
+    """
+    Stream historical scenarios: the base curve shifted by every overlapping `horizon_days` change
+    of a history of daily curve changes.
+
+    :param path: A `.npy` file of daily rate changes, shape (n_days, n_grid), memory-mapped.
+    :param base_rates: Today's rate curve on the same grid.
+    :param horizon_days: The number of consecutive daily changes summed into one scenario.
+    :param chunk_size: The number of scenarios per chunk.
+    """
+    changes = np.load(path, mmap_mode='r')
+    base_rates = np.asarray(base_rates, dtype=float)
+    n_scenarios = changes.shape[0] - horizon_days + 1
+    for start in range(0, max(n_scenarios, 0), chunk_size):
+        stop = min(start + chunk_size, n_scenarios)
+        # Each chunk reads its own days plus the overlap needed by the last scenarios
+        window = np.cumsum(np.array(changes[start:stop + horizon_days - 1]), axis=0)
+        window = np.concatenate([np.zeros((1, window.shape[1])), window])
+        yield base_rates + window[horizon_days:] - window[:-horizon_days]
+
+
+def vasicek_scenarios(model, grid, n_scenarios: int, horizon_days: int = 1, chunk_size: int = 10000, seed=None):
+    """
+    Stream simulated scenarios: the short rate is drawn from its exact Vasicek distribution after
+    `horizon_days`, and the curve moves with it as the Vasicek expected path does,
+    r(t) = b + (r - b) exp(-a t).
+
+    :param model: A `VasicekDiscountRateModel`, providing a, b, sigma and r0.
+    :param grid: The time grid of the curves.
+    :param n_scenarios: The number of scenarios.
+    :param horizon_days: The risk horizon in trading days.
+    :param chunk_size: The number of scenarios per chunk.
+    :param seed: Seed for the random number generator; chunks are seeded as in `price_monte_carlo`.
+    """
+    grid = np.asarray(grid, dtype=float)
+    horizon = horizon_days / TRADING_DAYS_PER_YEAR
+    decay = np.exp(-model.a * horizon)
+    mean = model.r0 * decay + model.b * (1 - decay)
+    std = model.sigma * np.sqrt(-np.expm1(-2 * model.a * horizon) / (2 * model.a)) if model.a else model.sigma * np.sqrt(horizon)
+    base_rates = model.b + (model.r0 - model.b) * np.exp(-model.a * grid)
+    loadings = np.exp(-model.a * grid)
+
+    seed_sequence = np.random.SeedSequence(seed)
+    for index, start in enumerate(range(0, n_scenarios, chunk_size)):
+        shocks = np.random.default_rng(chunk_seed(seed_sequence, index)).standard_normal(min(chunk_size, n_scenarios - start))
+        short_rates = mean + std * shocks
+        yield base_rates + (short_rates - model.r0)[:, None] * loadings
+
+
+class RiskResult:
+    """
+    Value at risk and expected shortfall of the losses over every scenario, at each confidence level.
+    """
+
+    def __init__(self, confidences, var: dict, es: dict, moments: RunningMoments, base_value: float, exact: bool):
+        self.confidences = tuple(confidences)
+        self.var = var
+        self.es = es
+        self.n_scenarios = moments.count
+        self.mean_pnl = moments.mean
+        self.std_pnl = moments.std
+        self.base_value = base_value
+        self.exact = exact
+
+    def __str__(self):
+        levels = ', '.join(f"VaR{c:g}={self.var[c]:.4f} ES{c:g}={self.es[c]:.4f}" for c in self.confidences)
+        return f"RiskResult({levels}, n_scenarios={self.n_scenarios})"
+
+
+class RiskEngine:
+    """
+    Revalues a portfolio under streamed rate scenarios and estimates VaR and ES of its losses.
+    """
+
+    def __init__(self, portfolio: Portfolio, grid, base_rates, confidences=DEFAULT_CONFIDENCES, exact: bool = False,
+                 sketch_size: int = 4096, tail_size: int = 65536):
+        """
+        :param portfolio: The book, as a cash flow matrix.
+        :param grid: The time grid of the scenario curves.
+        :param base_rates: Today's rate curve on the grid, the reference for profit and loss.
+        :param confidences: The confidence levels of VaR and ES.
+        :param exact: Keep every loss and compute exact VaR and ES instead of sketching them.
+        :param sketch_size: The capacity of each level of the quantile sketch.
+        :param tail_size: The number of largest losses kept for exact tail estimates.
+        """
+        self.portfolio = portfolio
+        self.interpolate = get_operator(grid, portfolio.times)
+        self.confidences = tuple(confidences)
+        self.exact = exact
+        self.sketch_size = sketch_size
+        self.tail_size = tail_size
+        self.base_value = float(self.revalue(np.asarray(base_rates, dtype=float)[None, :])[0])
+
+    def revalue(self, curves: np.ndarray) -> np.ndarray:
+        """
+        The portfolio value under each curve of a chunk, shape (n_scenarios,).
+        """
+        return self.portfolio.present_values(self.interpolate(curves), by_bond=False)
+
+    def run(self, scenarios) -> RiskResult:
+        """
+        Stream the scenarios through the engine.
+
+        :param scenarios: An iterable of curve chunks, e.g. from `historical_scenarios` or `vasicek_scenarios`.
+        :return: A `RiskResult`.
+        """
+        moments = RunningMoments()
+        sketch = QuantileSketch(self.sketch_size)
+        tail = np.empty(0)
+        losses = []
+        for curves in scenarios:
+            chunk_losses = self.base_value - self.revalue(curves)
+            moments.update(-chunk_losses)
+            if self.exact:
+                losses.append(chunk_losses)
+                continue
+            sketch.update(chunk_losses)
+            tail = np.concatenate([tail, chunk_losses])
+            if tail.size > self.tail_size:
+                dropped = tail.size - self.tail_size
+                tail = np.partition(tail, dropped - 1)[dropped:]
+
+        if self.exact:
+            tail = np.concatenate(losses) if losses else np.empty(0)
+        tail = np.sort(tail)[::-1]
+
+        var, es = {}, {}
+        for confidence in self.confidences:
+            if moments.count == 0:
+                # No scenarios, so no loss distribution to take a quantile of
+                var[confidence] = es[confidence] = float('nan')
+                continue
+            # The loss ranked ceil(confidence * n) from the bottom, as np.quantile(method='inverted_cdf')
+            rank = moments.count - int(np.ceil(confidence * moments.count))
+            if rank < tail.size:
+                var[confidence] = float(tail[rank])
+                es[confidence] = float(tail[tail >= tail[rank]].mean())
+            else:
+                var[confidence] = float(sketch.quantiles([confidence])[0])
+                es[confidence] = sketch.tail_mean(confidence)
+
+        return RiskResult(self.confidences, var, es, moments, self.base_value, self.exact)
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bonds.portfolio import Portfolio
+from utils.shared_arrays import SharedArrayPool, attach_worker, worker_array
+
+
+def _value_paths(portfolio: Portfolio, path_times, paths, by_bond: bool) -> np.ndarray:
+    return portfolio.present_values(portfolio.rates_from_paths(path_times, paths), by_bond=by_bond)
+
+
+def _init_worker(descriptors: dict, times, path_times, bond_types):
+    attach_worker(descriptors)
+    _worker_state['portfolio'] = Portfolio(times, worker_array('amounts'), bond_types)
+    _worker_state['path_times'] = path_times
+
+
+_worker_state = {}
+
+
+def _value_range(task):
+    """
+    Value one range of paths inside a worker, writing straight into the shared output.
+    Only the (start, stop) range travels between processes.
+    """
+    start, stop, by_bond = task
+    output = worker_array('output')
+    output[start:stop] = _value_paths(_worker_state['portfolio'], _worker_state['path_times'],
+                                      worker_array('paths')[start:stop], by_bond)
+
+    return start, stop
+
+
+def value_scenarios(portfolio: Portfolio, path_times, paths, workers: int = 1, chunk_size: int = 1000,
+                    by_bond: bool = False) -> np.ndarray:
+    """
+    Value a portfolio under every simulated discount rate path, fanned out across processes.
+
+    With more than one worker the paths, the portfolio's cash flow matrix and the output are
+    placed in shared memory blocks; workers attach to them once and receive only index ranges,
+    so nothing large is pickled. The blocks are unlinked when the valuation finishes or fails.
+
+    :param portfolio: The portfolio to value.
+    :param path_times: The simulation time grid of the paths.
+    :param paths: Simulated discount rates, shape (n_paths, len(path_times)).
+    :param workers: The number of worker processes.
+    :param chunk_size: The number of paths valued per task.
+    :param by_bond: Return one value per bond and path, or only the portfolio total per path.
+    :return: An array of shape (n_paths, n_bonds), or (n_paths,) without `by_bond`.
+    """
+    paths = np.asarray(paths)
+    n_paths = paths.shape[0]
+    ranges = [(start, min(start + chunk_size, n_paths), by_bond) for start in range(0, n_paths, chunk_size)]
+    output_shape = (n_paths, portfolio.n_bonds) if by_bond else (n_paths,)
+    output_dtype = np.result_type(paths.dtype, portfolio.amounts.dtype)
+
+    if workers <= 1 or len(ranges) <= 1:
+        output = np.empty(output_shape, dtype=output_dtype)
+        for start, stop, _ in ranges:
+            output[start:stop] = _value_paths(portfolio, path_times, paths[start:stop], by_bond)
+        return output
+
+    with SharedArrayPool() as pool:
+        descriptors = {
+            'paths': pool.share(paths)[0],
+            'amounts': pool.share(portfolio.amounts)[0],
+        }
+        descriptors['output'], output = pool.create(output_shape, output_dtype)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(descriptors, portfolio.times, np.asarray(path_times), portfolio.bond_types)) as executor:
+            list(executor.map(_value_range, ranges))
+
+        result = output.copy()
+        del output
+
+    return result
@@ -0,0 +1,144 @@
+import numpy as np
+
+
+class TrinomialTree:
+    """
+    A recombining Hull-White trinomial tree for the Vasicek short rate.
+
+    The tree is built for the deviation x = r - E[r], which follows dx = -a x dt + sigma dW, on
+    nodes j * dx with dx = sigma * sqrt(3 dt). Branching switches from (j+1, j, j-1) to
+    (j, j-1, j-2) at the top edge j_max and to (j+2, j+1, j) at the bottom edge so the
+    probabilities stay positive. The expected rate E[r] follows the same Euler recursion as
+    `VasicekDiscountRateModel`, so the tree is centred on the mean of the simulated paths.
+    """
+
+    def __init__(self, a: float, b: float, sigma: float, r0: float, maturity: float, steps_per_year: int = 48):
+        """
+        Build the tree.
+
+        :param a: Speed of mean reversion.
+        :param b: Long-term mean rate.
+        :param sigma: Volatility of the rate.
+        :param r0: Initial discount rate.
+        :param maturity: The last time the tree must cover (in years).
+        :param steps_per_year: The number of time steps per year. Payment and exercise times are
+                               rounded to the nearest step, so this should be a multiple of every
+                               payment frequency priced on the tree.
+        """
+        self.a = a
+        self.b = b
+        self.sigma = sigma
+        self.r0 = r0
+        self.steps_per_year = steps_per_year
+        self.dt = 1 / steps_per_year
+        self.n_steps = max(int(round(maturity * steps_per_year)), 1)
+        self.times = np.arange(self.n_steps + 1) * self.dt
+
+        self.dx = sigma * np.sqrt(3 * self.dt)
+        m = -a * self.dt
+        self.j_max = self.n_steps if m == 0 else min(int(np.ceil(0.184 / (a * self.dt))), self.n_steps)
+        self.j_max = max(self.j_max, 1)
+        j = np.arange(-self.j_max, self.j_max + 1)
+
+        # Probabilities of the (up, middle, down) branches and the node index of each branch
+        jm = j * m
+        self.probabilities = np.column_stack([1 / 6 + (jm ** 2 + jm) / 2, 2 / 3 - jm ** 2, 1 / 6 + (jm ** 2 - jm) / 2])
+        self.children = np.column_stack([j + 1, j, j - 1]) + self.j_max
+        top, bottom = j == self.j_max, j == -self.j_max
+        if m != 0:
+            self.probabilities[top] = np.column_stack([7 / 6 + (jm[top] ** 2 + 3 * jm[top]) / 2,
+                                                      -1 / 3 - jm[top] ** 2 - 2 * jm[top],
+                                                      1 / 6 + (jm[top] ** 2 + jm[top]) / 2])
+            self.children[top] -= 1
+            self.probabilities[bottom] = np.column_stack([1 / 6 + (jm[bottom] ** 2 - jm[bottom]) / 2,
+                                                         -1 / 3 - jm[bottom] ** 2 + 2 * jm[bottom],
+                                                         7 / 6 + (jm[bottom] ** 2 - 3 * jm[bottom]) / 2])
+            self.children[bottom] += 1
+        else:
+            # Without mean reversion the edges are never reached: the tree is as wide as it is long
+            self.children = np.clip(self.children, 0, 2 * self.j_max)
+
+        self.mean_rates = b + (r0 - b) * (1 - a * self.dt) ** np.arange(self.n_steps + 1)
+        self.rates = self.mean_rates[:, None] + j[None, :] * self.dx
+
+    @classmethod
+    def from_model(cls, model, maturity: float, steps_per_year: int = 48) -> 'TrinomialTree':
+        """
+        Build the tree from the parameters of a `VasicekDiscountRateModel`.
+        """
+        return cls(model.a, model.b, model.sigma, model.r0, maturity, steps_per_year)
+
+    @property
+    def width(self) -> int:
+        return 2 * self.j_max + 1
+
+    def step_index(self, times) -> np.ndarray:
+        """
+        The tree step nearest to each time.
+        """
+        return np.rint(np.asarray(times, dtype=float) * self.steps_per_year).astype(int)
+
+    def step_discount_factors(self, step: int) -> np.ndarray:
+        """
+        The discount factor of every node over the step that ends at `step`, using the rate at the
+        end of the step as `Bond.calculate_pv_of_cash_flows` does.
+        """
+        return 1 / (1 + self.rates[step] * self.dt)
+
+
+def _exercise_matrix(tree: TrinomialTree, bonds: list, attribute: str, fill: float) -> np.ndarray:
+    prices = np.full((tree.n_steps + 1, len(bonds)), fill)
+    for column, bond in enumerate(bonds):
+        schedule = getattr(bond, attribute, None) or []
+        if schedule:
+            times, strikes = zip(*schedule)
+            prices[tree.step_index(times), column] = strikes
+
+    return prices
+
+
+def value_on_tree(bonds: list, tree: TrinomialTree) -> np.ndarray:
+    """
+    Value many bonds with embedded options on one tree, in a single backward sweep.
+
+    The sweep carries one column of node values per bond, so each time slice is one vectorized update
+    for the whole book. The value at a node is the price of the flows after that time; on a call date
+    the issuer redeems at the call price if that is cheaper, and on a put date the holder sells back at
+    the put price if that is dearer. Bonds without `call_schedule` or `put_schedule` are valued as
+    straight bonds.
+
+    :param bonds: Fixed rate bonds (e.g. `CallableBond`) whose maturities are covered by the tree.
+    :param tree: The `TrinomialTree` to price on.
+    :return: The value at time 0 of each bond's flows after time 0, i.e. its model price.
+    """
+    cash_flows = np.zeros((tree.n_steps + 1, len(bonds)))
+    for column, bond in enumerate(bonds):
+        steps = tree.step_index(bond.schedule.times[1:])
+        if steps.max() > tree.n_steps:
+            raise ValueError(f"Bond maturity {bond.maturity} is beyond the tree ({tree.times[-1]} years)")
+        np.add.at(cash_flows[:, column], steps, bond.cash_flow_amounts()[1:])
+
+    call_prices = _exercise_matrix(tree, bonds, 'call_schedule', np.inf)
+    put_prices = _exercise_matrix(tree, bonds, 'put_schedule', -np.inf)
+
+    # Interior nodes branch to their neighbours, so their update uses contiguous slices; only the
+    # two edge nodes need the general branching
+    p_up, p_middle, p_down = tree.probabilities[1:-1, :, None].transpose(1, 0, 2)
+    edges = [0, tree.width - 1]
+    edge_children = tree.children[edges]
+    edge_probabilities = tree.probabilities[edges]
+
+    values = np.zeros((tree.width, len(bonds)))
+    payoff = np.empty_like(values)
+    for step in range(tree.n_steps - 1, -1, -1):
+        np.add(values, cash_flows[step + 1], out=payoff)
+        payoff *= tree.step_discount_factors(step + 1)[:, None]
+        edge_values = np.einsum('ekb,ek->eb', payoff[edge_children], edge_probabilities)
+        np.multiply(payoff[2:], p_up, out=values[1:-1])
+        values[1:-1] += payoff[1:-1] * p_middle
+        values[1:-1] += payoff[:-2] * p_down
+        values[edges] = edge_values
+        np.minimum(values, call_prices[step], out=values)
+        np.maximum(values, put_prices[step], out=values)
+
+    return values[tree.j_max]
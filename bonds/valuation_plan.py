@@ -0,0 +1,280 @@
+"""
+A lazy valuation plan: declare the outputs a report needs, then compute each shared intermediate once.
+
+Requesting an output adds the nodes that produce it to a graph, keyed by what they compute, so a
+table, a chart and a profit of the same bond under the same model share one set of cash flows,
+and bonds with the same schedule and model share one set of discount factors. Nothing is computed
+until `run()`, which evaluates the nodes in dependency order, times each of them and drops every
+intermediate value as soon as the last node that reads it has run. `report()` prints the executed
+plan.
+
+    plan = ValuationPlan()
+    table = plan.request(bond, 'table')
+    chart = plan.request(bond, 'chart', title="Cash flows", filepath="_data/graphs/", inflation_adjusted=True)
+    plan.run()
+    df = plan.result(table)
+    print(plan.report())
+"""
+import copy
+import time
+
+import numpy as np
+
+from bonds.base_bond import Bond
+
+
+OUTPUTS = ('cash_flows', 'pv_cash_flows', 'cumulative_pv', 'discount_rates', 'profit', 'pv_profit', 'table', 'chart')
+
+
+class PlanNode:
+    """
+    One computation of a plan and, once it has run, its value and timing.
+    """
+
+    def __init__(self, key: tuple, label: str, func, inputs: tuple):
+        """
+        :param key: What the node computes; requests that need the same key share the node.
+        :param label: A readable name for reports.
+        :param func: Called with the values of `inputs`.
+        :param inputs: The keys of the nodes whose values `func` takes.
+        """
+        self.key = key
+        self.label = label
+        self.func = func
+        self.inputs = inputs
+        self.value = None
+        self.seconds = None
+        self.readers = 0
+        self.requested = False
+        self.freed = False
+
+
+class ValuationPlan:
+    """
+    A graph of valuation steps for a set of bonds and models, built by `request` and evaluated by `run`.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.outputs = []
+        # The bonds of the plan, held so that their ids stay valid as node keys, and their copies
+        # under other models
+        self.bonds = []
+        self.variants = {}
+        self.labels = {}
+
+    def _bond(self, bond: Bond, model) -> Bond:
+        if model is not None and model is not bond.inflation_model:
+            key = (id(bond), id(model))
+            if key not in self.variants:
+                variant = copy.copy(bond)
+                variant.inflation_model = model
+                self.variants[key] = variant
+            bond = self.variants[key]
+        if id(bond) not in self.labels:
+            self.bonds.append(bond)
+            self.labels[id(bond)] = f"{bond.__class__.__name__}#{len(self.labels)}"
+
+        return bond
+
+    def _add(self, key: tuple, label: str, func, inputs: tuple = ()) -> tuple:
+        if key not in self.nodes:
+            self.nodes[key] = PlanNode(key, label, func, inputs)
+            for input_key in inputs:
+                self.nodes[input_key].readers += 1
+        return key
+
+    def _model_label(self, model) -> str:
+        return model.__class__.__name__ if model is not None else 'no model'
+
+    def _schedule_node(self, kind: str, bond: Bond) -> tuple:
+        schedule, model = bond.schedule, bond.inflation_model
+        label = f"{kind}(schedule {schedule.maturity:g}y/{schedule.payment_frequency}, {self._model_label(model)})"
+        method = schedule.discount_factors if kind == 'discount_factors' else schedule.discount_rates
+        return self._add((kind, schedule.maturity, schedule.payment_frequency, id(model)), label, lambda: method(model))
+
+    def _node(self, kind: str, bond: Bond) -> tuple:
+        """
+        The node computing one intermediate of a bond, with the nodes it depends on.
+        """
+        key = (kind, id(bond))
+        if key in self.nodes:
+            return key
+        label = f"{kind}({self.labels[id(bond)]})"
+        base_flows = type(bond).calculate_cash_flows is Bond.calculate_cash_flows
+        base_present_values = type(bond).calculate_pv_of_cash_flows is Bond.calculate_pv_of_cash_flows
+
+        if kind == 'amounts':
+            return self._add(key, label, bond.cash_flow_amounts)
+        if kind == 'cash_flows':
+            if not base_flows:
+                return self._add(key, label, bond.calculate_cash_flows)
+            times = bond.schedule.times
+            return self._add(key, label, lambda amounts: list(zip(times.tolist(), amounts.tolist())),
+                             (self._node('amounts', bond),))
+        if kind == 'pv_cash_flows':
+            if bond.inflation_model is None and base_present_values:
+                return self._node('cash_flows', bond)
+            if not (base_flows and base_present_values):
+                return self._add(key, label, bond.calculate_pv_of_cash_flows)
+            times = bond.schedule.times
+            return self._add(key, label, lambda amounts, factors: list(zip(times.tolist(), (amounts * factors).tolist())),
+                             (self._node('amounts', bond), self._schedule_node('discount_factors', bond)))
+        if kind == 'cumulative_pv':
+            return self._add(key, label, _cumulative, (self._node('pv_cash_flows', bond),))
+        if kind == 'discount_rates':
+            model = bond.inflation_model
+            return self._add(key, label, lambda cash_flows, rates: _rates_at(cash_flows, bond.schedule, rates, model),
+                             (self._node('cash_flows', bond), self._schedule_node('discount_rates', bond)))
+        if kind in ('profit', 'pv_profit'):
+            source = self._node('pv_cash_flows' if kind == 'pv_profit' else 'cash_flows', bond)
+            return self._add(key, label, lambda cash_flows: sum([cf[1] for cf in cash_flows]), (source,))
+        if kind == 'table':
+            table = lambda nominal, real, rates: bond.table_cash_flows(nominal, real, [rate for _, rate in rates])
+            return self._add(key, label, table,
+                             (self._node('cash_flows', bond), self._node('pv_cash_flows', bond), self._node('discount_rates', bond)))
+
+        raise ValueError(f"Unknown output '{kind}'; choose from {OUTPUTS}")
+
+    def _chart(self, bond: Bond, title: str = "Cash Flows", filepath: str = "_data/graphs/",
+               inflation_adjusted: bool = False) -> tuple:
+        key = ('chart', id(bond), title, filepath, inflation_adjusted)
+        label = f"chart({self.labels[id(bond)]}, {'adjusted' if inflation_adjusted else 'nominal'})"
+        if not inflation_adjusted:
+            def plot(cash_flows):
+                bond.plot_cash_flows(title, filepath, cash_flows=cash_flows)
+                return filepath
+
+            return self._add(key, label, plot, (self._node('cash_flows', bond),))
+
+        def plot(cash_flows, rates):
+            bond.plot_cash_flows(title, filepath, inflation_adjusted=True, cash_flows=cash_flows,
+                                 discount_rates=[rate for _, rate in rates])
+            return filepath
+
+        return self._add(key, label, plot, (self._node('pv_cash_flows', bond), self._node('discount_rates', bond)))
+
+    def request(self, bond: Bond, output: str, model=None, **options) -> tuple:
+        """
+        Declare an output of the plan.
+
+        :param bond: The bond to value.
+        :param output: One of `OUTPUTS`: the lists of (time, amount) tuples 'cash_flows', 'pv_cash_flows',
+                       'cumulative_pv' and 'discount_rates', the floats 'profit' and 'pv_profit', the
+                       DataFrame 'table' of `Bond.table_cash_flows`, or a 'chart' saved by `Bond.plot_cash_flows`,
+                       whose value is its directory.
+        :param model: The discount rate model to value the bond under (default: the bond's own).
+        :param options: The `title`, `filepath` and `inflation_adjusted` arguments of a chart.
+        :return: The key of the output, to look its value up with `result` after `run`.
+        """
+        if output not in OUTPUTS:
+            raise ValueError(f"Unknown output '{output}'; choose from {OUTPUTS}")
+        if options and output != 'chart':
+            raise TypeError(f"Output '{output}' takes no options")
+        bond = self._bond(bond, model)
+        key = self._chart(bond, **options) if output == 'chart' else self._node(output, bond)
+        if not self.nodes[key].requested:
+            self.nodes[key].requested = True
+            self.outputs.append(key)
+
+        return key
+
+    def request_all(self, bonds: list, outputs, models=(None,)) -> dict:
+        """
+        Declare the same outputs for every bond under every model.
+
+        :return: A dict of output keys by (bond index, model index, output).
+        """
+        return {(i, j, output): self.request(bond, output, model)
+                for i, bond in enumerate(bonds) for j, model in enumerate(models) for output in outputs}
+
+    def _order(self) -> list:
+        """
+        The nodes needed by the outputs, each after its inputs, in the order the outputs were requested.
+        """
+        order, seen = [], set()
+        for output in self.outputs:
+            stack = [(output, False)]
+            while stack:
+                key, expanded = stack.pop()
+                if expanded:
+                    order.append(key)
+                    continue
+                if key in seen:
+                    continue
+                seen.add(key)
+                stack.append((key, True))
+                stack.extend((input_key, False) for input_key in reversed(self.nodes[key].inputs) if input_key not in seen)
+
+        return order
+
+    def run(self) -> dict:
+        """
+        Evaluate the plan, freeing every intermediate once its last reader has run. Running the
+        plan again, e.g. after more requests, evaluates every node again.
+
+        :return: The value of every output by key.
+        """
+        pending = {key: node.readers for key, node in self.nodes.items()}
+        for key in self._order():
+            node = self.nodes[key]
+            start = time.perf_counter()
+            node.value = node.func(*[self.nodes[input_key].value for input_key in node.inputs])
+            node.seconds = time.perf_counter() - start
+            node.freed = False
+            for input_key in node.inputs:
+                pending[input_key] -= 1
+                source = self.nodes[input_key]
+                if pending[input_key] == 0 and not source.requested:
+                    source.value = None
+                    source.freed = True
+
+        return {key: self.nodes[key].value for key in self.outputs}
+
+    def result(self, key: tuple):
+        """
+        The value of an output after `run`.
+        """
+        node = self.nodes[key]
+        if node.seconds is None:
+            raise RuntimeError(f"{node.label} has not been evaluated; call run() first")
+        return node.value
+
+    def report(self) -> str:
+        """
+        Format the executed plan: every node in evaluation order with its inputs, its number of
+        readers, its time and whether its value was kept as an output or freed.
+
+        :return: A multi-line string.
+        """
+        order = self._order()
+        index = {key: i for i, key in enumerate(order)}
+        computed = [self.nodes[key].seconds for key in order if self.nodes[key].seconds is not None]
+        lines = [f"=== valuation plan: {len(order)} nodes, {len(self.outputs)} outputs ===",
+                 f"{'#':>3} {'node':<56}{'inputs':>10}{'uses':>4}{'time':>11} state"]
+        for i, key in enumerate(order):
+            node = self.nodes[key]
+            inputs = ','.join(str(index[input_key]) for input_key in node.inputs) or '-'
+            seconds = f"{node.seconds:>10.6f}s" if node.seconds is not None else f"{'-':>11}"
+            state = 'output' if node.requested else 'freed' if node.freed else 'pending' if node.seconds is None else 'kept'
+            lines.append(f"{i:>3} {node.label:<56}{inputs:>10}{node.readers:>4}{seconds} {state}")
+        lines.append(f"{'total':<60}{'':>14}{sum(computed):>10.6f}s")
+
+        return "\n".join(lines)
+
+
+def _cumulative(cash_flows: list) -> list:
+    times = [cf[0] for cf in cash_flows]
+    return list(zip(times, np.cumsum([cf[1] for cf in cash_flows]).tolist()))
+
+
+def _rates_at(cash_flows: list, schedule, schedule_rates: np.ndarray, model) -> list:
+    """
+    The discount rates at the times of the cash flows, taken from the schedule's rates when every
+    time is on the schedule, and from the model otherwise.
+    """
+    times = np.array([cf[0] for cf in cash_flows], dtype=float)
+    positions = np.minimum(np.searchsorted(schedule.times, times), len(schedule.times) - 1)
+    if model is not None and not np.array_equal(schedule.times[positions], times):
+        return list(zip(times.tolist(), list(model.get_discount_rates(times.tolist()))))
+    return list(zip(times.tolist(), schedule_rates[positions].tolist()))
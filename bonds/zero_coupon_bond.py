@@ -1,6 +1,8 @@
 from bonds.base_bond import Bond
+from bonds.phantom_income_engine import value_zero_coupon_batch
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
 import os
 import pandas as pd
 
@@ -39,48 +41,97 @@ class ZeroCouponBond(Bond):
 
         return cash_flows
     
+    def _phantom_income(self):
+        """
+        Value this bond alone through the batch phantom income engine.
+        """
+        return value_zero_coupon_batch(self.face_value, self.price, self.maturity, self.payment_frequency,
+                                       self.tax_rate, self.inflation_model)
+
+    def cash_flow_amounts(self) -> np.ndarray:
+        """
+        Calculate the cash flows of the bond on its payment schedule: the price paid at time 0
+        and the face value repaid at maturity.
+
+        :return: An array of cash flows aligned with `self.schedule.times`.
+        """
+        return zero_coupon_amounts(self.face_value, self.price, self.schedule.n_periods)
+
+    def calculate_pv_of_cash_flows(self) -> list:
+        """
+        Calculate the present value of the purchase price and face value repayment.
+        The face value is discounted through every period up to maturity, not in a single step.
+
+        :return: A list of tuples (time, present_value).
+        """
+        result = self._phantom_income()
+
+        return [(0, -self.price), (self.maturity, float(result.pv_face_value[0]))]
+
     def calculate_phantom_payments(self) -> list:
-        phantom_payments = []
-        n_periods = int(self.maturity * self.payment_frequency)
-        
-        for t in range(1, n_periods+1):
-            cash_flow = self.ytm * self.price * (1 + self.ytm) ** (t - 1)
-            phantom_payments.append((t / self.payment_frequency, cash_flow))
+        """
+        Calculate the phantom (accreted) income the bondholder is taxed on each period.
 
-        return phantom_payments
-    
-    def calculate_pv_of_phantom_payments(self):
-        phantom_payments = self.calculate_phantom_payments()
-        times = [time for time, _ in phantom_payments]  # Extract times from cash flows
-        discount_rates = self.inflation_model.get_discount_rates(times)  # Get discount rates for all times
+        :return: A list of tuples (time, phantom_income).
+        """
+        result = self._phantom_income()
+        n_periods = result.n_periods[0]
 
-        # Compute the cumulative discount factor over time
-        cumulative_discount_factors = [1]  # Start with 1 for time = 0
-        for i in range(1, len(discount_rates)):
-            cumulative_discount_factors.append(cumulative_discount_factors[-1] * (1 + discount_rates[i]) ** -1)
+        return list(zip(result.times[0, 1:n_periods + 1].tolist(), result.phantom_income[0, 1:n_periods + 1].tolist()))
 
-        # Apply discounting correctly
-        present_values = [
-            (time, cash_flow * cumulative_discount_factor)
-            for (time, cash_flow), cumulative_discount_factor in zip(phantom_payments, cumulative_discount_factors)
-        ]
+    def calculate_pv_of_phantom_payments(self) -> list:
+        """
+        Calculate the present value of the phantom income each period.
+
+        :return: A list of tuples (time, present_value).
+        """
+        result = self._phantom_income()
+        n_periods = result.n_periods[0]
+        present_values = result.phantom_income[0] * result.discount_factors[0]
+
+        return list(zip(result.times[0, 1:n_periods + 1].tolist(), present_values[1:n_periods + 1].tolist()))
+
+    def calculate_tax_payments(self, present_value=False) -> list:
+        """
+        Calculate the tax owed on the phantom income each period at the bond's tax rate.
+
+        :param present_value: Whether to discount the tax payments.
+        :return: A list of tuples (time, tax_payment).
+        """
+        result = self._phantom_income()
+        n_periods = result.n_periods[0]
+        taxes = result.tax_payments(present_value)[0, 0]
 
-        return present_values
+        return list(zip(result.times[0, 1:n_periods + 1].tolist(), taxes[1:n_periods + 1].tolist()))
+
+    def after_tax_profit(self, present_value=False):
+        """
+        Returns the net profit of the bond investment after tax on phantom income as float
+        """
+        result = self._phantom_income()
+        if present_value:
+            return float(result.after_tax_pv[0, 0])
+        return float(result.after_tax_profit[0, 0])
 
     
-    def plot_cash_flows(bond, title="Cash Flows", filepath="_data/graphs/", inflation_adjusted=False):
+    def plot_cash_flows(bond, title="Cash Flows", filepath="_data/graphs/", inflation_adjusted=False, cash_flows=None,
+                        discount_rates=None):
         """
         Plot the cash flow diagram for a bond and save the plots to separate files.
 
         :param bond: The bond object.
         :param filepath: The directory where the plots will be saved (default: '_data/graphs/').
         :param inflation_adjusted: Whether to plot inflation-adjusted cash flows and discount rates.
+        :param cash_flows: The cash flows to plot if already computed, e.g. by a `ValuationPlan`.
+        :param discount_rates: The discount rates at the cash flow times if already computed.
         """
         if inflation_adjusted:
-            cash_flows = bond.calculate_pv_of_cash_flows()
+            if cash_flows is None:
+                cash_flows = bond.calculate_pv_of_cash_flows()
             phantom_flows = bond.calculate_pv_of_phantom_payments()
         else:
-            cash_flows = bond.calculate_cash_flows()
+            if cash_flows is None:
+                cash_flows = bond.calculate_cash_flows()
             phantom_flows = bond.calculate_phantom_payments()
 
         print(cash_flows)
@@ -100,7 +151,8 @@ class ZeroCouponBond(Bond):
             filename_base = f"{bond.__class__.__name__[:5]}-not_adjusted-{bond.face_value}"
 
         # Plot cash flows and cumulative sum
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
+        fig1 = Figure(figsize=(10, 6))
+        ax1 = fig1.subplots()
         bars = ax1.bar(times, amounts, width=0.4, color='blue', alpha=0.7, label="Cash Flows")
         red_bars = ax1.bar(phantom_times, phantom, width=0.4, color='red', alpha=0.7, label="Phantom Payments")
         for bar in bars:
@@ -122,12 +174,13 @@ class ZeroCouponBond(Bond):
         # Save the cash flow plot
         cash_flow_filename = os.path.join(filepath, f"{filename_base}-cash_flows.png")
         fig1.savefig(cash_flow_filename)
-        plt.close(fig1)
 
         # Plot discount rates if inflation_adjusted is True
         if inflation_adjusted:
-            discount_rates = bond.inflation_model.get_discount_rates(times)
-            fig2, ax2 = plt.subplots(figsize=(10, 6))
+            if discount_rates is None:
+                discount_rates = bond.inflation_model.get_discount_rates(times)
+            fig2 = Figure(figsize=(10, 6))
+            ax2 = fig2.subplots()
             ax2.plot(times, discount_rates, color='red', marker='o', label="Discount Rate")
             ax2.set_xlabel("Time (Years)", fontsize=10)
             ax2.set_ylabel("Discount Rate (%)", color='red', fontsize=10)
@@ -138,5 +191,17 @@ class ZeroCouponBond(Bond):
             # Save the discount rate plot
             discount_rate_filename = os.path.join(filepath, f"{filename_base}-discount_rates.png")
             fig2.savefig(discount_rate_filename)
-            plt.close(fig2)
 
+
+def zero_coupon_amounts(face_value: float, price: float, n_periods: int) -> np.ndarray:
+    """
+    The cash flows of a zero-coupon bond from its terms, shared by `ZeroCouponBond` and `ZeroCouponSpec`.
+
+    :param n_periods: The number of accrual periods of the bond's schedule.
+    :return: An array of n_periods + 1 cash flows: the price paid at time 0 and the face value at maturity.
+    """
+    cash_flows = np.zeros(n_periods + 1)
+    cash_flows[0] = -price
+    cash_flows[-1] = face_value
+
+    return cash_flows
@@ -1,5 +1,6 @@
 import csv
 
+from bonds.bond_spec import BondSpec
 from bonds.fixed_rate_bond import FixedRateBond
 from inflation_models.constant_inflation_model import ConstantDiscountRateModel
 from inflation_models.linear_inflation_model import LinearInflationModel
@@ -7,6 +8,8 @@ from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
 
 
 FILEPATH = '_data/csv/'
+FILENAME = 'fix-rate.csv'
+HEADERS = ['CouponRate', 'None', 'Constant', 'Linear']
 
 def get_inflation_models():
 
@@ -21,21 +24,17 @@ def get_profit_data(bond, inflation_models, step=0.005, steps=8):
     coupon_rates = [t * step for t in range(steps)]
     profit_data = [coupon_rates]
 
+    spec = BondSpec.from_bond(bond)
     for im in inflation_models:
-        bond.inflation_model = im
-        profits = []
-        for cr in coupon_rates:
-            bond.coupon_rate = cr
-            profits.append(bond.profit(present_value=True))
-        profit_data.append(profits)
+        profit_data.append([spec.replace(coupon_rate=cr).profit(im, present_value=True) for cr in coupon_rates])
 
     return profit_data
 
 
-def save_profit_data(profit_data, headers, filename):
+def save_profit_data(profit_data, headers, filename, filepath=FILEPATH):
 
     # Write to CSV file
-    with open(FILEPATH + filename, 'w', newline='') as csvfile:
+    with open(filepath + filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         
         writer.writerow(headers)
@@ -43,9 +42,9 @@ def save_profit_data(profit_data, headers, filename):
         # Write the data rows
         writer.writerows(zip(*profit_data))
 
-def main():
+def get_bond():
 
-    bond = FixedRateBond(
+    return FixedRateBond(
         face_value=1000,
         price=900,
         maturity=5,
@@ -54,12 +53,15 @@ def main():
         inflation_model=None
     )
 
+def main():
+
+    bond = get_bond()
     inflation_models = get_inflation_models()
     profit_data = get_profit_data(bond, inflation_models)
-    headers = ['CouponRate', 'None', 'Constant', 'Linear']
 
     print(profit_data)
 
-    save_profit_data(profit_data, headers, 'fix-rate.csv')
+    save_profit_data(profit_data, HEADERS, FILENAME)
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
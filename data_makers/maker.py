@@ -1,5 +1,6 @@
 import csv
 
+from bonds.bond_spec import BondSpec
 from bonds.fixed_rate_bond import FixedRateBond
 from bonds.floating_rate_note import FloatingRateNote
 from bonds.partially_amortizing_bond import PartiallyAmortizingBond
@@ -71,13 +72,9 @@ def get_profit_data(bond, inflation_models, step=0.005, steps=8):
     coupon_rates = [t * step for t in range(steps)]
     profit_data = [coupon_rates]
 
+    spec = BondSpec.from_bond(bond)
     for im in inflation_models:
-        bond.inflation_model = im
-        profits = []
-        for cr in coupon_rates:
-            bond.coupon_rate = cr
-            profits.append(bond.profit(present_value=True))
-        profit_data.append(profits)
+        profit_data.append([spec.replace(coupon_rate=cr).profit(im, present_value=True) for cr in coupon_rates])
 
     return profit_data
 
@@ -95,8 +92,7 @@ def save_profit_data(profit_data, headers, filename):
 
 def main():
 
-    
-
+    bond = get_bond_models()[0]
     inflation_models = get_inflation_models()
     profit_data = get_profit_data(bond, inflation_models)
     headers = ['CouponRate', 'None', 'Constant', 'Linear']
@@ -105,4 +101,5 @@ def main():
 
     save_profit_data(profit_data, headers, 'fix-rate.csv')
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
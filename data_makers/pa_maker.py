@@ -1,6 +1,9 @@
 import csv
 from itertools import product
 
+import numpy as np
+
+from bonds.amortization_engine import amortize_pool
 from bonds.fixed_rate_bond import FixedRateBond
 from bonds.floating_rate_note import FloatingRateNote
 from bonds.partially_amortizing_bond import PartiallyAmortizingBond
@@ -10,6 +13,8 @@ from inflation_models.linear_inflation_model import LinearInflationModel
 
 
 FILEPATH = '_data/csv/'
+FILENAME = 'part-amort.csv'
+HEADERS = ['Coupon rate', 'Balloon payment', 'No inflation', 'Constant', 'Linear']
 
 # Common bond parameters
 face_value = 1000
@@ -33,23 +38,21 @@ def get_profit_data(bond, inflation_models, step=0.005, steps=8):
     coupon_heading, balloon_headings = zip(*list(product(coupon_rates, balloon_payments)))
     profit_data = [coupon_heading, balloon_headings]
 
+    # Every (coupon, balloon) combination is amortized at once as one pool of loans
+    pool = amortize_pool(bond.face_value, coupon_heading, bond.maturity, bond.payment_frequency,
+                         np.array(balloon_headings) * bond.price)
+
     for im in inflation_models:
-        bond.inflation_model = im
-        profits = []
-        for cr in coupon_rates:
-            bond.coupon_rate = cr
-            for br in balloon_payments:
-                bond.baloon_payment = br * bond.price
-                profits.append(bond.profit(present_value=True))
-        profit_data.append(profits)
+        profits = pool.present_value(im, bond.payment_frequency)[0] - bond.price
+        profit_data.append(profits.tolist())
 
     return profit_data
 
 
-def save_profit_data(profit_data, headers, filename):
+def save_profit_data(profit_data, headers, filename, filepath=FILEPATH):
 
     # Write to CSV file
-    with open(FILEPATH + filename, 'w', newline='') as csvfile:
+    with open(filepath + filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         
         writer.writerow(headers)
@@ -57,9 +60,9 @@ def save_profit_data(profit_data, headers, filename):
         # Write the data rows
         writer.writerows(zip(*profit_data))
 
-def main():
+def get_bond():
 
-    bond = PartiallyAmortizingBond(
+    return PartiallyAmortizingBond(
         face_value=face_value,
         price=price,
         maturity=maturity,
@@ -69,13 +72,15 @@ def main():
         inflation_model=None
     )
 
+def main():
 
+    bond = get_bond()
     inflation_models = get_inflation_models()
     profit_data = get_profit_data(bond, inflation_models)
-    headers = ['Coupon rate', 'Balloon payment', 'No inflation', 'Constant', 'Linear']
 
     print(profit_data)
 
-    save_profit_data(profit_data, headers, 'part-amort.csv')
+    save_profit_data(profit_data, HEADERS, FILENAME)
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,15 @@ import csv
 from bonds.fixed_rate_bond import FixedRateBond
 from bonds.floating_rate_note import FloatingRateNote
 from bonds.partially_amortizing_bond import PartiallyAmortizingBond
+from bonds.phantom_income_engine import value_zero_coupon_batch
 from bonds.zero_coupon_bond import ZeroCouponBond
 from inflation_models.constant_inflation_model import ConstantDiscountRateModel
 from inflation_models.linear_inflation_model import LinearInflationModel
 
 
 FILEPATH = '_data/csv/'
+FILENAME = 'zero-coup.csv'
+HEADERS = ['Tax Rate', 'No Inflation', 'Constant', 'Linear']
 
 # Common bond parameters
 face_value = 1000
@@ -31,20 +34,16 @@ def get_profit_data(bond, inflation_models, step=0.005, steps=8):
     profit_data = [tax_rates]
 
     for im in inflation_models:
-        bond.inflation_model = im
-        profits = []
-        for tr in tax_rates:
-            bond.tax_rate = tr
-            profits.append(bond.profit(present_value=True))
-        profit_data.append(profits)
+        result = value_zero_coupon_batch(bond.face_value, bond.price, bond.maturity, bond.payment_frequency, tax_rates, im)
+        profit_data.append(result.after_tax_pv[0].tolist())
 
     return profit_data
 
 
-def save_profit_data(profit_data, headers, filename):
+def save_profit_data(profit_data, headers, filename, filepath=FILEPATH):
 
     # Write to CSV file
-    with open(FILEPATH + filename, 'w', newline='') as csvfile:
+    with open(filepath + filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         
         writer.writerow(headers)
@@ -52,9 +51,9 @@ def save_profit_data(profit_data, headers, filename):
         # Write the data rows
         writer.writerows(zip(*profit_data))
 
-def main():
+def get_bond():
 
-    bond = ZeroCouponBond(
+    return ZeroCouponBond(
         face_value=face_value,
         price=price,
         maturity=maturity,
@@ -63,12 +62,15 @@ def main():
         tax_rate=0.3,
     )
 
+def main():
+
+    bond = get_bond()
     inflation_models = get_inflation_models()
     profit_data = get_profit_data(bond, inflation_models)
-    headers = ['Tax Rate', 'No Inflation', 'Constant', 'Linear']
 
     print(profit_data)
 
-    save_profit_data(profit_data, headers, 'zero-coup.csv')
+    save_profit_data(profit_data, HEADERS, FILENAME)
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ from bonds.zero_coupon_bond import ZeroCouponBond
 from bonds.partially_amortizing_bond import PartiallyAmortizingBond
 from inflation_models.linear_inflation_model import LinearInflationModel
 
+from utils.background_writer import BackgroundWriter
+
 import os
 
 # Filepath settings
@@ -14,6 +16,9 @@ table_filepath = "_data/csv/"
 os.makedirs(graph_filepath, exist_ok=True)
 os.makedirs(table_filepath, exist_ok=True)
 
+# Charts and tables are saved by writer threads while the next bond is built
+writer = BackgroundWriter(workers=2)
+
 # Create a linear inflation model
 inflation = LinearInflationModel(initial_rate=0.02, rate_change_per_year=0.005)
 
@@ -33,9 +38,9 @@ fix_rate = FixedRateBond(
     coupon_rate=0.05
 )
 
-fix_rate.plot_cash_flows("Fixed-rate cash flows - nominal", filepath=graph_filepath + "fix_nominal")
-fix_rate.plot_cash_flows("Fixed-rate cash flows - adjusted for inflation", filepath=graph_filepath + "fix_inflation_adjusted", inflation_adjusted=True)
-fix_rate.table_cash_flows().to_csv(table_filepath + "fixbon_coninfl.csv", index=False)
+writer.submit(fix_rate.plot_cash_flows, "Fixed-rate cash flows - nominal", filepath=graph_filepath + "fix_nominal")
+writer.submit(fix_rate.plot_cash_flows, "Fixed-rate cash flows - adjusted for inflation", filepath=graph_filepath + "fix_inflation_adjusted", inflation_adjusted=True)
+writer.submit(fix_rate.table_cash_flows().to_csv, table_filepath + "fixbon_coninfl.csv", index=False)
 
 # Zero Coupon Bond
 zero_coupon = ZeroCouponBond(
@@ -47,9 +52,9 @@ zero_coupon = ZeroCouponBond(
     tax_rate=0.3,
 )
 
-zero_coupon.plot_cash_flows("Zero-coupon cash flows - nominal", filepath=graph_filepath + "zero_nominal")
-zero_coupon.plot_cash_flows("Zero-coupon cash flows - adjusted for inflation", filepath=graph_filepath + "zero_inflation_adjusted", inflation_adjusted=True)
-zero_coupon.table_cash_flows().to_csv(table_filepath + "zero_coninfl.csv", index=False)
+writer.submit(zero_coupon.plot_cash_flows, "Zero-coupon cash flows - nominal", filepath=graph_filepath + "zero_nominal")
+writer.submit(zero_coupon.plot_cash_flows, "Zero-coupon cash flows - adjusted for inflation", filepath=graph_filepath + "zero_inflation_adjusted", inflation_adjusted=True)
+writer.submit(zero_coupon.table_cash_flows().to_csv, table_filepath + "zero_coninfl.csv", index=False)
 
 # Floating Rate Note
 floating_rate = FloatingRateNote(
@@ -61,9 +66,9 @@ floating_rate = FloatingRateNote(
     inflation_model=inflation
 )
 
-floating_rate.plot_cash_flows("Floating-rate cash flows - nominal", filepath=graph_filepath + "float_nominal")
-floating_rate.plot_cash_flows("Floating-rate cash flows - adjusted for inflation", filepath=graph_filepath + "float_inflation_adjusted", inflation_adjusted=True)
-floating_rate.table_cash_flows().to_csv(table_filepath + "float_coninfl.csv", index=False)
+writer.submit(floating_rate.plot_cash_flows, "Floating-rate cash flows - nominal", filepath=graph_filepath + "float_nominal")
+writer.submit(floating_rate.plot_cash_flows, "Floating-rate cash flows - adjusted for inflation", filepath=graph_filepath + "float_inflation_adjusted", inflation_adjusted=True)
+writer.submit(floating_rate.table_cash_flows().to_csv, table_filepath + "float_coninfl.csv", index=False)
 
 # Partially Amortizing Bond
 partially_amortizing = PartiallyAmortizingBond(
@@ -76,9 +81,11 @@ partially_amortizing = PartiallyAmortizingBond(
     inflation_model=inflation
 )
 
-partially_amortizing.plot_cash_flows("Partially amortizing cash flows - nominal", filepath=graph_filepath + "part_nominal")
-partially_amortizing.plot_cash_flows("Partially amortizing cash flows - adjusted for inflation", filepath=graph_filepath + "part_inflation_adjusted", inflation_adjusted=True)
-partially_amortizing.table_cash_flows().to_csv(table_filepath + "part_coninfl.csv", index=False)
+writer.submit(partially_amortizing.plot_cash_flows, "Partially amortizing cash flows - nominal", filepath=graph_filepath + "part_nominal")
+writer.submit(partially_amortizing.plot_cash_flows, "Partially amortizing cash flows - adjusted for inflation", filepath=graph_filepath + "part_inflation_adjusted", inflation_adjusted=True)
+writer.submit(partially_amortizing.table_cash_flows().to_csv, table_filepath + "part_coninfl.csv", index=False)
+
+writer.close()
 
 for bond in [fix_rate, zero_coupon, floating_rate, partially_amortizing]:
     print(f'{bond.__class__.__name__} : profit {round(bond.profit(),2)}, interest adjusted {round(bond.profit(present_value=True),2)}')
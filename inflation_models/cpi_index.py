@@ -0,0 +1,106 @@
+"""
+A price index (CPI/RPI) history held in a memory-mapped binary file.
+
+The file is a NumPy `.npy` array of (year, value) records sorted by year, where `year` is the
+decimal year a fixing applies to (e.g. 2024 + 2/12 for the March fixing). Opening it maps the
+file instead of parsing it, so any number of bonds and processes share one copy of the history
+through the page cache. Index values at arbitrary times are found by vectorized binary search
+over the fixing years.
+"""
+import numpy as np
+
+
+CPI_DTYPE = np.dtype([('year', '<f8'), ('value', '<f8')])
+
+
+def write_cpi_file(path: str, years, values):
+    """
+    Write fixings to a file readable by `CPIIndex`.
+
+    :param path: The file to write, conventionally ending in `.npy`.
+    :param years: The decimal year of each fixing.
+    :param values: The index value of each fixing.
+    """
+    records = np.empty(len(years), dtype=CPI_DTYPE)
+    records['year'] = years
+    records['value'] = values
+    records.sort(order='year')
+    np.save(path, records)
+
+
+class CPIIndex:
+    """
+    Read-only access to memory-mapped index fixings, projected forward beyond the last fixing.
+    """
+
+    def __init__(self, path: str, valuation_year: float, projected_inflation: float = 0.02):
+        """
+        Map the fixing file.
+
+        :param path: A file written by `write_cpi_file`.
+        :param valuation_year: The decimal year of time 0, relating bond times to fixing years.
+        :param projected_inflation: The annual inflation rate assumed after the last fixing.
+        """
+        self.path = path
+        self.valuation_year = valuation_year
+        self.projected_inflation = projected_inflation
+        self._records = np.load(path, mmap_mode='r')
+        if self._records.dtype != CPI_DTYPE:
+            raise ValueError(f"{path} does not hold CPI fixings (dtype {self._records.dtype})")
+        if len(self._records) == 0:
+            raise ValueError(f"{path} holds no fixings")
+
+    @property
+    def years(self) -> np.ndarray:
+        return self._records['year']
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._records['value']
+
+    def __len__(self):
+        return len(self._records)
+
+    def reference_values(self, times, lag: float = 0.0, interpolate: bool = False) -> np.ndarray:
+        """
+        The index value that applies at each time, looked up `lag` years earlier.
+
+        :param times: Times in years from the valuation date, any shape.
+        :param lag: The indexation lag in years, e.g. 0.25 for a three month lag.
+        :param interpolate: Interpolate linearly between fixings instead of using the latest fixing
+                            on or before each reference date.
+        :return: An array with the shape of `times`.
+        :raises ValueError: If a reference date falls before the first fixing.
+        """
+        reference_years = self.valuation_year + np.asarray(times, dtype=float) - lag
+        years, values = self.years, self.values
+        last = len(years) - 1
+        if np.any(reference_years < years[0]):
+            raise ValueError(f"Reference year {float(np.min(reference_years)):.4f} is before the first fixing "
+                             f"({float(years[0]):.4f}) in {self.path}")
+
+        position = np.searchsorted(years, reference_years, side='right') - 1
+        before = np.clip(position, 0, last)
+        result = values[before]
+        if interpolate:
+            after = np.clip(position + 1, 0, last)
+            span = years[after] - years[before]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weight = np.where(span > 0, (reference_years - years[before]) / span, 0.0)
+            result = result + np.clip(weight, 0, 1) * (values[after] - result)
+
+        # Beyond the last fixing the index grows at the projected rate
+        beyond = reference_years > years[last]
+        growth = (1 + self.projected_inflation) ** np.maximum(reference_years - years[last], 0)
+
+        return np.where(beyond, values[last] * growth, result)
+
+    def index_ratios(self, times, base_times, lag: float = 0.0, interpolate: bool = False) -> np.ndarray:
+        """
+        The ratio of the reference index at each time to the reference index at its base time.
+
+        :param times: Times in years from the valuation date.
+        :param base_times: The base (issue) time of each ratio, broadcastable against `times`.
+        :return: An array with the broadcast shape.
+        """
+        return self.reference_values(times, lag, interpolate) / self.reference_values(base_times, lag, interpolate)
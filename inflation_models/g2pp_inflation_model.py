@@ -0,0 +1,166 @@
+import numpy as np
+from inflation_models.discount_rate_model import DiscountRateModel
+from utils.interpolation import get_operator
+from utils.kernels import vasicek_euler
+from utils.precision import get_dtype
+
+class G2PPDiscountRateModel(DiscountRateModel):
+    """
+    A discount rate model based on the two-factor Gaussian (G2++) short rate model,
+    r(t) = phi + x(t) + y(t) with dx = -a x dt + sigma dW1, dy = -b y dt + eta dW2 and
+    dW1 dW2 = rho dt. Two factors with different mean reversion move the short and long ends of
+    the curve independently, so the model produces twists as well as parallel shifts.
+
+    Paths are simulated with the exact Gaussian transition of each step, so there is no
+    discretisation error at the grid times. The shocks of every path, step and factor come from
+    one standard normal draw multiplied by the Cholesky factor of the step covariance.
+    """
+
+    def __init__(self, a: float, b: float, sigma: float, eta: float, rho: float, phi: float, max_time: float,
+                 dt: float = 0.25, x0: float = 0.0, y0: float = 0.0):
+        """
+        Initialize the G2++ model.
+
+        :param a: Speed of mean reversion of the first factor.
+        :param b: Speed of mean reversion of the second factor.
+        :param sigma: Volatility of the first factor.
+        :param eta: Volatility of the second factor.
+        :param rho: Correlation between the factors' Brownian motions, in [-1, 1].
+        :param phi: The constant level of the short rate, to which it reverts.
+        :param max_time: The maximum time for which to simulate the discount rate path.
+        :param dt: Time step for the simulation.
+        :param x0: Initial value of the first factor.
+        :param y0: Initial value of the second factor.
+        """
+        if a <= 0 or b <= 0:
+            raise ValueError("The mean reversion speeds a and b must be positive")
+        if not -1 <= rho <= 1:
+            raise ValueError("The correlation rho must be within [-1, 1]")
+        self.a = a
+        self.b = b
+        self.sigma = sigma
+        self.eta = eta
+        self.rho = rho
+        self.phi = phi
+        self.max_time = max_time
+        self.dt = dt
+        self.x0 = x0
+        self.y0 = y0
+        self.times, self.discount_rates = self._simulate_g2pp_path()
+
+    @property
+    def r0(self) -> float:
+        return self.phi + self.x0 + self.y0
+
+    def _transition(self):
+        """
+        The exact one-step transition of the factors: each decays by exp(-k dt) and receives a
+        Gaussian increment, correlated with the other's.
+
+        :return: A tuple (decays, stds, cholesky) of the per-factor decay and increment standard
+                 deviation, and the Cholesky factor of the increments' correlation matrix.
+        """
+        speeds = np.array([self.a, self.b])
+        vols = np.array([self.sigma, self.eta])
+        decays = np.exp(-speeds * self.dt)
+        stds = vols * np.sqrt(-np.expm1(-2 * speeds * self.dt) / (2 * speeds))
+        covariance = self.rho * self.sigma * self.eta * -np.expm1(-(self.a + self.b) * self.dt) / (self.a + self.b)
+        correlation = covariance / (stds[0] * stds[1]) if stds[0] * stds[1] > 0 else 0.0
+        # Written out rather than from np.linalg.cholesky, which rejects perfectly correlated factors
+        cholesky = np.array([[1.0, 0.0], [correlation, np.sqrt(max(1 - correlation ** 2, 0.0))]])
+
+        return decays, stds, cholesky
+
+    def _factor_paths(self, shocks: np.ndarray, dtype=None):
+        """
+        Run the exact recursion of each factor over correlated unit shocks.
+
+        The recursion x_k = exp(-a dt) x_(k-1) + std z_k is the Euler step of the Vasicek kernel
+        with reversion speed (1 - exp(-a dt)) / dt and long-term mean zero, so it runs on the
+        same compiled kernels.
+
+        :param shocks: Independent standard normals, shape (2, n_paths, n_steps).
+        :return: A tuple (x, y) of factor paths, each of shape (n_paths, n_steps + 1).
+        """
+        decays, stds, cholesky = self._transition()
+        correlated = (cholesky.astype(shocks.dtype) @ shocks.reshape(2, -1)).reshape(shocks.shape)
+        return tuple(vasicek_euler(start, (1 - decay) / self.dt, 0.0, std / np.sqrt(self.dt), self.dt, factor_shocks, dtype=dtype)
+                     for start, decay, std, factor_shocks in zip((self.x0, self.y0), decays, stds, correlated))
+
+    def _simulate_g2pp_path(self):
+        """
+        Simulate a single path of discount rates using the G2++ model.
+
+        :return: A tuple (times, discount_rates), where `times` is a list of time steps and
+                 `discount_rates` is a list of corresponding discount rates.
+        """
+        n_steps = int(round(self.max_time / self.dt))
+        times = np.arange(n_steps + 1) * self.dt
+        shocks = np.random.normal(size=(2, 1, n_steps))
+        x, y = self._factor_paths(shocks)
+
+        return times, self.phi + x[0] + y[0]
+
+    def simulate_factors(self, n_paths: int, seed=None, dtype=None):
+        """
+        Simulate many independent paths of both factors on the model's time grid.
+
+        :param n_paths: The number of paths.
+        :param seed: Seed for the random number generator, for reproducible paths.
+        :param dtype: 'float32' or 'float64', overriding the precision policy.
+        :return: A tuple (x, y) of arrays of shape (n_paths, len(self.times)), starting at x0 and y0.
+        """
+        shocks = np.random.default_rng(seed).standard_normal((2, n_paths, len(self.times) - 1), dtype=get_dtype(dtype))
+        return self._factor_paths(shocks, dtype=dtype)
+
+    def simulate_paths(self, n_paths: int, seed=None, dtype=None) -> np.ndarray:
+        """
+        Simulate many independent paths of discount rates on the model's time grid.
+
+        :param n_paths: The number of paths.
+        :param seed: Seed for the random number generator, for reproducible paths.
+        :param dtype: 'float32' or 'float64', overriding the precision policy.
+        :return: An array of shape (n_paths, len(self.times)) of discount rates, starting at r0.
+        """
+        x, y = self.simulate_factors(n_paths, seed, dtype)
+        x += y
+        x += x.dtype.type(self.phi)
+        return x
+
+    def _variance(self, tau: np.ndarray) -> np.ndarray:
+        """
+        The variance of the integral of x + y over a period of length tau.
+        """
+        a, b, sigma, eta = self.a, self.b, self.sigma, self.eta
+
+        def single(k, vol):
+            return vol ** 2 / k ** 2 * (tau + 2 / k * np.exp(-k * tau) - 1 / (2 * k) * np.exp(-2 * k * tau) - 3 / (2 * k))
+
+        cross = (tau + np.expm1(-a * tau) / a + np.expm1(-b * tau) / b - np.expm1(-(a + b) * tau) / (a + b))
+        return single(a, sigma) + single(b, eta) + 2 * self.rho * sigma * eta / (a * b) * cross
+
+    def zero_coupon_prices(self, maturities, x=None, y=None) -> np.ndarray:
+        """
+        Closed-form zero coupon bond prices, P(tau) = exp(-phi tau - B_a(tau) x - B_b(tau) y + V(tau) / 2)
+        with B_k(tau) = (1 - exp(-k tau)) / k, for validating simulations and building curve scenarios.
+
+        :param maturities: The times to maturity tau.
+        :param x: Values of the first factor to price from (default: x0); one curve per value.
+        :param y: Values of the second factor, aligned with `x` (default: y0).
+        :return: An array of shape (len(maturities),), or (n_states, len(maturities)) for arrays of states.
+        """
+        tau = np.asarray(maturities, dtype=float)
+        x = np.asarray(self.x0 if x is None else x, dtype=float)[..., None]
+        y = np.asarray(self.y0 if y is None else y, dtype=float)[..., None]
+        log_prices = -self.phi * tau + np.expm1(-self.a * tau) / self.a * x + np.expm1(-self.b * tau) / self.b * y
+
+        return np.exp(log_prices + self._variance(tau) / 2)
+
+    def get_discount_rates(self, times: list) -> list:
+        """
+        Return the discount rates at the specified times by interpolating the simulated path.
+
+        :param times: A list of times at which the discount rates are requested.
+        :return: A list of discount rates corresponding to the requested times.
+        """
+        return get_operator(self.times, times).apply(self.discount_rates).tolist()
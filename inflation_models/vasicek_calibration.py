@@ -0,0 +1,222 @@
+"""
+Calibration of the Vasicek parameters to observed bond prices with the affine closed-form
+zero coupon bond price, with no simulation.
+
+Under Vasicek the price at time 0 of one unit paid at time t is
+
+    P(t) = exp(ln A(t) - B(t) r0),
+    B(t) = (1 - exp(-a t)) / a,
+    ln A(t) = (B(t) - t) (b - sigma^2 / (2 a^2)) - sigma^2 B(t)^2 / (4 a),
+
+so the model price of every instrument is a matrix product of its cash flows with P on the union
+of their payment times, and the derivatives of P with respect to each parameter are closed form
+too. The fit is a Levenberg-Marquardt least squares on those analytic Jacobians. It runs over
+log(a) and log(sigma), so both stay positive, and over the long-run level b - sigma^2 / (2 a^2)
+rather than b, which the prices pin down far better than b and sigma separately.
+"""
+import numpy as np
+
+from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+
+PARAMETERS = ('a', 'b', 'sigma', 'r0')
+
+
+def zero_coupon_prices(times, a: float, b: float, sigma: float, r0: float) -> np.ndarray:
+    """
+    The Vasicek price at time 0 of one unit paid at each time.
+    """
+    return np.exp(_log_prices(np.asarray(times, dtype=float), a, b, sigma, r0)[0])
+
+
+def _log_prices(t: np.ndarray, a: float, b: float, sigma: float, r0: float):
+    """
+    ln P(t) and its derivatives with respect to (a, b, sigma, r0), each with the shape of `t`.
+    """
+    decay = np.exp(-a * t)
+    B = -np.expm1(-a * t) / a
+    dB_da = t * decay / a - B / a
+    level = b - sigma ** 2 / (2 * a ** 2)
+
+    log_A = (B - t) * level - sigma ** 2 * B ** 2 / (4 * a)
+    dlogA_da = dB_da * level + (B - t) * sigma ** 2 / a ** 3 - sigma ** 2 * (2 * B * dB_da / a - B ** 2 / a ** 2) / 4
+    dlogA_db = B - t
+    dlogA_dsigma = -(B - t) * sigma / a ** 2 - sigma * B ** 2 / (2 * a)
+
+    log_prices = log_A - B * r0
+    gradient = np.stack([dlogA_da - dB_da * r0, dlogA_db, dlogA_dsigma, -B])
+
+    return log_prices, gradient
+
+
+class VasicekCalibration:
+    """
+    The result of `calibrate_vasicek`.
+    """
+
+    def __init__(self, params: dict, residuals: np.ndarray, iterations: int, converged: bool):
+        self.a = params['a']
+        self.b = params['b']
+        self.sigma = params['sigma']
+        self.r0 = params['r0']
+        self.residuals = residuals
+        self.rmse = float(np.sqrt(np.mean(residuals ** 2))) if len(residuals) else 0.0
+        self.iterations = iterations
+        self.converged = converged
+
+    @property
+    def params(self) -> dict:
+        return {name: getattr(self, name) for name in PARAMETERS}
+
+    def model(self, max_time: float, dt: float = 0.25) -> VasicekDiscountRateModel:
+        """
+        A `VasicekDiscountRateModel` with the calibrated parameters.
+        """
+        return VasicekDiscountRateModel(max_time=max_time, dt=dt, **self.params)
+
+    def __str__(self):
+        return (f"VasicekCalibration(a={self.a:.6f}, b={self.b:.6f}, sigma={self.sigma:.6f}, r0={self.r0:.6f}, "
+                f"rmse={self.rmse:.6f}, iterations={self.iterations})")
+
+
+def instrument_cash_flows(bonds: list):
+    """
+    The cash flows after time 0 of every bond on the union of their payment times.
+
+    :param bonds: Bonds with a `schedule` and `cash_flow_amounts()`, e.g. `ZeroCouponBond` and `FixedRateBond`.
+    :return: A tuple (times, amounts) with amounts of shape (n_bonds, len(times)).
+    """
+    schedules = {id(bond.schedule): bond.schedule for bond in bonds}
+    times = np.unique(np.concatenate([schedule.times[1:] for schedule in schedules.values()]))
+    amounts = np.zeros((len(bonds), len(times)))
+    for row, bond in enumerate(bonds):
+        amounts[row, np.searchsorted(times, bond.schedule.times[1:])] += bond.cash_flow_amounts()[1:]
+
+    return times, amounts
+
+
+# Starting values of (a, sigma) tried by default; the least squares surface has separate valleys
+# along the a-sigma trade-off, so a single start can settle in the wrong one
+DEFAULT_STARTS = [{'a': a, 'sigma': sigma} for a in (0.05, 0.2, 0.8) for sigma in (0.005, 0.02)]
+
+# Box for log(a) and log(sigma), keeping the affine formulas finite
+_LOG_BOUNDS = {0: (np.log(1e-4), np.log(20.0)), 2: (np.log(1e-6), np.log(1.0))}
+
+
+def _levenberg_marquardt(evaluate, vector: np.ndarray, free: list, max_iterations: int, tolerance: float,
+                         step_tolerance: float):
+    """
+    Levenberg-Marquardt with Marquardt scaling and Nielsen's damping update: after an accepted step
+    the damping shrinks by up to a factor of 3 according to how well the linear model predicted the
+    decrease, and after each rejected step in a row it grows by a doubling factor (2, 4, 8, ...).
+    """
+    residuals, jacobian = evaluate(vector)
+    cost = residuals @ residuals
+    damping = 1e-3
+    growth = 2.0
+    for iteration in range(1, max_iterations + 1):
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ residuals
+        scale = np.diag(normal) + 1e-12
+        step = np.linalg.solve(normal + damping * np.diag(scale), -gradient)
+        trial = vector.copy()
+        trial[free] += step
+        for index, (low, high) in _LOG_BOUNDS.items():
+            trial[index] = min(max(trial[index], low), high)
+        trial_residuals, trial_jacobian = evaluate(trial)
+        with np.errstate(over='ignore', invalid='ignore'):
+            trial_cost = trial_residuals @ trial_residuals
+
+        if np.isfinite(trial_cost) and trial_cost < cost:
+            # The decrease predicted by the damped linear model, to rate the step
+            predicted = step @ (damping * scale * step - gradient)
+            gain = (cost - trial_cost) / predicted if predicted > 0 else 1.0
+            decrease = (cost - trial_cost) / cost
+            vector, residuals, jacobian, cost = trial, trial_residuals, trial_jacobian, trial_cost
+            damping = max(damping * max(1 / 3, 1 - (2 * gain - 1) ** 3), 1e-12)
+            growth = 2.0
+            if decrease < tolerance or np.max(np.abs(step)) < step_tolerance:
+                return vector, residuals, iteration, True
+        else:
+            damping *= growth
+            growth *= 2
+            if damping > 1e12:
+                # No step reduces the error any more: a minimum at the limit of the arithmetic
+                return vector, residuals, iteration, True
+
+    return vector, residuals, max_iterations, False
+
+
+def calibrate_vasicek(bonds: list, prices=None, weights=None, initial: dict = None, fixed: dict = None,
+                      starts: list = None, max_iterations: int = 500, tolerance: float = 1e-12,
+                      step_tolerance: float = 1e-10) -> VasicekCalibration:
+    """
+    Fit a, b, sigma and r0 so the Vasicek prices of the bonds match their observed prices.
+
+    The fit is run from each of `starts` and the best result is kept.
+
+    :param bonds: The calibration instruments, e.g. `ZeroCouponBond` and `FixedRateBond`.
+    :param prices: The observed prices (default: each bond's `price`).
+    :param weights: Weights of the squared price errors (default: all one).
+    :param initial: Starting values of any of the parameters, shared by every start.
+    :param fixed: Parameters held at the given values, e.g. {'r0': 0.02} for an observed short rate.
+    :param starts: Starting values tried in turn (default: `DEFAULT_STARTS`, or only `initial` if it sets a and sigma).
+    :param max_iterations: The maximum number of Levenberg-Marquardt iterations per start.
+    :param tolerance: Stop once the relative decrease of the weighted squared error is below this.
+    :param step_tolerance: Stop once no parameter (a and sigma in log terms) moves by more than this.
+    :return: A `VasicekCalibration`.
+    :raises ValueError: If the fit fails with a non-finite error from every start.
+    """
+    times, amounts = instrument_cash_flows(bonds)
+    prices = np.array([bond.price for bond in bonds] if prices is None else prices, dtype=float)
+    sqrt_weights = np.sqrt(np.ones(len(bonds)) if weights is None else np.asarray(weights, dtype=float))
+    initial = dict(initial or {})
+    fixed = dict(fixed or {})
+    free = [index for index, name in enumerate(PARAMETERS) if name not in fixed]
+    if starts is None:
+        starts = [{}] if {'a', 'sigma'} <= set(initial) | set(fixed) else DEFAULT_STARTS
+
+    # Unless b is fixed, the fit runs over the long-run level b - sigma^2 / (2 a^2) instead of b,
+    # which removes most of the correlation between b and sigma
+    shift = 0.0 if 'b' in fixed else 1.0
+
+    def from_vector(vector):
+        a, sigma = np.exp(vector[0]), np.exp(vector[2])
+        return {'a': a, 'b': vector[1] + shift * sigma ** 2 / (2 * a ** 2), 'sigma': sigma, 'r0': vector[3]}
+
+    def to_vector(values):
+        level = values['b'] - shift * values['sigma'] ** 2 / (2 * values['a'] ** 2)
+        return np.array([np.log(values['a']), level, np.log(values['sigma']), values['r0']])
+
+    def evaluate(vector):
+        values = from_vector(vector)
+        a, sigma = values['a'], values['sigma']
+        with np.errstate(over='ignore', invalid='ignore'):
+            log_prices, gradient = _log_prices(times, **values)
+            discount = np.exp(log_prices)
+            residuals = (amounts @ discount - prices) * sqrt_weights
+            # Chain rule from (a, b, sigma, r0) to the fitted vector
+            transformed = gradient.copy()
+            transformed[0] = a * (gradient[0] - shift * sigma ** 2 / a ** 3 * gradient[1])
+            transformed[2] = sigma * (gradient[2] + shift * sigma / a ** 2 * gradient[1])
+            jacobian = (amounts @ (discount * transformed).T)[:, free] * sqrt_weights[:, None]
+        return residuals, jacobian
+
+    best = None
+    total_iterations = 0
+    for start in starts:
+        params = {'a': 0.1, 'b': 0.03, 'sigma': 0.01, 'r0': 0.03, **start, **initial, **fixed}
+        vector = to_vector(params)
+        vector, residuals, iterations, converged = _levenberg_marquardt(
+            evaluate, vector, free, max_iterations, tolerance, step_tolerance)
+        total_iterations += iterations
+        with np.errstate(over='ignore', invalid='ignore'):
+            cost = residuals @ residuals
+        if np.isfinite(cost) and (best is None or cost < best[0]):
+            best = (cost, vector, residuals, converged)
+
+    if best is None:
+        raise ValueError(f"Every one of the {len(starts)} starting points gave a non-finite pricing error; "
+                         "check the prices, weights and cash flows or pass `starts`")
+    _, vector, residuals, converged = best
+    return VasicekCalibration(from_vector(vector), residuals / sqrt_weights, total_iterations, converged)
@@ -1,5 +1,8 @@
 import numpy as np
 from inflation_models.discount_rate_model import DiscountRateModel
+from utils.interpolation import get_operator
+from utils.kernels import vasicek_euler
+from utils.precision import get_dtype
 
 class VasicekDiscountRateModel(DiscountRateModel):
     """
@@ -32,17 +35,58 @@ class VasicekDiscountRateModel(DiscountRateModel):
         :return: A tuple (times, discount_rates), where `times` is a list of time steps and
                  `discount_rates` is a list of corresponding discount rates.
         """
-        n_steps = int(self.max_time / self.dt)
-        times = np.arange(0, self.max_time + self.dt, self.dt)
-        discount_rates = np.zeros(n_steps + 1)
-        discount_rates[0] = self.r0
-
-        for t in range(1, n_steps + 1):
-            dr = self.a * (self.b - discount_rates[t - 1]) * self.dt + self.sigma * np.sqrt(self.dt) * np.random.normal()
-            discount_rates[t] = discount_rates[t - 1] + dr
+        n_steps = int(round(self.max_time / self.dt))
+        times = np.arange(n_steps + 1) * self.dt
+        shocks = np.random.normal(size=n_steps)
+        discount_rates = vasicek_euler(self.r0, self.a, self.b, self.sigma, self.dt, shocks)
 
         return times, discount_rates
 
+    def simulate_paths(self, n_paths: int, seed=None, dtype=None) -> np.ndarray:
+        """
+        Simulate many independent paths of discount rates on the model's time grid.
+        In float32 the shocks are drawn natively in float32, so a seed gives different paths in each precision.
+
+        :param n_paths: The number of paths.
+        :param seed: Seed for the random number generator, for reproducible paths.
+        :param dtype: 'float32' or 'float64', overriding the precision policy.
+        :return: An array of shape (n_paths, len(self.times)) of discount rates, starting at r0.
+        """
+        return vasicek_euler(self.r0, self.a, self.b, self.sigma, self.dt, self._draw_shocks(n_paths, seed, dtype), dtype=dtype)
+
+    def simulate_paths_with_tangents(self, n_paths: int, seed=None, dtype=None):
+        """
+        Simulate paths as `simulate_paths` does, together with the derivative of every rate on
+        every path with respect to each model parameter.
+
+        The Euler scheme is linear in the rates, so each derivative follows the same recursion
+        with decay (1 - a dt): by r0 it is (1 - a dt)^k, by b it is 1 - (1 - a dt)^k, by sigma it
+        is driven by the shocks and by a it is driven by (b - r) dt along the path.
+
+        :param n_paths: The number of paths.
+        :param seed: Seed for the random number generator; the paths equal those of `simulate_paths`.
+        :param dtype: 'float32' or 'float64', overriding the precision policy.
+        :return: A tuple (paths, tangents), where `tangents` maps each of 'r0', 'a', 'b' and 'sigma'
+                 to an array broadcastable to the shape of `paths`.
+        """
+        dtype = get_dtype(dtype)
+        shocks = self._draw_shocks(n_paths, seed, dtype)
+        paths = vasicek_euler(self.r0, self.a, self.b, self.sigma, self.dt, shocks, dtype=dtype)
+
+        decay = (1 - self.a * self.dt) ** np.arange(len(self.times), dtype=dtype)
+        drift = (self.b - paths[:, :-1]) * np.sqrt(self.dt)
+        tangents = {
+            'r0': decay,
+            'a': vasicek_euler(0.0, self.a, 0.0, 1.0, self.dt, drift, dtype=dtype),
+            'b': 1 - decay,
+            'sigma': vasicek_euler(0.0, self.a, 0.0, 1.0, self.dt, shocks, dtype=dtype),
+        }
+
+        return paths, tangents
+
+    def _draw_shocks(self, n_paths: int, seed, dtype) -> np.ndarray:
+        return np.random.default_rng(seed).standard_normal((n_paths, len(self.times) - 1), dtype=get_dtype(dtype))
+
     def get_discount_rates(self, times: list) -> list:
         """
         Return the discount rates at the specified times by interpolating the simulated path.
@@ -50,4 +94,4 @@ class VasicekDiscountRateModel(DiscountRateModel):
         :param times: A list of times at which the discount rates are requested.
         :return: A list of discount rates corresponding to the requested times.
         """
-        return [np.interp(time, self.times, self.discount_rates) for time in times]
\ No newline at end of file
+        return get_operator(self.times, times).apply(self.discount_rates).tolist()
\ No newline at end of file
@@ -1,62 +1,609 @@
-# Floating Rate Note
-import csv
-from bonds.fixed_rate_bond import FixedRateBond
-from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+"""
+Command line entry point for batch valuation, parameter sweeps and chart generation.
+
+Every job is driven entirely by its arguments, so it can be scheduled from cron:
 
+    python main.py value --input bonds.csv --output values.csv --model constant --model-param rate=0.03
+    python main.py sweep all --output _data/csv/ --workers 3
+    python main.py chart --model vasicek --model-param max_time=10 --seed 7 --output _data/graph/
+    python main.py ladder --input bonds.csv --output ladder.csv --bucket-width 1 --by bond_type
+    python main.py queue publish /shared/pa --sweep amortizing --axis coupon_rate=0.005:0.035:0.005 --axis baloon_payment=0:900:90
+    python main.py queue work /shared/pa --workers 8
+    python main.py queue merge /shared/pa --output _data/csv/pa-grid.csv
 
+The `--input` file of the `value`, `ladder` and `chart` subcommands is a CSV with a `type` column
+(fixed, zero, floating or amortizing) and one column per constructor argument of that bond
+type (face_value, price, maturity, payment_frequency, coupon_rate, tax_rate, spread_bps,
+baloon_payment). Columns a bond type does not use are ignored.
+"""
+import argparse
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from bonds.bond_spec import BondSpec, spec_from_row
+from bonds.cash_flow_ladder import LADDER_GROUPS, bucket_edges, build_ladder
+from bonds.valuation_plan import ValuationPlan
+from data_makers import fixed_rate_maker, pa_maker, zc_maker
+from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+from inflation_models.g2pp_inflation_model import G2PPDiscountRateModel
+from inflation_models.linear_inflation_model import LinearInflationModel
+from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+from utils import kernels, precision
+from utils.background_writer import BackgroundWriter, append_table
+from utils.benchmarks import BENCHMARKS
+from utils.result_cache import ResultCache, fingerprint
+from utils.run_summary import RunSummary
+from utils.work_queue import WorkQueue, run_worker
+
+
+INFLATION_MODELS = {
+    'none': None,
+    'constant': ConstantDiscountRateModel,
+    'linear': LinearInflationModel,
+    'vasicek': VasicekDiscountRateModel,
+    'g2pp': G2PPDiscountRateModel,
+}
+
+SWEEPS = {
+    'fixed': fixed_rate_maker,
+    'zero': zc_maker,
+    'amortizing': pa_maker,
+}
+
+# Bonds charted when `chart` is run without an input file, as in the examples
+EXAMPLE_BONDS = [
+    {'type': 'fixed', 'face_value': 1000, 'price': 900, 'maturity': 5, 'payment_frequency': 2, 'coupon_rate': 0.05},
+    {'type': 'zero', 'face_value': 1000, 'price': 900, 'maturity': 5, 'payment_frequency': 2, 'tax_rate': 0.3},
+    {'type': 'floating', 'face_value': 1000, 'price': 900, 'maturity': 5, 'payment_frequency': 2, 'spread_bps': 2},
+    {'type': 'amortizing', 'face_value': 1000, 'price': 900, 'maturity': 5, 'payment_frequency': 2, 'coupon_rate': 0.05, 'baloon_payment': 500},
+]
+
+CHART_PREFIXES = {'fixed': 'fix', 'zero': 'zero', 'floating': 'float', 'amortizing': 'part'}
+
+# Part of every result cache key; bump it when a change to the valuation code changes cached numbers
+CACHE_VERSION = 1
+
+
+def make_inflation_model(name: str, params: dict, seed=None):
+    """
+    Build a discount rate model from its CLI name and parameters.
+
+    :param name: One of the keys of `INFLATION_MODELS`.
+    :param params: Keyword arguments for the model constructor.
+    :param seed: Seed for stochastic models, so every process simulates the same path.
+    :return: A `DiscountRateModel`, or None for nominal valuation.
+    """
+    model_class = INFLATION_MODELS[name]
+    if model_class is None:
+        return None
+    if seed is not None:
+        np.random.seed(seed)
+
+    return model_class(**params)
+
+
+def bond_spec(row: dict) -> dict:
+    """
+    The constructor arguments of the bond described by a row of the input table.
+
+    :param row: A mapping with a `type` key and the constructor arguments of that bond type.
+    :return: A dict of keyword arguments, without the inflation model.
+    """
+    return spec_from_row(row).asdict()
+
+
+def make_bond(row: dict, inflation_model):
+    """
+    Build a bond from a row of the input table.
+
+    :param row: A mapping with a `type` key and the constructor arguments of that bond type.
+    :param inflation_model: The discount rate model to attach to the bond.
+    :return: A `Bond` instance.
+    """
+    return spec_from_row(row).to_bond(inflation_model)
+
+
+def open_cache(cache):
+    """
+    Open the result cache given as a (path, max_bytes) tuple, or return None when caching is off.
+    """
+    return ResultCache(*cache) if cache else None
+
+
+def valuation_settings() -> tuple:
+    """
+    The settings besides a job's inputs that change its results: the cache version, the precision
+    policy and the kernel backend. Every cache key includes them, so results computed under one
+    setting are never reused under another.
+    """
+    return CACHE_VERSION, precision.get_dtype().__name__, kernels.get_backend()
+
+
+def cache_stats(result_cache) -> dict:
+    if result_cache is None:
+        return {'hits': 0, 'misses': 0, 'evictions': 0}
+    return {'hits': result_cache.hits, 'misses': result_cache.misses, 'evictions': result_cache.evictions}
+
+
+def value_chunk(job):
+    """
+    Value one chunk of bonds. Runs inside a worker process.
+    Results already in the cache are reused; only new or changed bonds are valued.
+
+    :param job: A tuple (start, rows, model_name, model_params, seed, cache).
+    :return: A tuple (list of result rows, cache statistics).
+    """
+    start, rows, model_name, model_params, seed, cache = job
+    inflation_model = make_inflation_model(model_name, model_params, seed)
+    result_cache = open_cache(cache)
+
+    model_fingerprint = fingerprint(model_name, inflation_model, seed, valuation_settings())
+    keys = [fingerprint(row['type'], bond_spec(row), model_fingerprint) for row in rows]
+    cached = result_cache.get_many(keys) if result_cache else {}
+
+    results = []
+    computed = {}
+    for i, (key, row) in enumerate(zip(keys, rows), start=start):
+        if key not in cached:
+            bond = make_bond(row, inflation_model)
+            computed[key] = cached[key] = (bond.profit(), bond.profit(present_value=True))
+        profit, profit_pv = cached[key]
+        results.append({'index': i, 'type': row['type'], 'profit': profit, 'profit_pv': profit_pv})
+
+    if result_cache:
+        result_cache.put_many(computed)
+        result_cache.close()
+
+    return results, cache_stats(result_cache)
+
+
+def sweep_job(job):
+    """
+    Run one of the data_makers sweeps. Runs inside a worker process.
+
+    :param job: A tuple (sweep_name, seed, cache).
+    :return: A tuple (sweep_name, DataFrame of the sweep results, cache statistics).
+    """
+    name, seed, cache = job
+    maker = SWEEPS[name]
+    if seed is not None:
+        np.random.seed(seed)
+    bond = maker.get_bond()
+    inflation_models = maker.get_inflation_models()
+    result_cache = open_cache(cache)
+
+    key = fingerprint(name, bond, inflation_models, maker.HEADERS, valuation_settings())
+    profit_data = result_cache.get(key) if result_cache else None
+    if profit_data is None:
+        profit_data = maker.get_profit_data(bond, inflation_models)
+        if result_cache:
+            result_cache.put(key, profit_data)
+    if result_cache:
+        result_cache.close()
+
+    return name, pd.DataFrame(dict(zip(maker.HEADERS, profit_data))), cache_stats(result_cache)
+
+
+def chart_job(job):
+    """
+    Plot the nominal and inflation adjusted cash flows of one bond. Runs inside a worker process.
+
+    :param job: A tuple (row, directory, model_name, model_params, seed).
+    :return: The directory the charts were written to.
+    """
+    row, directory, model_name, model_params, seed = job
+    bond = make_bond(row, make_inflation_model(model_name, model_params, seed))
+    prefix = CHART_PREFIXES[row['type']]
+    name = bond.__class__.__name__
+
+    # Both charts read the bond's cash flow amounts from one plan, so they are computed once
+    plan = ValuationPlan()
+    plan.request(bond, 'chart', title=f"{name} cash flows - nominal", filepath=os.path.join(directory, f"{prefix}_nominal"))
+    if bond.inflation_model is not None:
+        plan.request(bond, 'chart', title=f"{name} cash flows - adjusted for inflation",
+                     filepath=os.path.join(directory, f"{prefix}_inflation_adjusted"), inflation_adjusted=True)
+    plan.run()
+
+    return directory
+
+
+def parse_axis(text: str) -> tuple:
+    """
+    Parse a `--axis name=values` option, where values are comma separated or a
+    `start:stop:step` range that includes `stop`.
+
+    :return: A tuple (name, list of values).
+    """
+    name, sep, values = text.partition('=')
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"Axis '{text}' is not of the form name=values")
+    if ':' in values:
+        start, stop, step = (float(v) for v in values.split(':'))
+        return name, np.arange(start, stop + step / 2, step).tolist()
+
+    return name, [float(v) for v in values.split(',')]
+
+
+def positive_float(text: str) -> float:
+    """
+    Parse an option that must be a positive number, such as `--bucket-width`.
+    """
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a number")
+    if not value > 0 or not np.isfinite(value):
+        raise argparse.ArgumentTypeError(f"'{text}' is not a positive number")
+
+    return value
+
+
+def sweep_shards(axes: list, shard_size: int) -> list:
+    """
+    Split the grid of every combination of the axis values into shards of consecutive points.
+    The split depends only on the axes, so every host publishing the same sweep gets the same shards.
+
+    :param axes: A list of (name, values) tuples.
+    :return: A list of shards, each a list of value tuples in `itertools.product` order.
+    """
+    points = list(product(*(values for _, values in axes)))
+    return [points[start:start + shard_size] for start in range(0, len(points), shard_size)]
+
+
+def sweep_shard_job(context: dict, points: list) -> pd.DataFrame:
+    """
+    Value the bond at every grid point of a shard under every model of the sweep.
+
+    :param context: The shared sweep definition, with keys 'spec', 'axes' and 'models'.
+    :param points: Value tuples aligned with the axes.
+    :return: A DataFrame with one column per axis and one per model.
+    """
+    spec, names, models = context['spec'], context['axes'], context['models']
+    rows = []
+    for point in points:
+        variant = spec.replace(**dict(zip(names, point)))
+        row = dict(zip(names, point))
+        row.update({label: variant.profit(model, present_value=True) for label, model in models})
+        rows.append(row)
+
+    return pd.DataFrame(rows, columns=list(names) + [label for label, _ in models])
+
+
+def queue_worker_job(job) -> int:
+    """
+    Work on a sweep queue until no shard is left to claim. Runs inside a worker process.
+
+    :param job: A tuple (queue directory, lease in seconds).
+    :return: The number of shards this worker completed.
+    """
+    directory, lease_seconds = job
+    return run_worker(WorkQueue(directory, lease_seconds), sweep_shard_job)
+
+
+def iter_jobs(func, jobs, workers: int):
+    """
+    Run `func` over `jobs`, in a process pool when more than one worker is requested, yielding
+    each result in job order as soon as it and every earlier result are available.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(func, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        yield from executor.map(func, jobs)
+
+
+def run_jobs(func, jobs, workers: int) -> list:
+    """
+    Run `func` over `jobs`, in a process pool when more than one worker is requested.
+    Results are returned in job order regardless of the number of workers.
+    """
+    return list(iter_jobs(func, jobs, workers))
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str):
+    """
+    Write a result table in the requested format, creating the parent directory if needed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fmt == 'json':
+        df.to_json(path, orient='records', lines=True)
+    else:
+        df.to_csv(path, index=False)
+
+
+def start_output(path: str):
+    """
+    Create an empty output file for batches to be appended to, and its parent directory if needed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    open(path, 'w').close()
+
+
+def read_bonds(path: str) -> list:
+    """
+    Read the bond table given by `--input`.
+
+    :return: A list of row dictionaries.
+    """
+    return pd.read_csv(path).to_dict(orient='records')
+
+
+def parse_model_params(pairs: list) -> dict:
+    """
+    Parse repeated `--model-param key=value` options into constructor keyword arguments.
+    """
+    params = {}
+    for pair in pairs:
+        key, sep, value = pair.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Model parameter '{pair}' is not of the form key=value")
+        params[key] = float(value)
+
+    return params
+
+
+def add_cache_stats(summary: RunSummary, args, stats: list):
+    """
+    Add the combined result cache statistics of every job to the run summary.
+    """
+    if not args.cache:
+        return
+    hits = sum(s['hits'] for s in stats)
+    misses = sum(s['misses'] for s in stats)
+    summary.add_stat('cache hits', hits)
+    summary.add_stat('cache misses', misses)
+    summary.add_stat('cache hit rate', f"{hits / (hits + misses):.1%}" if hits + misses else 'n/a')
+    summary.add_stat('cache evictions', sum(s['evictions'] for s in stats))
+
+
+def cmd_value(args, summary: RunSummary):
+    with summary.stage('read input'):
+        rows = read_bonds(args.input)
+    jobs = [(start, rows[start:start + args.chunk_size], args.model, args.model_params, args.seed, args.cache)
+            for start in range(0, len(rows), args.chunk_size)]
+
+    columns = ['index', 'type', 'profit', 'profit_pv']
+    # The chunks go to a temporary file that only replaces the output once every chunk is written,
+    # so a failed run leaves any previous output in place rather than a partial table
+    partial = args.output + '.tmp'
+    if not jobs:
+        write_table(pd.DataFrame(columns=columns), partial, args.format)
+    else:
+        start_output(partial)
+
+    # Each chunk is appended by a writer thread while the next chunks are valued
+    stats = []
+    with BackgroundWriter() as writer:
+        with summary.stage('valuation'):
+            for i, (chunk, chunk_stats) in enumerate(iter_jobs(value_chunk, jobs, args.workers)):
+                stats.append(chunk_stats)
+                writer.submit(append_table, pd.DataFrame(chunk, columns=columns), partial, args.format, header=i == 0)
+        with summary.stage('write output'):
+            writer.flush()
+            os.replace(partial, args.output)
+    add_cache_stats(summary, args, stats)
+
+    summary.add_stat('bonds', len(rows))
+    summary.add_stat('chunks', len(jobs))
+
+
+def cmd_sweep(args, summary: RunSummary):
+    names = list(SWEEPS) if args.sweep == 'all' else [args.sweep]
+    jobs = [(name, args.seed, args.cache) for name in names]
+
+    # Each sweep table is written in the background while the remaining sweeps run
+    stats = []
+    with BackgroundWriter() as writer:
+        with summary.stage('sweeps'):
+            for name, df, sweep_stats in iter_jobs(sweep_job, jobs, args.workers):
+                stats.append(sweep_stats)
+                filename = os.path.splitext(SWEEPS[name].FILENAME)[0] + '.' + args.format
+                writer.submit(write_table, df, os.path.join(args.output, filename), args.format)
+        with summary.stage('write output'):
+            writer.flush()
+    add_cache_stats(summary, args, stats)
+
+    summary.add_stat('sweeps', len(jobs))
+
+
+def cmd_ladder(args, summary: RunSummary):
+    with summary.stage('read input'):
+        rows = read_bonds(args.input)
+        inflation_model = make_inflation_model(args.model, args.model_params, args.seed)
+        bonds = [make_bond(row, inflation_model) for row in rows]
+
+    with summary.stage('ladder'):
+        horizon = max((bond.maturity for bond in bonds), default=args.bucket_width)
+        edges = bucket_edges(horizon, args.bucket_width)
+        ladder = build_ladder(bonds, edges, by=args.by)
+
+    with summary.stage('write output'):
+        write_table(ladder, args.output, args.format)
+
+    summary.add_stat('bonds', len(bonds))
+    summary.add_stat('buckets', len(edges) - 1)
+
+
+def cmd_queue(args, summary: RunSummary):
+    queue = WorkQueue(args.queue, args.lease)
+
+    if args.action == 'publish':
+        if not args.axes:
+            raise SystemExit('queue publish needs at least one --axis')
+        maker = SWEEPS[args.sweep]
+        if args.seed is not None:
+            np.random.seed(args.seed)
+        spec = BondSpec.from_bond(maker.get_bond())
+        unknown = [name for name, _ in args.axes if name not in spec.fields]
+        if unknown:
+            raise SystemExit(f"The {args.sweep} sweep has no terms {unknown}; choose from {list(spec.fields)}")
+        models = maker.get_inflation_models()
+        # The maker's own column labels for its models
+        labels = maker.HEADERS[-len(models):]
+        context = {'spec': spec, 'axes': [name for name, _ in args.axes], 'models': list(zip(labels, models))}
+
+        with summary.stage('publish'):
+            shards = sweep_shards(args.axes, args.chunk_size)
+            created = queue.publish(shards, context)
+        summary.add_stat('shards', len(shards))
+        summary.add_stat('published', 'new' if created else 'existing')
+
+    elif args.action == 'work':
+        with summary.stage('shards'):
+            completed = run_jobs(queue_worker_job, [(args.queue, args.lease)] * args.workers, args.workers)
+        summary.add_stat('shards completed', sum(completed))
+        summary.add_stat('shards pending', len(queue.pending()))
+
+    else:
+        if not args.output:
+            raise SystemExit('queue merge needs --output')
+        with summary.stage('merge'):
+            table = pd.concat(queue.results(), ignore_index=True)
+        with summary.stage('write output'):
+            write_table(table, args.output, args.format)
+        summary.add_stat('shards', queue.n_shards)
+        summary.add_stat('rows', len(table))
+
+
+def cmd_chart(args, summary: RunSummary):
+    with summary.stage('read input'):
+        rows = read_bonds(args.input) if args.input else EXAMPLE_BONDS
+    if args.input:
+        jobs = [(row, os.path.join(args.output, str(i)), args.model, args.model_params, args.seed)
+                for i, row in enumerate(rows)]
+    else:
+        jobs = [(row, args.output, args.model, args.model_params, args.seed) for row in rows]
+
+    with summary.stage('charts'):
+        run_jobs(chart_job, jobs, args.workers)
+
+    summary.add_stat('bonds charted', len(jobs))
+
+
+def cmd_bench(args, summary: RunSummary):
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    rows = []
+    for name in args.benchmarks or list(BENCHMARKS):
+        with summary.stage(f'bench {name}'):
+            rows.extend(BENCHMARKS[name]())
+
+    df = pd.DataFrame(rows)
+    print(df.to_string(index=False))
+    if args.output:
+        write_table(df, args.output, args.format)
+
+    summary.add_stat('kernel backend', kernels.get_backend())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=1, help='Number of worker processes (default: 1).')
+    common.add_argument('--chunk-size', type=int, default=1000, help='Bonds per unit of work (default: 1000).')
+    common.add_argument('--seed', type=int, default=None, help='Seed for stochastic models, for reproducible runs.')
+    common.add_argument('--format', choices=['csv', 'json'], default='csv', help='Output table format (default: csv).')
+    common.add_argument('--model', choices=list(INFLATION_MODELS), default='none',
+                        help='Discount rate model used for present values (default: none).')
+    common.add_argument('--model-param', dest='model_params', action='append', default=[], metavar='KEY=VALUE',
+                        help='Keyword argument for the discount rate model. May be repeated.')
+    common.add_argument('--backend', choices=['auto'] + kernels.available_backends(), default='auto',
+                        help='Numeric kernel backend (default: numba when installed, else numpy).')
+    common.add_argument('--cache', default=None, metavar='PATH',
+                        help='SQLite file caching valuation results between runs (default: no cache).')
+    common.add_argument('--cache-size-mb', type=float, default=256,
+                        help='Size above which the oldest cached results are evicted (default: 256).')
+    common.add_argument('--precision', choices=list(precision.PRECISIONS), default='float64',
+                        help='Float precision of simulation and portfolio arrays (default: float64).')
+
+    parser = argparse.ArgumentParser(description='Bond valuation framework batch jobs.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    value = subparsers.add_parser('value', parents=[common], help='Value a table of bonds.')
+    value.add_argument('--input', required=True, help='CSV file of bonds to value.')
+    value.add_argument('--output', required=True, help='File to write the valuations to.')
+    value.set_defaults(func=cmd_value)
 
-# Filepath settings
-graph_filepath = "_data/graph/"
-table_filepath = "_data/csv/coupon_adjustments"
+    sweep = subparsers.add_parser('sweep', parents=[common], help='Run the data_makers parameter sweeps.')
+    sweep.add_argument('sweep', choices=list(SWEEPS) + ['all'], help='The sweep to run.')
+    sweep.add_argument('--output', default=fixed_rate_maker.FILEPATH, help='Directory to write the sweep tables to.')
+    sweep.set_defaults(func=cmd_sweep)
 
-# Ensure directories exist
-os.makedirs(graph_filepath, exist_ok=True)
-os.makedirs(table_filepath, exist_ok=True)
+    ladder = subparsers.add_parser('ladder', parents=[common], help='Aggregate cash flows into time buckets.')
+    ladder.add_argument('--input', required=True, help='CSV file of bonds in the book.')
+    ladder.add_argument('--output', required=True, help='File to write the ladder to.')
+    ladder.add_argument('--bucket-width', type=positive_float, default=1.0, help='Bucket width in years (default: 1).')
+    ladder.add_argument('--by', action='append', choices=list(LADDER_GROUPS), default=[],
+                        help='Split the ladder by bond type or model. May be repeated.')
+    ladder.set_defaults(func=cmd_ladder)
 
+    queue = subparsers.add_parser('queue', parents=[common],
+                                  help='Shard a sweep grid through a work queue on a shared filesystem.')
+    queue.add_argument('action', choices=['publish', 'work', 'merge'],
+                       help='Publish the shards, work on them, or merge their results.')
+    queue.add_argument('queue', help='The queue directory, shared by every host.')
+    queue.add_argument('--sweep', choices=list(SWEEPS), default='amortizing',
+                       help='The data_makers sweep giving the base bond and models (default: amortizing).')
+    queue.add_argument('--axis', dest='axes', action='append', type=parse_axis, default=[], metavar='NAME=VALUES',
+                       help='A bond term and its values, comma separated or start:stop:step. May be repeated.')
+    queue.add_argument('--lease', type=float, default=300,
+                       help='Seconds after which the claim of an unresponsive worker is taken over (default: 300).')
+    queue.add_argument('--output', default=None, help='File to write the merged table to.')
+    queue.set_defaults(func=cmd_queue)
 
-# Create a constant inflation model
-inflation = ConstantDiscountRateModel(rate=0.03)
+    chart = subparsers.add_parser('chart', parents=[common], help='Plot cash flow and discount rate charts.')
+    chart.add_argument('--input', default=None, help='CSV file of bonds to chart (default: the example bonds).')
+    chart.add_argument('--output', default='_data/graph/', help='Directory to write the charts to.')
+    chart.set_defaults(func=cmd_chart)
 
-# Common bond parameters
-face_value = 1000
-price = 900
-maturity = 5
-payment_frequency = 2  # Semi-annual
+    bench = subparsers.add_parser('bench', parents=[common], help='Run the kernel benchmarks.')
+    bench.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                       help=f"The benchmarks to run, from {', '.join(BENCHMARKS)} (default: all).")
+    bench.add_argument('--output', default=None, help='File to write the benchmark results to.')
+    bench.set_defaults(func=cmd_bench)
 
-bond = FixedRateBond(
-    face_value=face_value,
-    price=price,
-    maturity=maturity,
-    coupon_rate=0,
-    payment_frequency=payment_frequency,
-    inflation_model=inflation
-)
+    return parser
 
-coupon_rates = []
-nominal_profits = []
-constant_profits = []
-linear_profits = []
 
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error('--workers and --chunk-size must be positive')
+    try:
+        args.model_params = parse_model_params(args.model_params)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
 
+    # Worker processes pick the backend and precision up from the environment
+    os.environ['BOND_KERNEL_BACKEND'] = args.backend
+    os.environ['BOND_PRECISION'] = args.precision
+    kernels.set_backend(args.backend)
+    precision.set_precision(args.precision)
 
-for cr in range(8):
-    coupon_rates.append(cr * 0.005)
-    bond.coupon_rate = coupon_rates[-1]
-    profits.append(bond.profit())
-    profits_pv.append(bond.profit(present_value=True))
+    if args.cache:
+        args.cache = (args.cache, int(args.cache_size_mb * 1024 ** 2))
+        # Create the cache file once before workers open it concurrently
+        ResultCache(*args.cache).close()
 
-filename = 'fix_rate_cp_vary.csv'
+    summary = RunSummary(args.command)
+    args.func(args, summary)
+    summary.add_stat('workers', args.workers)
+    summary.add_stat('seed', args.seed)
+    print(summary.report(), file=sys.stderr)
 
-headers = ["Coupon Rate", "Profit", "Profit (PV)"]
-rows = zip(coupon_rates, profits, profits_pv)
+    return 0
 
-# Write to CSV file
-with open(filename, 'w', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    
-    # Write headers
-    writer.writerow(headers)
 
-    # Write the data rows
-    writer.writerows(rows)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import numpy as np
+
+from bonds import breakeven
+from bonds.partially_amortizing_bond import PartiallyAmortizingBond
+from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+
+
+def test_curve_points_start_from_the_previous_root(monkeypatch):
+    bond = PartiallyAmortizingBond(1000, 950, 10, ConstantDiscountRateModel(rate=0.03), 0.05, 12, 200)
+    sweep = np.linspace(0, 900, 10)
+    starts = []
+    solve = breakeven.solve_breakeven
+
+    def recording_solve(bonds, target, initial=None, **kwargs):
+        starts.append(initial)
+        return solve(bonds, target, initial=initial, **kwargs)
+
+    monkeypatch.setattr(breakeven, 'solve_breakeven', recording_solve)
+    curve = breakeven.breakeven_curve(bond, 'coupon_rate', 'baloon_payment', sweep)
+    monkeypatch.undo()
+
+    expected = [breakeven.solve_breakeven([breakeven._variant(bond, 'baloon_payment', value)], 'coupon_rate').values[0]
+                for value in sweep]
+    np.testing.assert_allclose(curve, expected, rtol=1e-8)
+    assert starts[0] is None
+    np.testing.assert_array_equal([start[0] for start in starts[1:]], curve[:-1])
+    assert bond.baloon_payment == 200
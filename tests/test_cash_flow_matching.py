@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from bonds.cash_flow_ladder import bucket_edges
+from bonds import cash_flow_matching
+from bonds.cash_flow_matching import MatchingMatrices, match_cash_flows
+from bonds.zero_coupon_bond import ZeroCouponBond
+
+
+def zero(price, maturity):
+    return ZeroCouponBond(face_value=1000, price=price, maturity=maturity, inflation_model=None, tax_rate=0.0,
+                          payment_frequency=1)
+
+
+@pytest.mark.parametrize('solver', [
+    pytest.param('highs', marks=pytest.mark.skipif(cash_flow_matching.optimize is None, reason="scipy is not installed")),
+    'projected_gradient',
+])
+def test_late_paying_bond_does_not_cover_an_earlier_liability(solver):
+    # The two year zero is cheaper, but pays a year after the first liability is due
+    bonds = [zero(980, 1), zero(900, 2)]
+    matrices = MatchingMatrices(bonds, bucket_edges(2, 1))
+
+    result = match_cash_flows(matrices, [(1.0, 1000.0), (2.0, 1000.0)], solver=solver)
+
+    assert result.holdings[0] == pytest.approx(1.0, abs=1e-4)
+    assert result.holdings[1] == pytest.approx(1.0, abs=1e-4)
+    assert np.max(result.residuals) <= 1e-3
+
+
+def test_liabilities_between_edges_are_due_at_the_previous_edge():
+    matrices = MatchingMatrices([zero(950, 1)], bucket_edges(3, 1))
+
+    np.testing.assert_allclose(matrices.bucket_liabilities([(1.0, 10.0), (1.5, 20.0), (3.0, 30.0)]), [30.0, 0.0, 30.0])
+    with pytest.raises(ValueError):
+        matrices.bucket_liabilities([(0.5, 10.0)])
@@ -0,0 +1,56 @@
+import argparse
+
+import pandas as pd
+import pytest
+
+import main
+from utils.run_summary import RunSummary
+
+ROWS = [{'type': 'fixed', 'face_value': 1000, 'price': 900, 'maturity': 10, 'payment_frequency': 2,
+         'coupon_rate': 0.05}] * 4
+
+
+def make_args(tmp_path):
+    pd.DataFrame(ROWS).to_csv(tmp_path / 'bonds.csv', index=False)
+    return argparse.Namespace(input=str(tmp_path / 'bonds.csv'), output=str(tmp_path / 'values.csv'), format='csv',
+                              chunk_size=1, workers=1, model='constant', model_params={'rate': 0.03}, seed=None,
+                              cache=None)
+
+
+def test_failed_run_keeps_the_previous_output(tmp_path, monkeypatch):
+    args = make_args(tmp_path)
+    main.cmd_value(args, RunSummary('value'))
+    previous = (tmp_path / 'values.csv').read_text()
+    assert len(pd.read_csv(args.output)) == len(ROWS)
+
+    value_chunk = main.value_chunk
+
+    def failing_chunk(job):
+        if job[0] == 2:
+            raise RuntimeError('valuation failed')
+        return value_chunk(job)
+
+    monkeypatch.setattr(main, 'value_chunk', failing_chunk)
+    with pytest.raises(RuntimeError):
+        main.cmd_value(args, RunSummary('value'))
+
+    assert (tmp_path / 'values.csv').read_text() == previous
+
+
+@pytest.mark.parametrize('width', ['0', '-1', 'nan'])
+def test_ladder_rejects_non_positive_bucket_widths(width):
+    with pytest.raises(SystemExit):
+        main.build_parser().parse_args(['ladder', '--input', 'bonds.csv', '--output', 'ladder.csv',
+                                        '--bucket-width', width])
+
+
+def test_ladder_counts_the_buckets_it_builds(tmp_path):
+    args = make_args(tmp_path)
+    pd.DataFrame([{**ROWS[0], 'maturity': 30}]).to_csv(args.input, index=False)
+    # 30 / (30 / 13) is a hair above 13 in floating point; the ladder still has 13 buckets
+    args.bucket_width, args.by, args.output = 30 / 13, [], str(tmp_path / 'ladder.csv')
+    summary = RunSummary('ladder')
+
+    main.cmd_ladder(args, summary)
+
+    assert summary.stats['buckets'] == 13
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from inflation_models.cpi_index import CPIIndex, write_cpi_file
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / 'cpi.npy')
+    write_cpi_file(path, [2020.0, 2021.0, 2022.0], [100.0, 102.0, 105.0])
+    return CPIIndex(path, valuation_year=2022.0)
+
+
+def test_reference_values_within_the_history(index):
+    np.testing.assert_allclose(index.reference_values([-2.0, -1.5, 0.0]), [100.0, 100.0, 105.0])
+    np.testing.assert_allclose(index.reference_values([-1.5], interpolate=True), [101.0])
+
+
+def test_reference_dates_before_the_first_fixing_are_rejected(index):
+    with pytest.raises(ValueError, match='before the first fixing'):
+        index.reference_values([0.0, 1.0], lag=2.25)
+    with pytest.raises(ValueError):
+        index.index_ratios([1.0], -2.5)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from inflation_models.g2pp_inflation_model import G2PPDiscountRateModel
+from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+
+def make_model(**terms):
+    parameters = dict(a=0.5, b=0.1, sigma=0.01, eta=0.008, rho=-0.7, phi=0.03, max_time=10.0, dt=1 / 48)
+    parameters.update(terms)
+    return G2PPDiscountRateModel(**parameters)
+
+
+@pytest.mark.parametrize('model_class, terms', [
+    (G2PPDiscountRateModel, dict(a=0.5, b=0.1, sigma=0.01, eta=0.008, rho=-0.7, phi=0.03)),
+    (VasicekDiscountRateModel, dict(r0=0.02, a=0.3, b=0.03, sigma=0.01)),
+])
+def test_time_grid_matches_path(model_class, terms):
+    model = model_class(max_time=10.0, dt=1 / 12, **terms)
+
+    assert len(model.times) == len(model.discount_rates) == 121
+    assert model.times[-1] == pytest.approx(10.0)
+    assert len(model.get_discount_rates([0.0, 5.0, 10.0])) == 3
+
+
+@pytest.mark.parametrize('x, y', [(0.0, 0.0), (0.01, -0.005)])
+def test_zero_coupon_prices_match_simulation(x, y):
+    model = make_model(x0=x, y0=y)
+    maturities = np.array([1.0, 5.0, 10.0])
+    paths = model.simulate_paths(20000, seed=42, dtype='float64')
+
+    # Trapezoidal integral of the short rate on the simulation grid
+    integrals = np.cumsum((paths[:, 1:] + paths[:, :-1]) * (model.dt / 2), axis=1)
+    discounts = np.exp(-integrals[:, np.round(maturities / model.dt).astype(int) - 1])
+    standard_errors = discounts.std(axis=0, ddof=1) / np.sqrt(len(paths))
+
+    errors = np.abs(discounts.mean(axis=0) - model.zero_coupon_prices(maturities))
+    assert np.all(errors < 4 * standard_errors)
+
+
+@pytest.mark.parametrize('rho', [-0.7, 0.0, 0.9])
+def test_factor_increments_are_correlated_by_rho(rho):
+    model = make_model(rho=rho, dt=1 / 52, max_time=2.0)
+    x, y = model.simulate_factors(20000, seed=7, dtype='float64')
+    decays = np.exp(-np.array([model.a, model.b]) * model.dt)
+
+    # The innovations of the exact transition over every path and step
+    dx = (x[:, 1:] - decays[0] * x[:, :-1]).ravel()
+    dy = (y[:, 1:] - decays[1] * y[:, :-1]).ravel()
+    correlation = np.corrcoef(dx, dy)[0, 1]
+
+    # Over a short step the correlation of the increments is rho, up to O(dt) and the sampling error
+    assert correlation == pytest.approx(rho, abs=4 / np.sqrt(len(dx)) + 0.01)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from bonds.fixed_rate_bond import FixedRateBond
+from bonds.floating_rate_note import FloatingRateNote
+from bonds.monte_carlo_pricer import GREEK_PARAMETERS, price_monte_carlo, price_monte_carlo_greeks
+from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+PARAMETERS = {'r0': 0.02, 'a': 0.1, 'b': 0.03, 'sigma': 0.01}
+N_PATHS = 2000
+SEED = 3
+
+
+def make_model(**changes):
+    # The constructor draws a single path from the global generator; the priced paths come from SEED
+    np.random.seed(0)
+    return VasicekDiscountRateModel(max_time=10, dt=1 / 12, **{**PARAMETERS, **changes})
+
+
+@pytest.mark.parametrize('bond', [
+    FixedRateBond(face_value=1000, price=900, coupon_rate=0.05, maturity=10, payment_frequency=2, inflation_model=None),
+    FloatingRateNote(face_value=1000, price=900, maturity=10, payment_frequency=4, inflation_model=None, spread_bps=2),
+], ids=['fixed', 'floating'])
+def test_pathwise_greeks_match_central_differences(bond):
+    bump = 1e-5
+    result = price_monte_carlo_greeks(bond, make_model(), N_PATHS, seed=SEED, dtype='float64')
+    base = price_monte_carlo(bond, make_model(), N_PATHS, seed=SEED, dtype='float64')
+
+    assert result.mean == pytest.approx(base.mean, rel=1e-12)
+    for name in GREEK_PARAMETERS:
+        up = price_monte_carlo(bond, make_model(**{name: PARAMETERS[name] + bump}), N_PATHS, seed=SEED, dtype='float64')
+        down = price_monte_carlo(bond, make_model(**{name: PARAMETERS[name] - bump}), N_PATHS, seed=SEED, dtype='float64')
+        difference = (up.mean - down.mean) / (2 * bump)
+
+        assert result.greeks[name] == pytest.approx(difference, rel=1e-6, abs=1e-6), name
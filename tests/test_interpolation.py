@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from utils.interpolation import InterpolationOperator
+
+
+@pytest.mark.parametrize('grid', [np.linspace(0, 10, 41), np.array([0.0, 2.5]), np.array([3.0])],
+                         ids=['grid', 'two points', 'one point'])
+def test_apply_matches_np_interp(grid):
+    times = np.array([-1.0, 0.0, 0.3, 2.5, 3.0, 7.7, 10.0, 12.0])
+    paths = np.random.default_rng(0).uniform(0, 0.05, size=(5, len(grid)))
+    operator = InterpolationOperator(grid, times)
+
+    expected = np.array([np.interp(times, grid, path) for path in paths])
+
+    np.testing.assert_allclose(operator.apply(paths), expected, rtol=1e-14)
+    np.testing.assert_allclose(operator.dense() @ paths.T, expected.T, rtol=1e-14)
+    np.testing.assert_allclose(operator.apply_transpose(np.ones((1, len(times)))).sum(), len(times))
+
+
+def test_apply_rejects_values_off_the_grid():
+    operator = InterpolationOperator(np.linspace(0, 1, 5), [0.5])
+
+    with pytest.raises(ValueError):
+        operator.apply(np.zeros((3, 4)))
+    with pytest.raises(ValueError):
+        operator.apply(np.zeros(6))
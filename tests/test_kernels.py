@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from utils import kernels
+
+
+requires_numba = pytest.mark.skipif('numba' not in kernels.available_backends(), reason="numba is not installed")
+
+SHAPES = [(360,), (50, 360)]
+
+
+def period_rates(shape):
+    rates = np.random.default_rng(0).uniform(-0.002, 0.01, shape)
+    rates[..., 0] = 0
+    return rates
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_discount_factors_match_cumulative_product(shape):
+    rates = period_rates(shape)
+    expected = np.cumprod(1 / (1 + rates), axis=-1)
+
+    result = kernels.discount_factors(rates, backend='numpy', dtype='float64')
+
+    assert result.shape == rates.shape
+    np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+
+@requires_numba
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('dtype, rtol', [('float64', 1e-12), ('float32', 1e-6)])
+def test_discount_factors_backends_agree(shape, dtype, rtol):
+    rates = period_rates(shape)
+
+    numpy_result = kernels.discount_factors(rates, backend='numpy', dtype=dtype)
+    numba_result = kernels.discount_factors(rates, backend='numba', dtype=dtype)
+
+    assert numba_result.shape == numpy_result.shape
+    assert numba_result.dtype == numpy_result.dtype
+    np.testing.assert_allclose(numba_result, numpy_result, rtol=rtol)
+
+
+@requires_numba
+@pytest.mark.parametrize('shape', [(240,), (100, 240)])
+@pytest.mark.parametrize('dtype, atol', [('float64', 1e-14), ('float32', 1e-7)])
+def test_vasicek_euler_backends_agree(shape, dtype, atol):
+    shocks = np.random.default_rng(1).standard_normal(shape)
+    parameters = dict(r0=0.02, a=0.3, b=0.03, sigma=0.01, dt=1 / 12)
+
+    numpy_result = kernels.vasicek_euler(shocks=shocks, backend='numpy', dtype=dtype, **parameters)
+    numba_result = kernels.vasicek_euler(shocks=shocks, backend='numba', dtype=dtype, **parameters)
+
+    assert numpy_result.shape == shape[:-1] + (shape[-1] + 1,)
+    assert numba_result.shape == numpy_result.shape
+    np.testing.assert_allclose(numba_result, numpy_result, rtol=0, atol=atol)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from bonds.amortization_engine import amortize_pool
+from bonds.fixed_rate_bond import FixedRateBond
+from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+from utils import kernels
+from utils.precision import accumulate, get_dtype, precision
+
+# Unit roundoff of float32, as in the error bounds of utils/precision.py
+UNIT_ROUNDOFF = 2.0 ** -24
+
+
+def simulate_and_discount(shocks, dt, dtype):
+    paths = kernels.vasicek_euler(0.02, 0.1, 0.03, 0.01, dt, shocks, dtype=dtype)
+    factors = kernels.discount_factors(paths * paths.dtype.type(dt), dtype=dtype)
+    return paths, factors, accumulate(factors, axis=0) / len(shocks)
+
+
+def test_monte_carlo_discounting_within_float32_bound():
+    dt = 1 / 12
+    n_steps = 360
+    shocks = np.random.default_rng(0).standard_normal((2000, n_steps))
+
+    paths64, factors64, mean64 = simulate_and_discount(shocks, dt, 'float64')
+    paths32, factors32, mean32 = simulate_and_discount(shocks, dt, 'float32')
+
+    assert paths32.dtype == factors32.dtype == np.float32
+    assert paths64.dtype == factors64.dtype == np.float64
+    assert mean32.dtype == mean64.dtype == np.float64
+
+    # Rates: at most n_steps * u * max|r|; discount factors: at most n_periods * u relative
+    assert np.max(np.abs(paths32 - paths64)) <= n_steps * UNIT_ROUNDOFF * np.max(np.abs(paths64))
+    assert np.max(np.abs(factors32 / factors64 - 1)) <= n_steps * UNIT_ROUNDOFF
+    # The float64-accumulated mean adds at most about u to the error of its terms
+    assert np.max(np.abs(mean32 / mean64 - 1)) <= (n_steps + 1) * UNIT_ROUNDOFF
+
+
+def test_accumulate_sums_float32_in_float64():
+    values = np.full(10 ** 6, 0.1, dtype=np.float32)
+    exact = len(values) * float(values[0])
+
+    total = accumulate(values)
+
+    assert total.dtype == np.float64
+    assert total == pytest.approx(exact, rel=1e-12)
+
+
+def test_pool_aggregates_in_float64():
+    model = ConstantDiscountRateModel(rate=0.03)
+    terms = dict(balances=[1000.0, 500.0, 250.0], coupon_rates=[0.05, 0.04, 0.06], maturities=[30, 20, 10],
+                 payment_frequency=12, baloon_payments=[200.0, 0.0, 50.0], prepayment_speeds=[0.0, 0.06])
+    pool64 = amortize_pool(dtype='float64', **terms)
+    pool32 = amortize_pool(dtype='float32', **terms)
+
+    assert pool32.payments.dtype == np.float32
+    for name, total in pool32.pool_cash_flows().items():
+        assert total.dtype == np.float64, name
+    values32 = pool32.present_value(model, 12)
+    values64 = pool64.present_value(model, 12)
+    assert values32.dtype == np.float64
+    np.testing.assert_allclose(values32, values64, rtol=360 * UNIT_ROUNDOFF)
+
+
+def test_precision_policy_scope():
+    default = get_dtype()
+    with precision('float32'):
+        assert get_dtype() is np.float32
+        assert get_dtype('float64') is np.float64
+    assert get_dtype() is default
+
+
+def test_schedule_discount_factors_ignore_the_policy():
+    bond = FixedRateBond(face_value=1000, price=900, coupon_rate=0.05, maturity=30, payment_frequency=12,
+                         inflation_model=ConstantDiscountRateModel(rate=0.031))
+    with precision('float32'):
+        inside = bond.profit(present_value=True)
+        assert bond.schedule.discount_factors(bond.inflation_model).dtype == np.float64
+    outside = bond.profit(present_value=True)
+
+    assert bond.schedule.discount_factors(bond.inflation_model).dtype == np.float64
+    assert inside == outside
@@ -0,0 +1,36 @@
+import main
+from utils import precision
+
+ROWS = [
+    {'type': 'fixed', 'face_value': 1000, 'price': 900, 'maturity': 30, 'payment_frequency': 12, 'coupon_rate': 0.05},
+    {'type': 'amortizing', 'face_value': 1000, 'price': 950, 'maturity': 20, 'payment_frequency': 12,
+     'coupon_rate': 0.04, 'baloon_payment': 300},
+]
+
+
+def value(cache):
+    return main.value_chunk((0, ROWS, 'constant', {'rate': 0.031}, None, cache))
+
+
+def test_float32_results_are_not_reused_by_float64_runs(tmp_path):
+    cache = (str(tmp_path / 'cache.db'), 10 ** 7)
+    expected, _ = value(None)
+
+    with precision.precision('float32'):
+        value(cache)
+        _, float32_stats = value(cache)
+    results, stats = value(cache)
+
+    assert float32_stats['hits'] == len(ROWS)
+    assert stats['hits'] == 0
+    assert results == expected
+
+
+def test_cache_keys_include_the_valuation_settings():
+    with precision.precision('float32'):
+        float32_settings = main.valuation_settings()
+    with precision.precision('float64'):
+        float64_settings = main.valuation_settings()
+
+    assert float32_settings != float64_settings
+    assert main.CACHE_VERSION in float64_settings
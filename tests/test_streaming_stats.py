@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from bonds.fixed_rate_bond import FixedRateBond
+from bonds.portfolio import Portfolio
+from bonds.risk_engine import RiskEngine
+from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+from utils.streaming_stats import QuantileSketch
+
+
+def test_empty_sketch_estimates_are_nan():
+    sketch = QuantileSketch(k=8)
+
+    assert np.isnan(sketch.quantiles([0.05, 0.5])).all()
+    assert np.isnan(sketch.tail_mean(0.99))
+
+
+@pytest.mark.parametrize('exact', [False, True], ids=['sketch', 'exact'])
+def test_risk_engine_without_scenarios(exact):
+    bond = FixedRateBond(face_value=1000, price=900, coupon_rate=0.05, maturity=10, payment_frequency=2,
+                         inflation_model=ConstantDiscountRateModel(rate=0.03))
+    grid = np.linspace(0, 10, 11)
+    engine = RiskEngine(Portfolio.from_bonds([bond]), grid, np.full(grid.size, 0.03), exact=exact)
+
+    result = engine.run(iter([]))
+
+    assert result.n_scenarios == 0
+    assert all(np.isnan(result.var[c]) and np.isnan(result.es[c]) for c in result.confidences)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from bonds.fixed_rate_bond import FixedRateBond
+from bonds.zero_coupon_bond import ZeroCouponBond
+from inflation_models.vasicek_calibration import calibrate_vasicek, instrument_cash_flows, zero_coupon_prices
+
+TRUE_PARAMETERS = {'a': 0.3, 'b': 0.04, 'sigma': 0.01, 'r0': 0.02}
+
+
+def make_bonds():
+    return [FixedRateBond(face_value=100, price=100, coupon_rate=coupon, maturity=maturity, payment_frequency=2,
+                          inflation_model=None)
+            for coupon, maturity in [(0.02, 1), (0.025, 2), (0.03, 5), (0.035, 10), (0.04, 20), (0.04, 30)]]
+
+
+def make_universe():
+    # 330 instruments: a zero for every year to 30 and 300 coupon bonds
+    rng = np.random.default_rng(0)
+    zeros = [ZeroCouponBond(face_value=100, price=50, maturity=maturity, inflation_model=None, tax_rate=0.0,
+                            payment_frequency=2) for maturity in range(1, 31)]
+    coupons = [FixedRateBond(face_value=100, price=100, coupon_rate=float(coupon), maturity=float(maturity),
+                             payment_frequency=2, inflation_model=None)
+               for coupon, maturity in zip(rng.uniform(0.01, 0.08, 300), rng.integers(1, 31, 300))]
+    return zeros + coupons
+
+
+def model_prices(bonds, parameters=TRUE_PARAMETERS):
+    times, amounts = instrument_cash_flows(bonds)
+    return amounts @ zero_coupon_prices(times, **parameters)
+
+
+def test_recovers_parameters_from_model_prices():
+    bonds = make_bonds()
+
+    calibration = calibrate_vasicek(bonds, prices=model_prices(bonds), fixed={'sigma': TRUE_PARAMETERS['sigma']})
+
+    assert calibration.converged
+    for name in ('a', 'b', 'r0'):
+        assert calibration.params[name] == pytest.approx(TRUE_PARAMETERS[name], rel=1e-4), name
+
+
+@pytest.mark.parametrize('parameters', [
+    {'a': 0.3, 'b': 0.04, 'sigma': 0.02, 'r0': 0.02},
+    {'a': 0.1, 'b': 0.05, 'sigma': 0.01, 'r0': 0.03},
+])
+def test_recovers_every_free_parameter(parameters):
+    bonds = make_universe()
+
+    calibration = calibrate_vasicek(bonds, prices=model_prices(bonds, parameters))
+
+    assert calibration.converged
+    assert calibration.rmse < 1e-8
+    for name, value in parameters.items():
+        assert calibration.params[name] == pytest.approx(value, rel=1e-5), name
+
+
+def test_non_finite_prices_raise_value_error():
+    bonds = make_bonds()
+    prices = model_prices(bonds)
+    prices[2] = np.nan
+
+    with pytest.raises(ValueError, match="non-finite"):
+        calibrate_vasicek(bonds, prices=prices)
@@ -0,0 +1,87 @@
+import os
+import time
+
+import pytest
+
+from utils.work_queue import WorkQueue
+
+
+def make_queues(directory, lease_seconds=60.0):
+    first, second = WorkQueue(str(directory), lease_seconds), WorkQueue(str(directory), lease_seconds)
+    # Two workers of one process, told apart as if they ran on different hosts
+    first.worker, second.worker = 'host-a:1', 'host-b:1'
+    first.publish([10, 20, 30], context='context')
+    return first, second
+
+
+def expire(queue, index):
+    stale = time.time() - 2 * queue.lease_seconds
+    os.utime(queue._claim_path(index), (stale, stale))
+
+
+def test_claim_is_exclusive_until_the_lease_expires(tmp_path):
+    first, second = make_queues(tmp_path)
+
+    assert first.claim(0)
+    assert not second.claim(0)
+    expire(first, 0)
+    assert second.claim(0)
+    assert first.owner(0) == second.worker
+
+
+def test_refresh_and_release_leave_other_claims_alone(tmp_path):
+    first, second = make_queues(tmp_path)
+    assert first.claim(0)
+    expire(first, 0)
+    stale = os.stat(first._claim_path(0)).st_mtime
+
+    second.refresh(0)
+    second.release(0)
+    assert first.owner(0) == first.worker
+    assert os.stat(first._claim_path(0)).st_mtime == stale
+
+    first.refresh(0)
+    assert os.stat(first._claim_path(0)).st_mtime > stale
+
+
+def test_completing_a_shard_taken_over_keeps_the_new_claim(tmp_path):
+    first, second = make_queues(tmp_path)
+    assert first.claim(1)
+    expire(first, 1)
+    assert second.claim(1)
+
+    first.complete(1, 'late result')
+    assert first.is_done(1)
+    assert first.owner(1) == second.worker
+
+    second.complete(1, 'result')
+    assert second.owner(1) is None
+
+
+def test_claim_refreshed_during_takeover_is_restored(tmp_path, monkeypatch):
+    first, second = make_queues(tmp_path)
+    assert first.claim(2)
+    expire(first, 2)
+    replace = os.replace
+
+    def refreshed_then_replace(source, destination):
+        # The owner refreshes its claim between the expiry check and the rename
+        os.utime(source)
+        replace(source, destination)
+
+    monkeypatch.setattr(os, 'replace', refreshed_then_replace)
+    assert not second.claim(2)
+    monkeypatch.undo()
+
+    assert first.owner(2) == first.worker
+    assert [name for name in os.listdir(tmp_path / 'claims') if 'expired' in name] == []
+
+
+@pytest.mark.parametrize('index', [0, 2])
+def test_done_shards_are_not_claimed(tmp_path, index):
+    first, second = make_queues(tmp_path)
+    first.claim(index)
+    first.complete(index, 'result')
+
+    assert first.owner(index) is None
+    assert not second.claim(index)
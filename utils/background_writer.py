@@ -0,0 +1,123 @@
+"""
+A pipeline stage that writes results in the background while the next batch is computed.
+
+Output tasks (CSV tables, binary columns, charts) are handed to a `BackgroundWriter` and run on
+writer threads; charts are drawn on figures of their own, so they are safe to render on threads
+too. Processes are an option for tasks that hold the GIL long enough to slow the producer. At most
+`max_pending` tasks are queued or running; submitting beyond that blocks until one finishes, so a
+fast producer cannot run ahead of the disk and fill memory. The first error raised by a task is
+re-raised in the producer by the next `submit`, `flush` or `close`. Leaving the `with` block waits
+for every pending task, so the outputs are complete when the block exits.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+
+class BackgroundWriter:
+    """
+    Runs output tasks concurrently with the caller, with a bounded number of pending tasks.
+    """
+
+    def __init__(self, max_pending: int = 4, workers: int = 1, processes: bool = False):
+        """
+        :param max_pending: The number of tasks queued or running before `submit` blocks.
+        :param workers: The number of writer threads or processes. With one writer, tasks run in
+                        submission order, so consecutive appends to one file stay in order.
+        :param processes: Run tasks in processes instead of threads; tasks and their arguments must be picklable.
+        """
+        executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.error = None
+        self.completed = 0
+
+    def _done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+            if future.cancelled():
+                pass
+            elif future.exception() is not None:
+                if self.error is None:
+                    self.error = future.exception()
+            else:
+                self.completed += 1
+        self.slots.release()
+
+    def _raise_error(self):
+        with self.lock:
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue `func(*args, **kwargs)`, blocking while `max_pending` tasks are outstanding.
+
+        :raises Exception: The error of an earlier task that failed.
+        """
+        self._raise_error()
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self._done)
+
+    def flush(self):
+        """
+        Wait for every submitted task to finish.
+
+        :raises Exception: The error of a task that failed.
+        """
+        while True:
+            with self.lock:
+                pending = list(self.pending)
+            if not pending:
+                break
+            for future in pending:
+                future.exception()
+        self._raise_error()
+
+    def close(self, cancel: bool = False):
+        """
+        Finish the pending tasks and stop the writers.
+
+        :param cancel: Drop the tasks that have not started instead of running them.
+        """
+        try:
+            if not cancel:
+                self.flush()
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # On an error in the producer, drop the queued output rather than write a partial run
+        self.close(cancel=exc_type is not None)
+        return False
+
+
+def append_table(df, path: str, fmt: str = 'csv', header: bool = True):
+    """
+    Append a batch of rows to a CSV or JSON lines file, writing the CSV header when `header` is set.
+    """
+    if fmt == 'json':
+        df.to_json(path, orient='records', lines=True, mode='a')
+    else:
+        df.to_csv(path, mode='a', header=header, index=False)
+
+
+def save_columns(path: str, columns: dict):
+    """
+    Save named columns as one uncompressed `.npz` file, loadable with `np.load(path)`.
+    """
+    np.savez(path, **{name: np.asarray(values) for name, values in columns.items()})
@@ -0,0 +1,550 @@
+"""
+Micro-benchmarks for the numeric kernels, run with `python main.py bench`.
+
+Every benchmark returns a list of result rows. Rows that compare an implementation with a
+reference also report the largest absolute difference between them, so a benchmark run
+doubles as an equivalence check. The `size` column is the number of elements processed, or
+the number of bytes held where memory is what is being compared.
+"""
+import os
+import time
+
+import numpy as np
+
+from utils import kernels
+from utils.precision import accumulate
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """
+    Register a benchmark function under the given name.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+def time_call(func, *args, repeat: int = 3, **kwargs):
+    """
+    Time a call, keeping the best of `repeat` runs.
+
+    :return: A tuple (seconds, result of the last call).
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def max_abs_error(result, reference) -> float:
+    return float(np.max(np.abs(np.asarray(result, dtype=float) - np.asarray(reference, dtype=float))))
+
+
+@benchmark('kernels')
+def bench_kernels(n_rows: int = 2000, n_periods: int = 360, seed: int = 0) -> list:
+    """
+    Compare every available kernel backend on the discount factor recurrence and the Vasicek Euler step.
+    """
+    rng = np.random.default_rng(seed)
+    period_rates = rng.uniform(0, 0.01, size=(n_rows, n_periods))
+    shocks = rng.standard_normal((n_rows, n_periods))
+
+    reference_factors = kernels.discount_factors(period_rates, backend='numpy')
+    reference_rates = kernels.vasicek_euler(0.02, 0.1, 0.03, 0.01, 1 / 12, shocks, backend='numpy')
+
+    rows = []
+    for backend in kernels.available_backends():
+        # The first call compiles JIT kernels, so it is not timed
+        kernels.discount_factors(period_rates[:1], backend=backend)
+        kernels.vasicek_euler(0.02, 0.1, 0.03, 0.01, 1 / 12, shocks[:1], backend=backend)
+
+        seconds, factors = time_call(kernels.discount_factors, period_rates, backend=backend)
+        rows.append({'benchmark': 'discount_factors', 'variant': backend, 'size': period_rates.size,
+                     'seconds': seconds, 'max_abs_error': max_abs_error(factors, reference_factors)})
+
+        seconds, rates = time_call(kernels.vasicek_euler, 0.02, 0.1, 0.03, 0.01, 1 / 12, shocks, backend=backend)
+        rows.append({'benchmark': 'vasicek_euler', 'variant': backend, 'size': shocks.size,
+                     'seconds': seconds, 'max_abs_error': max_abs_error(rates, reference_rates)})
+
+    return rows
+
+
+@benchmark('log_discounting')
+def bench_log_discounting(horizon: float = 50, seed: int = 0) -> list:
+    """
+    Discount one schedule over `horizon` years at growing numbers of periods, up to 10^6, with the
+    log-space kernel of every backend at both precisions and with the plain product `1 / cumprod(1 + r)`.
+    Errors are relative to the product evaluated in extended precision (np.longdouble).
+    """
+    rng = np.random.default_rng(seed)
+
+    rows = []
+    for n_periods in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6):
+        annual_rates = rng.uniform(0, 0.1, size=n_periods + 1)
+        period_rates = annual_rates * horizon / n_periods
+        period_rates[0] = 0
+
+        for dtype in ('float64', 'float32'):
+            rates = period_rates.astype(dtype)
+            reference = 1 / np.cumprod(1 + rates.astype(np.longdouble))
+            seconds, factors = time_call(lambda: 1 / np.cumprod(1 + rates))
+            rows.append({'benchmark': 'log_discounting', 'variant': f'cumprod {dtype}', 'size': n_periods,
+                         'seconds': seconds, 'max_abs_error': max_abs_error(factors / reference, 1)})
+            for backend in kernels.available_backends():
+                # The first call compiles JIT kernels, so it is not timed
+                kernels.discount_factors(rates[:2], backend=backend, dtype=dtype)
+                seconds, factors = time_call(kernels.discount_factors, rates, backend=backend, dtype=dtype)
+                rows.append({'benchmark': 'log_discounting', 'variant': f'{backend} {dtype}', 'size': n_periods,
+                             'seconds': seconds, 'max_abs_error': max_abs_error(factors / reference, 1)})
+
+    return rows
+
+
+@benchmark('precision')
+def bench_precision(n_paths: int = 20000, max_time: float = 30, seed: int = 0) -> list:
+    """
+    Compare float32 and float64 Monte Carlo runs: simulate Vasicek paths from the same shocks,
+    discount a unit cash flow at every step and average. Errors are relative to the float64 run.
+    """
+    dt = 1 / 12
+    shocks = np.random.default_rng(seed).standard_normal((n_paths, int(max_time / dt)))
+
+    def run(dtype):
+        paths = kernels.vasicek_euler(0.02, 0.1, 0.03, 0.01, dt, shocks, dtype=dtype)
+        factors = kernels.discount_factors(paths * dt, dtype=dtype)
+        return paths.nbytes + factors.nbytes, accumulate(factors, axis=0) / n_paths
+
+    rows = []
+    reference = None
+    for dtype in ('float64', 'float32'):
+        seconds, (n_bytes, mean_factors) = time_call(run, dtype)
+        if reference is None:
+            reference = mean_factors
+        rows.append({'benchmark': 'monte_carlo_discounting', 'variant': dtype, 'size': n_bytes,
+                     'seconds': seconds, 'max_abs_error': max_abs_error(mean_factors / reference, 1)})
+
+    return rows
+
+
+@benchmark('monte_carlo')
+def bench_monte_carlo(chunk_size: int = 10000, seed: int = 0) -> list:
+    """
+    Price a fixed-rate bond by chunked Monte Carlo at growing path counts. The `size` column is the
+    peak memory traced during each run, which should stay flat as the path count grows, and the
+    error column is the standard error of the price.
+    """
+    import tracemalloc
+
+    from bonds.fixed_rate_bond import FixedRateBond
+    from bonds.monte_carlo_pricer import price_monte_carlo
+    from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+    np.random.seed(seed)
+    model = VasicekDiscountRateModel(a=0.1, b=0.03, sigma=0.01, r0=0.02, max_time=30, dt=1 / 12)
+    bond = FixedRateBond(face_value=1000, price=900, coupon_rate=0.05, maturity=30, payment_frequency=12, inflation_model=model)
+
+    rows = []
+    for n_paths in (chunk_size * 5, chunk_size * 20):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = price_monte_carlo(bond, model, n_paths, chunk_size=chunk_size, seed=seed)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append({'benchmark': 'monte_carlo_peak_memory', 'variant': f'{n_paths} paths', 'size': peak,
+                     'seconds': seconds, 'max_abs_error': result.std_error})
+
+    return rows
+
+
+def _value_pickled(task):
+    from bonds.scenario_valuation import _value_paths
+
+    portfolio, path_times, paths = task
+    return _value_paths(portfolio, path_times, paths, by_bond=False)
+
+
+@benchmark('shared_memory')
+def bench_shared_memory(n_bonds: int = 2000, n_paths: int = 20000, chunk_size: int = 1000, seed: int = 0) -> list:
+    """
+    Value a portfolio over simulated paths across worker processes, once by pickling the paths and the
+    portfolio into every task and once through shared memory. The `size` column is the number of
+    bytes pickled to the workers.
+    """
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+
+    from bonds.fixed_rate_bond import FixedRateBond
+    from bonds.portfolio import Portfolio
+    from bonds.scenario_valuation import value_scenarios
+    from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+    np.random.seed(seed)
+    model = VasicekDiscountRateModel(a=0.1, b=0.03, sigma=0.01, r0=0.02, max_time=30, dt=1 / 12)
+    rng = np.random.default_rng(seed)
+    bonds = [FixedRateBond(face_value=1000, price=900, coupon_rate=float(rng.uniform(0, 0.08)),
+                           maturity=int(rng.integers(1, 31)), payment_frequency=2, inflation_model=None)
+             for _ in range(n_bonds)]
+    portfolio = Portfolio.from_bonds(bonds)
+    paths = model.simulate_paths(n_paths, seed=seed)
+    workers = max(2, os.cpu_count() or 1)
+
+    tasks = [(portfolio, model.times, paths[start:start + chunk_size]) for start in range(0, n_paths, chunk_size)]
+    pickled_bytes = sum(len(pickle.dumps(task)) for task in tasks)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        reference = np.concatenate(list(executor.map(_value_pickled, tasks)))
+    pickled_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shared = value_scenarios(portfolio, model.times, paths, workers=workers, chunk_size=chunk_size)
+    shared_seconds = time.perf_counter() - start
+    shared_bytes = len(pickle.dumps([(i, i + chunk_size, False) for i in range(0, n_paths, chunk_size)]))
+
+    return [
+        {'benchmark': 'scenario_valuation', 'variant': f'pickled x{workers}', 'size': pickled_bytes,
+         'seconds': pickled_seconds, 'max_abs_error': 0.0},
+        {'benchmark': 'scenario_valuation', 'variant': f'shared_memory x{workers}', 'size': shared_bytes,
+         'seconds': shared_seconds, 'max_abs_error': max_abs_error(shared, reference)},
+    ]
+
+
+@benchmark('greeks')
+def bench_greeks(n_paths: int = 20000, seed: int = 0, bump: float = 1e-5) -> list:
+    """
+    Check the pathwise Monte Carlo Greeks against central finite differences on the same paths, and
+    compare the cost of both. The error column is the difference from the finite difference estimate.
+    """
+    from bonds.fixed_rate_bond import FixedRateBond
+    from bonds.floating_rate_note import FloatingRateNote
+    from bonds.monte_carlo_pricer import GREEK_PARAMETERS, price_monte_carlo, price_monte_carlo_greeks
+    from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+    params = {'a': 0.1, 'b': 0.03, 'sigma': 0.01, 'r0': 0.02}
+    np.random.seed(seed)
+    model = VasicekDiscountRateModel(max_time=10, dt=1 / 12, **params)
+    bonds = [
+        FixedRateBond(face_value=1000, price=900, coupon_rate=0.05, maturity=10, payment_frequency=2, inflation_model=None),
+        FloatingRateNote(face_value=1000, price=900, maturity=10, payment_frequency=4, inflation_model=None, spread_bps=2),
+    ]
+
+    def bumped(name, step):
+        np.random.seed(seed)
+        return VasicekDiscountRateModel(max_time=10, dt=1 / 12, **{**params, name: params[name] + step})
+
+    rows = []
+    for bond in bonds:
+        seconds, result = time_call(price_monte_carlo_greeks, bond, model, n_paths, seed=seed, repeat=1)
+        start = time.perf_counter()
+        differences = {}
+        for name in GREEK_PARAMETERS:
+            up = price_monte_carlo(bond, bumped(name, bump), n_paths, seed=seed).mean
+            down = price_monte_carlo(bond, bumped(name, -bump), n_paths, seed=seed).mean
+            differences[name] = (up - down) / (2 * bump)
+        fd_seconds = time.perf_counter() - start
+
+        rows.append({'benchmark': 'greeks', 'variant': f'{bond.__class__.__name__} finite differences',
+                     'size': n_paths, 'seconds': fd_seconds, 'max_abs_error': 0.0})
+        for name in GREEK_PARAMETERS:
+            rows.append({'benchmark': 'greeks', 'variant': f'{bond.__class__.__name__} pathwise {name}',
+                         'size': n_paths, 'seconds': seconds,
+                         'max_abs_error': abs(result.greeks[name] - differences[name])})
+
+    return rows
+
+
+@benchmark('interpolation')
+def bench_interpolation(n_paths: int = 20000, n_grid: int = 361, n_times: int = 120, seed: int = 0) -> list:
+    """
+    Evaluate rate paths at payment times with `np.interp` per path, and with one interned
+    interpolation operator applied to all paths at once.
+    """
+    from utils.interpolation import get_operator
+
+    rng = np.random.default_rng(seed)
+    grid = np.linspace(0, 30, n_grid)
+    times = np.sort(rng.uniform(0, 30, n_times))
+    paths = rng.uniform(0, 0.05, size=(n_paths, n_grid))
+
+    seconds, reference = time_call(lambda: np.array([np.interp(times, grid, path) for path in paths]))
+    rows = [{'benchmark': 'interpolation', 'variant': 'np.interp per path', 'size': paths.size,
+             'seconds': seconds, 'max_abs_error': 0.0}]
+    seconds, result = time_call(lambda: get_operator(grid, times).apply(paths))
+    rows.append({'benchmark': 'interpolation', 'variant': 'operator', 'size': paths.size,
+                 'seconds': seconds, 'max_abs_error': max_abs_error(result, reference)})
+
+    return rows
+
+
+@benchmark('specs')
+def bench_specs(n_bonds: int = 1000000, n_valued: int = 1000, seed: int = 0) -> list:
+    """
+    Compare a universe of `FixedRateBond` objects with one of frozen `FixedRateSpec` records: the
+    memory held by the instances, the pickled size and round trip time, and a coupon sweep by
+    mutating a bond against `replace()`. The error column compares profits valued from both.
+    """
+    import pickle
+    import tracemalloc
+
+    from bonds.bond_spec import FixedRateSpec
+    from bonds.fixed_rate_bond import FixedRateBond
+    from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+
+    rng = np.random.default_rng(seed)
+    coupons = rng.uniform(0, 0.08, n_bonds).tolist()
+    maturities = rng.integers(1, 31, n_bonds).tolist()
+    model = ConstantDiscountRateModel(rate=0.02)
+
+    rows = []
+    universes = {}
+    for variant, build in [
+        ('FixedRateBond', lambda c, m: FixedRateBond(1000.0, 900.0, c, float(m), 2, None)),
+        ('FixedRateSpec', lambda c, m: FixedRateSpec(1000.0, 900.0, c, float(m), 2)),
+    ]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        universe = [build(c, m) for c, m in zip(coupons, maturities)]
+        seconds = time.perf_counter() - start
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        universes[variant] = universe
+        rows.append({'benchmark': 'specs', 'variant': f'{variant} build', 'size': held,
+                     'seconds': seconds, 'max_abs_error': 0.0})
+
+        start = time.perf_counter()
+        pickled = pickle.dumps(universe, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.loads(pickled)
+        rows.append({'benchmark': 'specs', 'variant': f'{variant} pickle round trip', 'size': len(pickled),
+                     'seconds': time.perf_counter() - start, 'max_abs_error': 0.0})
+
+    bonds, specs = universes['FixedRateBond'][:n_valued], universes['FixedRateSpec'][:n_valued]
+    sweep = np.linspace(0, 0.08, 9).tolist()
+
+    def mutate():
+        profits = []
+        for bond in bonds:
+            bond.inflation_model = model
+            for coupon_rate in sweep:
+                bond.coupon_rate = coupon_rate
+                profits.append(bond.profit(present_value=True))
+        return profits
+
+    def derive():
+        return [spec.replace(coupon_rate=coupon_rate).profit(model, present_value=True)
+                for spec in specs for coupon_rate in sweep]
+
+    seconds, reference = time_call(mutate, repeat=1)
+    rows.append({'benchmark': 'specs', 'variant': 'FixedRateBond sweep by mutation', 'size': len(reference),
+                 'seconds': seconds, 'max_abs_error': 0.0})
+    seconds, result = time_call(derive, repeat=1)
+    rows.append({'benchmark': 'specs', 'variant': 'FixedRateSpec sweep by replace()', 'size': len(result),
+                 'seconds': seconds, 'max_abs_error': max_abs_error(result, reference)})
+
+    return rows
+
+
+def _write_batch(directory, i, table):
+    from utils.background_writer import append_table, save_columns
+
+    append_table(table, os.path.join(directory, 'table.csv'), header=i == 0)
+    save_columns(os.path.join(directory, f'columns_{i}.npz'), {name: table[name].to_numpy() for name in table})
+
+
+@benchmark('background_writer')
+def bench_background_writer(n_batches: int = 16, n_rows: int = 4000, n_periods: int = 360, seed: int = 0) -> list:
+    """
+    Run batches of discounting followed by writing each batch as a CSV table and binary columns,
+    once in strict alternation and once with the writes handed to a `BackgroundWriter`. The
+    `size` column is the number of bytes written; the error column compares the written tables.
+    """
+    import tempfile
+
+    import pandas as pd
+
+    from utils.background_writer import BackgroundWriter
+
+    rng = np.random.default_rng(seed)
+    period_rates = [rng.uniform(0, 0.01, size=(n_rows, n_periods)) for _ in range(n_batches)]
+
+    def compute(rates):
+        factors = kernels.discount_factors(rates, backend='numpy')
+        return pd.DataFrame(factors[:, ::30], columns=[f"t{t}" for t in range(0, n_periods, 30)])
+
+    def run(directory, writer):
+        for i, rates in enumerate(period_rates):
+            if writer is None:
+                _write_batch(directory, i, compute(rates))
+            else:
+                writer.submit(_write_batch, directory, i, compute(rates))
+
+    rows = []
+    reference = None
+    for variant, processes in (('sequential', None), ('writer thread', False), ('writer process', True)):
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            if processes is None:
+                run(directory, None)
+            else:
+                with BackgroundWriter(max_pending=4, processes=processes) as writer:
+                    run(directory, writer)
+            seconds = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            table = pd.read_csv(os.path.join(directory, 'table.csv')).to_numpy()
+        if reference is None:
+            reference = table
+        rows.append({'benchmark': 'background_writer', 'variant': variant, 'size': size,
+                     'seconds': seconds, 'max_abs_error': max_abs_error(table, reference)})
+
+    compute_seconds, _ = time_call(lambda: [compute(rates) for rates in period_rates], repeat=1)
+    rows.append({'benchmark': 'background_writer', 'variant': 'compute only', 'size': 0,
+                 'seconds': compute_seconds, 'max_abs_error': 0.0})
+
+    return rows
+
+
+@benchmark('cash_flow_matching')
+def bench_cash_flow_matching(sizes=(1000, 5000, 20000, 50000), horizon: float = 30, seed: int = 0) -> list:
+    """
+    Build the matching matrices of universes of fixed rate bonds of growing size, then match and
+    immunize a declining 25 year liability ladder with every available solver. The error column
+    is the largest liability shortfall relative to the largest liability; the matching rows
+    report the cost in the variant name so solvers can be compared.
+    """
+    from bonds.cash_flow_ladder import bucket_edges
+    from bonds.cash_flow_matching import MatchingMatrices, immunize, match_cash_flows, optimize
+    from bonds.fixed_rate_bond import FixedRateBond
+    from bonds.portfolio import Portfolio
+    from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+
+    rng = np.random.default_rng(seed)
+    model = ConstantDiscountRateModel(rate=0.03)
+    edges = bucket_edges(horizon, 1.0)
+    liabilities = [(float(year), 1e6 * np.exp(-year / 20)) for year in range(1, 26)]
+    largest = max(amount for _, amount in liabilities)
+    solvers = ['projected_gradient'] + (['highs'] if optimize is not None else [])
+
+    rows = []
+    for size in sizes:
+        bonds = [FixedRateBond(1000.0, 1000.0, coupon_rate, float(maturity), 2, model)
+                 for coupon_rate, maturity in zip(rng.uniform(0, 0.08, size), rng.integers(1, int(horizon) + 1, size))]
+        # Prices scattered around the model value, so some bonds are cheap to hold
+        portfolio = Portfolio.from_bonds(bonds, dtype=np.float64)
+        values = portfolio.present_values(model.get_discount_rates(portfolio.times)) - portfolio.amounts[:, 0]
+        for bond, value in zip(bonds, values * rng.uniform(0.98, 1.02, size)):
+            bond.price = float(value)
+
+        seconds, matrices = time_call(MatchingMatrices, bonds, edges, model, repeat=1)
+        rows.append({'benchmark': 'cash_flow_matching', 'variant': 'build matrices', 'size': size,
+                     'seconds': seconds, 'max_abs_error': 0.0})
+        for solver in solvers:
+            for problem, solve in (('match', lambda: match_cash_flows(matrices, liabilities, solver=solver)),
+                                   ('immunize', lambda: immunize(matrices, liabilities, solver=solver))):
+                result = solve()
+                shortfall = max(result.residuals.max(), 0.0) / largest if problem == 'match' else abs(result.residuals[0]) / largest
+                rows.append({'benchmark': 'cash_flow_matching',
+                             'variant': f'{problem} {solver} cost={result.cost:.0f} bonds={len(result.selected)}',
+                             'size': size, 'seconds': result.solve_seconds, 'max_abs_error': shortfall})
+
+    return rows
+
+
+@benchmark('valuation_plan')
+def bench_valuation_plan(n_bonds: int = 300, seed: int = 0) -> list:
+    """
+    Produce the cash flow table, cumulative present values, profit and present value profit of
+    bonds under three discount rate models, once by calling the bond methods independently and
+    once through a `ValuationPlan` that shares the intermediates. The error column compares the
+    present value profits.
+    """
+    from bonds.fixed_rate_bond import FixedRateBond
+    from bonds.partially_amortizing_bond import PartiallyAmortizingBond
+    from bonds.valuation_plan import ValuationPlan
+    from inflation_models.constant_inflation_model import ConstantDiscountRateModel
+    from inflation_models.linear_inflation_model import LinearInflationModel
+
+    rng = np.random.default_rng(seed)
+    models = [ConstantDiscountRateModel(rate=0.03), LinearInflationModel(0.02, 0.001), ConstantDiscountRateModel(rate=0.05)]
+    bonds = []
+    for i, (coupon_rate, maturity) in enumerate(zip(rng.uniform(0, 0.08, n_bonds), rng.integers(1, 31, n_bonds))):
+        if i % 2:
+            bonds.append(FixedRateBond(1000.0, 900.0, coupon_rate, float(maturity), 2, models[0]))
+        else:
+            bonds.append(PartiallyAmortizingBond(1000.0, 900.0, float(maturity), models[0], coupon_rate, 2, 500.0))
+    outputs = ('table', 'cumulative_pv', 'profit', 'pv_profit')
+
+    def independent():
+        profits = []
+        for bond in bonds:
+            for model in models:
+                bond.inflation_model = model
+                bond.table_cash_flows()
+                present_values = [cf[1] for cf in bond.calculate_pv_of_cash_flows()]
+                np.cumsum(present_values)
+                bond.profit()
+                profits.append(bond.profit(present_value=True))
+            bond.inflation_model = models[0]
+        return profits
+
+    def planned():
+        plan = ValuationPlan()
+        keys = plan.request_all(bonds, outputs, models)
+        plan.run()
+        return [plan.result(keys[(i, j, 'pv_profit')]) for i in range(len(bonds)) for j in range(len(models))]
+
+    seconds, reference = time_call(independent)
+    rows = [{'benchmark': 'valuation_plan', 'variant': 'independent methods', 'size': len(reference),
+             'seconds': seconds, 'max_abs_error': 0.0}]
+    seconds, result = time_call(planned)
+    rows.append({'benchmark': 'valuation_plan', 'variant': 'shared plan', 'size': len(result),
+                 'seconds': seconds, 'max_abs_error': max_abs_error(result, reference)})
+
+    return rows
+
+
+@benchmark('g2pp')
+def bench_g2pp(n_paths: int = 50000, max_time: float = 30, seed: int = 0) -> list:
+    """
+    Simulate monthly short rate paths with the single-factor Vasicek model and the two-factor
+    G2++ model, and price a fixed-rate bond by Monte Carlo under G2++. The `size` column is the
+    number of rates simulated. The G2++ simulation row's error column compares Monte Carlo zero
+    coupon prices (trapezoidal integral of the paths) with the closed form; the pricing row reports
+    the standard error of the price.
+    """
+    from bonds.fixed_rate_bond import FixedRateBond
+    from bonds.monte_carlo_pricer import price_monte_carlo
+    from inflation_models.g2pp_inflation_model import G2PPDiscountRateModel
+    from inflation_models.vasicek_inflation_model import VasicekDiscountRateModel
+
+    np.random.seed(seed)
+    dt = 1 / 12
+    vasicek = VasicekDiscountRateModel(a=0.1, b=0.03, sigma=0.01, r0=0.02, max_time=max_time, dt=dt)
+    g2pp = G2PPDiscountRateModel(a=0.5, b=0.05, sigma=0.01, eta=0.008, rho=-0.7, phi=0.03, max_time=max_time, dt=dt,
+                                 x0=-0.01, y0=0.0)
+
+    rows = []
+    seconds, _ = time_call(vasicek.simulate_paths, n_paths, seed=seed)
+    rows.append({'benchmark': 'g2pp', 'variant': 'vasicek simulate_paths', 'size': n_paths * len(vasicek.times),
+                 'seconds': seconds, 'max_abs_error': 0.0})
+
+    seconds, paths = time_call(g2pp.simulate_paths, n_paths, seed=seed)
+    maturities = np.arange(1, int(max_time) + 1)
+    integrals = np.cumsum((paths[:, 1:] + paths[:, :-1]) * (dt / 2), axis=1)
+    monte_carlo = np.exp(-integrals[:, np.round(maturities / dt).astype(int) - 1]).mean(axis=0)
+    rows.append({'benchmark': 'g2pp', 'variant': 'g2pp simulate_paths', 'size': paths.size,
+                 'seconds': seconds, 'max_abs_error': max_abs_error(monte_carlo, g2pp.zero_coupon_prices(maturities))})
+
+    bond = FixedRateBond(face_value=1000, price=900, coupon_rate=0.05, maturity=max_time, payment_frequency=12, inflation_model=g2pp)
+    seconds, result = time_call(price_monte_carlo, bond, g2pp, n_paths, seed=seed, repeat=1)
+    rows.append({'benchmark': 'g2pp', 'variant': 'g2pp price_monte_carlo', 'size': n_paths,
+                 'seconds': seconds, 'max_abs_error': result.std_error})
+
+    return rows
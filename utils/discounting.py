@@ -0,0 +1,65 @@
+import numpy as np
+
+from utils import kernels
+from utils.precision import get_dtype
+
+
+def cumulative_discount_factors(period_rates, dtype=None):
+    """
+    Compute cumulative discount factors from per-period discount rates.
+
+    The first column is time 0 and always has a discount factor of 1; every later
+    period is discounted by its own rate on top of all the previous periods:
+    `cdf[i] = cdf[i - 1] * (1 + period_rates[i]) ** -1`, evaluated in log space by `kernels.discount_factors`.
+
+    :param period_rates: A 1-D array of period rates, or a 2-D array with one row per instrument or path.
+    :param dtype: Override the precision policy for this call.
+    :return: An array of the same shape holding the cumulative discount factors.
+    """
+    return kernels.discount_factors(period_rates, dtype=dtype)
+
+
+def model_discount_factors(inflation_model, times, payment_frequency, dtype=None):
+    """
+    Discount factors for a grid of payment times under a discount rate model.
+
+    :param inflation_model: A `DiscountRateModel`, or None for no discounting.
+    :param times: A 1-D or 2-D array of payment times, starting at time 0.
+    :param payment_frequency: The number of periods per year; a scalar or an array broadcastable
+                              against the rows of `times`.
+    :param dtype: Override the precision policy for this call.
+    :return: An array of cumulative discount factors with the same shape as `times`.
+    """
+    times = np.asarray(times, dtype=float)
+    if inflation_model is None:
+        return np.ones(times.shape, dtype=get_dtype(dtype))
+
+    # Each distinct time is priced once, however many instruments share it
+    unique_times, inverse = np.unique(times, return_inverse=True)
+    rates = np.asarray(inflation_model.get_discount_rates(unique_times), dtype=float)[inverse].reshape(times.shape)
+
+    frequency = np.asarray(payment_frequency, dtype=float)
+    if times.ndim == 2 and frequency.ndim == 1:
+        frequency = frequency[:, None]
+
+    return cumulative_discount_factors(rates / frequency, dtype)
+
+
+def interpolation_weights(grid, times):
+    """
+    Bracketing grid indices and linear weights for evaluating grid values at the given times,
+    clamped at both ends like `np.interp`. On a single point grid every time takes that point's
+    value, with a lower index of 0 and an upper weight of 0.
+
+    :return: A tuple (lower_index, upper_weight).
+    """
+    grid = np.asarray(grid, dtype=float)
+    times = np.asarray(times, dtype=float)
+    if len(grid) == 0:
+        raise ValueError("Cannot interpolate on an empty grid")
+    if len(grid) == 1:
+        return np.zeros(times.shape, dtype=np.intp), np.zeros(times.shape)
+    lower = np.clip(np.searchsorted(grid, times, side='right') - 1, 0, len(grid) - 2)
+    weight = np.clip((times - grid[lower]) / (grid[lower + 1] - grid[lower]), 0, 1)
+
+    return lower, weight
@@ -0,0 +1,136 @@
+"""
+Reusable linear interpolation from a time grid onto a fixed set of query times.
+
+An `InterpolationOperator` is the sparse (n_times x n_grid) matrix of linear interpolation
+weights, with at most two non-zeros per row, stored as the bracketing grid index and upper
+weight of every query time. Applying it to any number of paths or scenarios is a single
+sparse-dense product, evaluated as two gathers and a weighted sum, with no search per call.
+Operators are interned by their grid and query times, so every caller that interpolates the
+same payment times onto the same simulation grid shares one.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.discounting import interpolation_weights
+
+
+class InterpolationOperator:
+    """
+    The linear interpolation weights of a set of query times on a grid, clamped at both ends like `np.interp`.
+    """
+
+    def __init__(self, grid, times):
+        """
+        :param grid: The increasing grid the values are given on, at least one point.
+        :param times: The times to evaluate the values at.
+        """
+        self.grid = np.asarray(grid, dtype=float)
+        self.times = np.asarray(times, dtype=float)
+        self.lower, self.weight = interpolation_weights(self.grid, self.times)
+        # The upper point equals the lower one, with weight 0, on a single point grid
+        self.upper = np.minimum(self.lower + 1, len(self.grid) - 1)
+        for array in (self.lower, self.upper, self.weight):
+            array.flags.writeable = False
+        self._weights = {}
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.times), len(self.grid)
+
+    def _weights_as(self, dtype):
+        # Weights in the dtype of the values, so float32 paths stay float32
+        dtype = np.dtype(dtype)
+        weights = self._weights.get(dtype)
+        if weights is None:
+            weight = self.weight.astype(dtype)
+            weights = self._weights.setdefault(dtype, (1 - weight, weight))
+
+        return weights
+
+    def apply(self, values) -> np.ndarray:
+        """
+        Interpolate values on the grid at the query times.
+
+        :param values: An array whose last axis is aligned with the grid, e.g. one row per path.
+        :return: An array whose last axis is aligned with the query times.
+        """
+        values = np.asarray(values)
+        if values.ndim == 0 or values.shape[-1] != len(self.grid):
+            raise ValueError(f"The last axis of the values must have the grid's length {len(self.grid)}, "
+                             f"got shape {values.shape}")
+        dtype = values.dtype if values.dtype.kind == 'f' else np.float64
+        lower_weight, upper_weight = self._weights_as(dtype)
+
+        return values[..., self.lower] * lower_weight + values[..., self.upper] * upper_weight
+
+    __call__ = apply
+
+    def apply_transpose(self, values) -> np.ndarray:
+        """
+        Spread values at the query times back onto the grid, the product with the transposed operator.
+        This maps sensitivities to the interpolated values onto sensitivities to the grid values.
+
+        :param values: An array whose last axis is aligned with the query times.
+        :return: An array whose last axis is aligned with the grid.
+        """
+        values = np.asarray(values, dtype=float)
+        lower_weight, upper_weight = self._weights_as(values.dtype)
+        spread = np.zeros(values.shape[:-1] + (len(self.grid),))
+        np.add.at(spread.T, self.lower, (values * lower_weight).T)
+        np.add.at(spread.T, self.upper, (values * upper_weight).T)
+
+        return spread
+
+    def dense(self) -> np.ndarray:
+        """
+        The operator as a dense (n_times x n_grid) matrix.
+        """
+        matrix = np.zeros(self.shape)
+        rows = np.arange(len(self.times))
+        np.add.at(matrix, (rows, self.lower), 1 - self.weight)
+        np.add.at(matrix, (rows, self.upper), self.weight)
+
+        return matrix
+
+    def to_sparse(self):
+        """
+        The operator as a `scipy.sparse.csr_matrix`. Requires scipy.
+        """
+        from scipy import sparse
+
+        rows = np.repeat(np.arange(len(self.times)), 2)
+        columns = np.column_stack([self.lower, self.upper]).ravel()
+        data = np.column_stack([1 - self.weight, self.weight]).ravel()
+
+        return sparse.csr_matrix((data, (rows, columns)), shape=self.shape)
+
+
+_OPERATORS = OrderedDict()
+_MAX_OPERATORS = 256
+
+
+def get_operator(grid, times) -> InterpolationOperator:
+    """
+    Return the interned operator for the given grid and query times, creating it on first use.
+    The least recently used operators are dropped once more than 256 are held.
+    """
+    grid = np.ascontiguousarray(grid, dtype=float)
+    times = np.ascontiguousarray(times, dtype=float)
+    key = (grid.tobytes(), times.tobytes())
+    operator = _OPERATORS.get(key)
+    if operator is None:
+        operator = _OPERATORS[key] = InterpolationOperator(grid, times)
+        if len(_OPERATORS) > _MAX_OPERATORS:
+            _OPERATORS.popitem(last=False)
+    else:
+        _OPERATORS.move_to_end(key)
+
+    return operator
+
+
+def clear_operators():
+    """
+    Drop every interned operator.
+    """
+    _OPERATORS.clear()
@@ -0,0 +1,155 @@
+"""
+Numeric kernels behind discounting and short-rate simulation, with interchangeable backends.
+
+The 'numpy' backend is always available. The 'numba' backend JIT-compiles the sequential
+recurrences and is used by default when Numba is installed. The backend can be chosen at
+runtime with `set_backend()` or the BOND_KERNEL_BACKEND environment variable.
+"""
+import math
+import os
+
+import numpy as np
+
+from utils.precision import get_dtype
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _as_2d(array):
+    """
+    View a 1-D or 2-D array as 2-D, one row per instrument or path.
+    """
+    return np.ascontiguousarray(array.reshape(-1, array.shape[-1]))
+
+
+def _discount_factors_numpy(period_rates):
+    factors = np.empty_like(period_rates)
+    factors[..., 0] = 1
+    # Log growth is summed in float64 whatever the precision, so long float32 schedules keep their accuracy
+    log_growth = np.log1p(period_rates[..., 1:], dtype=np.float64)
+    factors[..., 1:] = np.exp(-np.cumsum(log_growth, axis=-1))
+
+    return factors
+
+
+def _vasicek_euler_numpy(r0, a, b, sigma, dt, shocks, rates):
+    rates[:, 0] = r0
+    diffusion = sigma * math.sqrt(dt) * shocks
+    for t in range(1, rates.shape[1]):
+        rates[:, t] = rates[:, t - 1] + a * (b - rates[:, t - 1]) * dt + diffusion[:, t - 1]
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _discount_factors_numba(period_rates):
+        factors = np.empty_like(period_rates)
+        for i in range(period_rates.shape[0]):
+            factors[i, 0] = 1.0
+            # Kahan-compensated running sum of the log growth, in float64
+            total = 0.0
+            compensation = 0.0
+            for t in range(1, period_rates.shape[1]):
+                term = math.log1p(period_rates[i, t]) - compensation
+                updated = total + term
+                compensation = (updated - total) - term
+                total = updated
+                factors[i, t] = math.exp(-total)
+        return factors
+
+    @numba.njit(cache=True)
+    def _vasicek_euler_numba(r0, a, b, sigma, dt, shocks, rates):
+        scale = sigma * np.sqrt(dt)
+        for i in range(shocks.shape[0]):
+            rates[i, 0] = r0
+            for t in range(1, shocks.shape[1] + 1):
+                rates[i, t] = rates[i, t - 1] + a * (b - rates[i, t - 1]) * dt + scale * shocks[i, t - 1]
+
+
+_BACKENDS = {
+    'numpy': {
+        'discount_factors': _discount_factors_numpy,
+        'vasicek_euler': _vasicek_euler_numpy,
+    },
+}
+if numba is not None:
+    _BACKENDS['numba'] = {
+        'discount_factors': _discount_factors_numba,
+        'vasicek_euler': _vasicek_euler_numba,
+    }
+
+_active = {'name': None}
+
+
+def available_backends() -> list:
+    """
+    The names of the backends that can be selected in this environment.
+    """
+    return list(_BACKENDS)
+
+
+def set_backend(name: str):
+    """
+    Select the kernel backend for every later call.
+
+    :param name: 'numpy', 'numba' or 'auto' (Numba when installed, NumPy otherwise).
+    """
+    if name == 'auto':
+        name = 'numba' if 'numba' in _BACKENDS else 'numpy'
+    if name not in _BACKENDS:
+        raise ValueError(f"Kernel backend '{name}' is not available, expected one of {available_backends()}")
+    _active['name'] = name
+
+
+def get_backend() -> str:
+    """
+    The name of the active kernel backend.
+    """
+    if _active['name'] is None:
+        set_backend(os.environ.get('BOND_KERNEL_BACKEND', 'auto'))
+
+    return _active['name']
+
+
+def discount_factors(period_rates, backend=None, dtype=None):
+    """
+    Cumulative discount factors `cdf[i] = cdf[i - 1] * (1 + period_rates[i]) ** -1`, with `cdf[0] = 1`,
+    computed in log space as `exp(-cumsum(log1p(period_rates)))` with the sum held in float64.
+    Every bond type, portfolio and simulation discounts through this kernel.
+
+    :param period_rates: A 1-D array, or a 2-D array with one row per instrument or path.
+    :param backend: Override the active backend for this call.
+    :param dtype: Override the precision policy for this call.
+    :return: An array of the same shape as `period_rates`.
+    """
+    period_rates = np.array(period_rates, dtype=get_dtype(dtype))
+    kernel = _BACKENDS[backend or get_backend()]['discount_factors']
+    if kernel is _discount_factors_numpy:
+        return kernel(period_rates)
+
+    return kernel(_as_2d(period_rates)).reshape(period_rates.shape)
+
+
+def vasicek_euler(r0: float, a: float, b: float, sigma: float, dt: float, shocks, backend=None, dtype=None):
+    """
+    Euler discretisation of the Vasicek short rate, `dr = a (b - r) dt + sigma sqrt(dt) z`.
+
+    :param r0: The initial rate.
+    :param a: Speed of mean reversion.
+    :param b: Long-term mean rate.
+    :param sigma: Volatility of the rate.
+    :param dt: Time step.
+    :param shocks: Standard normal shocks, shape (n_steps,) or (n_paths, n_steps).
+    :param backend: Override the active backend for this call.
+    :param dtype: Override the precision policy for this call.
+    :return: The rate paths including r0, shape (n_steps + 1,) or (n_paths, n_steps + 1).
+    """
+    shocks = np.asarray(shocks, dtype=get_dtype(dtype))
+    paths = _as_2d(shocks)
+    rates = np.empty((paths.shape[0], paths.shape[1] + 1), dtype=paths.dtype)
+    kernel = _BACKENDS[backend or get_backend()]['vasicek_euler']
+    kernel(float(r0), float(a), float(b), float(sigma), float(dt), paths, rates)
+
+    return rates[0] if shocks.ndim == 1 else rates
@@ -0,0 +1,162 @@
+"""
+A persistent on-disk cache of valuation results, keyed by deterministic fingerprints of the
+bond specification and the discount rate model.
+
+Fingerprints are SHA-256 digests of a canonical encoding: floats are encoded exactly, objects
+by class name and attributes, and NumPy arrays by dtype, shape and contents, so a stochastic
+model is identified by the path it actually simulated. The cache is a single SQLite file that
+several processes can share, evicting the least recently used results once it grows past its
+size limit.
+"""
+import hashlib
+import pickle
+import sqlite3
+import time
+
+import numpy as np
+
+
+def _encode(obj, out: list):
+    if obj is None or isinstance(obj, (bool, str)):
+        out.append(repr(obj))
+    elif isinstance(obj, (int, np.integer)):
+        out.append(f"i{int(obj)}")
+    elif isinstance(obj, (float, np.floating)):
+        out.append(f"f{float(obj).hex()}")
+    elif isinstance(obj, np.ndarray):
+        out.append(f"a{obj.dtype.str}{obj.shape}{hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest()}")
+    elif isinstance(obj, (list, tuple)):
+        out.append('[')
+        for item in obj:
+            _encode(item, out)
+        out.append(']')
+    elif isinstance(obj, dict):
+        out.append('{')
+        for key in sorted(obj, key=str):
+            _encode(str(key), out)
+            _encode(obj[key], out)
+        out.append('}')
+    elif hasattr(obj, '__dict__') or hasattr(obj, '__slots__'):
+        out.append(f"<{type(obj).__module__}.{type(obj).__qualname__}")
+        _encode(_attributes(obj), out)
+        out.append('>')
+    else:
+        raise TypeError(f"Cannot fingerprint object of type {type(obj).__name__}")
+
+
+def _attributes(obj) -> dict:
+    attributes = dict(getattr(obj, '__dict__', {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name) and not name.startswith('__'):
+                attributes[name] = getattr(obj, name)
+
+    # Caches held on the object are not part of its identity
+    return {key: value for key, value in attributes.items() if not key.startswith('_')}
+
+
+def fingerprint(*parts) -> str:
+    """
+    A deterministic digest of bond specifications, models, seeds and any other inputs.
+
+    :param parts: The inputs that determine a result: plain values, arrays, lists, dicts or objects.
+    :return: A hex SHA-256 digest.
+    """
+    out = []
+    _encode(list(parts), out)
+
+    return hashlib.sha256(''.join(out).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    A size-bounded, least-recently-used store of pickled results in a SQLite file.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 ** 2):
+        """
+        Open (or create) the cache.
+
+        :param path: The SQLite file holding the cache.
+        :param max_bytes: The total size of stored results above which the oldest are evicted.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = sqlite3.connect(path, timeout=60)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)')
+        self._connection.commit()
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Look up several results at once.
+
+        :return: A dict of the keys that were found and their results.
+        """
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self._connection.execute(
+                f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(batch))})", batch).fetchall()
+            found.update((key, pickle.loads(value)) for key, value in rows)
+
+        now = time.time()
+        self._connection.executemany('UPDATE results SET last_access = ? WHERE key = ?', [(now, key) for key in found])
+        self._connection.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        return found
+
+    def get(self, key: str, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def put_many(self, items: dict):
+        """
+        Store several results at once, then evict old results if the cache is too large.
+        """
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, blob, len(blob), now))
+        self._connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', rows)
+        self._connection.commit()
+        self._evict()
+
+    def put(self, key: str, value):
+        self.put_many({key: value})
+
+    def _evict(self):
+        total = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._connection.execute('SELECT key, size FROM results ORDER BY last_access'):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._connection.executemany('DELETE FROM results WHERE key = ?', stale)
+        self._connection.commit()
+        self.evictions += len(stale)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
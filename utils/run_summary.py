@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+
+
+class RunSummary:
+    """
+    Collects wall-clock timings and counters for a batch run and formats them
+    as an end-of-run summary.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize an empty run summary.
+
+        :param name: The name of the job being summarised (e.g. the CLI subcommand).
+        """
+        self.name = name
+        self.start = time.perf_counter()
+        self.stages = []
+        self.stats = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time the body of a `with` block and record it under the given stage name.
+
+        :param name: The name of the stage.
+        """
+        stage_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - stage_start))
+
+    def add_stat(self, name: str, value):
+        """
+        Record a counter or other value to be printed in the summary.
+
+        :param name: The label of the statistic.
+        :param value: The value of the statistic.
+        """
+        self.stats[name] = value
+
+    def report(self) -> str:
+        """
+        Format the collected timings and statistics.
+
+        :return: A multi-line string summarising the run.
+        """
+        total = time.perf_counter() - self.start
+        lines = [f"=== {self.name} run summary ==="]
+        for name, elapsed in self.stages:
+            lines.append(f"{name:<24}{elapsed:>10.3f}s")
+        for name, value in self.stats.items():
+            lines.append(f"{name:<24}{value!s:>11}")
+        lines.append(f"{'total':<24}{total:>10.3f}s")
+
+        return "\n".join(lines)
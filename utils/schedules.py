@@ -0,0 +1,108 @@
+import weakref
+
+import numpy as np
+
+from utils.discounting import cumulative_discount_factors
+
+
+class PaymentSchedule:
+    """
+    A read-only grid of payment times shared by every bond with the same terms.
+
+    Discount rates and discount factors on the grid are computed once per discount rate model
+    and cached, so bonds that share a schedule and a model share the arrays too. Models are
+    treated as immutable once they have been used to discount a schedule. The arrays are always
+    float64, whatever the precision policy, so a float32 run never changes later single valuations.
+    """
+
+    def __init__(self, maturity: float, payment_frequency: int):
+        """
+        Build the payment time grid: time 0, every coupon date and the maturity date.
+
+        :param maturity: The time to maturity (in years).
+        :param payment_frequency: The number of payments per year.
+        """
+        self.maturity = maturity
+        self.payment_frequency = payment_frequency
+        self.n_periods = int(maturity * payment_frequency)
+
+        times = np.arange(self.n_periods + 1) / payment_frequency
+        times[-1] = maturity
+        times.flags.writeable = False
+        self.times = times
+
+        self._discount_rates = weakref.WeakKeyDictionary()
+        self._discount_factors = weakref.WeakKeyDictionary()
+
+    def discount_rates(self, inflation_model) -> np.ndarray:
+        """
+        The model's discount rates at every time of the schedule (zero when there is no model).
+
+        :param inflation_model: A `DiscountRateModel`, or None.
+        :return: A read-only array aligned with `times`.
+        """
+        if inflation_model is None:
+            return _read_only(np.zeros_like(self.times))
+
+        rates = self._discount_rates.get(inflation_model)
+        if rates is None:
+            rates = _read_only(np.asarray(inflation_model.get_discount_rates(self.times), dtype=float))
+            self._discount_rates[inflation_model] = rates
+
+        return rates
+
+    def discount_factors(self, inflation_model) -> np.ndarray:
+        """
+        The cumulative discount factors at every time of the schedule (one when there is no model).
+
+        :param inflation_model: A `DiscountRateModel`, or None.
+        :return: A read-only array aligned with `times`.
+        """
+        if inflation_model is None:
+            return _read_only(np.ones_like(self.times))
+
+        factors = self._discount_factors.get(inflation_model)
+        if factors is None:
+            factors = _read_only(cumulative_discount_factors(self.discount_rates(inflation_model) / self.payment_frequency,
+                                                             dtype=np.float64))
+            self._discount_factors[inflation_model] = factors
+
+        return factors
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+_SCHEDULES = {}
+
+
+def get_schedule(maturity: float, payment_frequency: int) -> PaymentSchedule:
+    """
+    Return the interned schedule for the given terms, creating it on first use.
+
+    :param maturity: The time to maturity (in years).
+    :param payment_frequency: The number of payments per year.
+    :return: The `PaymentSchedule` shared by every bond with these terms.
+    """
+    key = (float(maturity), int(payment_frequency))
+    schedule = _SCHEDULES.get(key)
+    if schedule is None:
+        schedule = _SCHEDULES.setdefault(key, PaymentSchedule(*key))
+
+    return schedule
+
+
+def schedule_count() -> int:
+    """
+    The number of distinct schedules interned so far.
+    """
+    return len(_SCHEDULES)
+
+
+def clear_schedules():
+    """
+    Drop every interned schedule and the discount factors cached on them.
+    """
+    _SCHEDULES.clear()
@@ -0,0 +1,168 @@
+"""
+NumPy arrays in `multiprocessing.shared_memory` blocks, for handing large read-only inputs
+(and writable outputs) to worker processes without pickling them.
+
+The parent creates the blocks inside a `SharedArrayPool`, which unlinks every block when the
+`with` block exits, when the interpreter exits and on SIGTERM, so segments are removed even
+when a worker or the job itself fails. If the parent is killed outright, the blocks are still
+registered with multiprocessing's resource tracker, which unlinks them once the job's processes
+are gone. Workers only receive the small `SharedArray` descriptors and attach to the blocks as
+NumPy views.
+"""
+import atexit
+import os
+import signal
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArray:
+    """
+    A picklable descriptor of a NumPy array held in a shared memory block.
+    """
+
+    def __init__(self, name: str, shape: tuple, dtype):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+    def attach(self):
+        """
+        Attach to the block from any process.
+
+        :return: A tuple (SharedMemory handle, ndarray view); keep the handle alive while the view is used.
+        """
+        block = _open_block(self.name)
+
+        return block, np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf)
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    """
+    Open an existing block without making this process responsible for unlinking it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # Before 3.13 attaching registers the block again with the resource tracker. Pool workers
+    # share their parent's tracker, where the block is already registered, so this is harmless
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedArrayPool:
+    """
+    Owns the shared memory blocks of one job and guarantees they are unlinked.
+    """
+
+    _active = []
+
+    def __init__(self):
+        self._blocks = []
+        self._pid = os.getpid()
+
+    def create(self, shape, dtype=np.float64, fill=None):
+        """
+        Allocate a shared array.
+
+        :param shape: The shape of the array.
+        :param dtype: The dtype of the array.
+        :param fill: An optional array to copy into the block.
+        :return: A tuple (SharedArray descriptor, ndarray view owned by this process).
+        """
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._blocks.append(block)
+        view = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        if fill is not None:
+            view[...] = fill
+
+        return SharedArray(block.name, shape, dtype), view
+
+    def share(self, array: np.ndarray):
+        """
+        Copy an existing array into a new shared block.
+
+        :return: A tuple (SharedArray descriptor, ndarray view owned by this process).
+        """
+        array = np.asarray(array)
+        return self.create(array.shape, array.dtype, fill=array)
+
+    def close(self):
+        """
+        Close and unlink every block. Safe to call more than once.
+        """
+        while self._blocks:
+            block = self._blocks.pop()
+            try:
+                block.close()
+            except BufferError:
+                # A view is still alive in this process; the segment is unlinked regardless
+                pass
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        if not SharedArrayPool._active:
+            _install_cleanup_handlers()
+        SharedArrayPool._active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        SharedArrayPool._active.remove(self)
+
+
+def _close_active_pools():
+    # Forked workers inherit these handlers; only the process that created a pool may unlink it
+    for pool in list(SharedArrayPool._active):
+        if pool._pid == os.getpid():
+            pool.close()
+
+
+def _handle_sigterm(signum, frame):
+    _close_active_pools()
+    raise SystemExit(128 + signum)
+
+
+_handlers = {'installed': False}
+
+
+def _install_cleanup_handlers():
+    if _handlers['installed']:
+        return
+    atexit.register(_close_active_pools)
+    try:
+        if signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+            signal.signal(signal.SIGTERM, _handle_sigterm)
+    except ValueError:
+        # Signal handlers can only be installed from the main thread
+        pass
+    _handlers['installed'] = True
+
+
+_attached = {}
+
+
+def attach_worker(descriptors: dict):
+    """
+    Process pool initializer: attach to every shared array once per worker process.
+
+    :param descriptors: A mapping of names to `SharedArray` descriptors.
+    """
+    for key, descriptor in descriptors.items():
+        _attached[key] = descriptor.attach()
+
+
+def worker_array(key: str) -> np.ndarray:
+    """
+    The view of a shared array attached by `attach_worker`.
+    """
+    return _attached[key][1]
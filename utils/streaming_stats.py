@@ -0,0 +1,154 @@
+"""
+Streaming statistics for results that are too large to hold in memory at once.
+
+Both accumulators take whole chunks of values at a time, can be merged with another
+accumulator of the same kind, and are deterministic: the same values fed in the same chunks
+always give bit-identical results.
+"""
+import math
+
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Running count, mean and variance using Welford's update, generalised to whole chunks
+    (Chan et al.'s pairwise combination), so values are never kept.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, values):
+        """
+        Add a chunk of values.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        mean = float(values.mean())
+        self._combine(values.size, mean, float(np.sum((values - mean) ** 2)))
+
+    def merge(self, other: 'RunningMoments'):
+        """
+        Add every value seen by another accumulator.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+
+    @property
+    def variance(self) -> float:
+        """
+        The sample variance (with Bessel's correction).
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def std_error(self) -> float:
+        """
+        The standard error of the mean.
+        """
+        return math.sqrt(self.variance / self.count) if self.count > 1 else float('inf')
+
+
+class QuantileSketch:
+    """
+    A compacting quantile sketch in the style of KLL with deterministic compaction.
+
+    Values are kept in levels, where an item at level `h` stands for `2 ** h` values. When a
+    level holds more than `k` items it is sorted and every other item is promoted to the next
+    level, alternating which half is kept so that rank errors cancel. Memory is
+    O(k log(n / k)) and the rank error of a quantile is of the order of log2(n / k) / k.
+    """
+
+    def __init__(self, k: int = 4096):
+        """
+        :param k: The number of items each level may hold before it is compacted.
+        """
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._offsets = [0]
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self.k:
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                    self._offsets.append(0)
+                items = np.sort(items)
+                keep, items = (items[:1], items[1:]) if items.size % 2 else (items[:0], items)
+                offset = self._offsets[level]
+                self._offsets[level] ^= 1
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+            level += 1
+
+    def update(self, values):
+        """
+        Add a chunk of values.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.count += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Add every value summarised by another sketch.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+            self._offsets.append(0)
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compact()
+
+    def quantiles(self, qs) -> np.ndarray:
+        """
+        Estimate quantiles of every value seen so far.
+
+        :param qs: The probabilities, each between 0 and 1.
+        :return: An array of estimates, one per probability, all NaN when no values were seen.
+        """
+        if self.count == 0:
+            return np.full(np.shape(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(qs, dtype=float) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, ranks, side='left'), items.size - 1)
+
+        return items[order][index]
+
+    def tail_mean(self, q: float) -> float:
+        """
+        Estimate the mean of the values at or above the q-quantile, e.g. the expected shortfall of losses.
+
+        :param q: The probability of the quantile where the tail starts, between 0 and 1.
+        :return: The tail mean, or NaN when no values were seen.
+        """
+        if self.count == 0:
+            return float('nan')
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        tail = items >= self.quantiles([q])[0]
+
+        return float(np.sum(items[tail] * weights[tail]) / np.sum(weights[tail]))
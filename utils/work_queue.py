@@ -0,0 +1,273 @@
+"""
+A work queue of shards held in a directory on a shared filesystem, with no broker.
+
+Publishing writes every shard and a context shared by all of them, then a manifest; the manifest
+appears last, so a queue is either fully published or not visible at all. Workers on any host
+claim a shard by creating its claim file with O_CREAT | O_EXCL, which succeeds for exactly one
+of them, and refresh the claim while they work on it. A shard is done once its result file
+exists; results are written to a temporary file and renamed into place, so a crash never leaves
+a partial result. Claims whose owner stopped refreshing them for longer than the lease are
+taken over, so a restarted worker resumes where the crashed one left off and completed shards
+are never recomputed.
+
+Layout of a queue directory:
+
+    manifest.json       shard count and fingerprint of the published work
+    context.pkl         data shared by every shard
+    shards/000000.pkl   the payload of each shard
+    claims/000000       the worker currently holding each shard
+    results/000000.pkl  the result of each completed shard
+"""
+import json
+import os
+import pickle
+import socket
+import threading
+import time
+
+from utils.result_cache import fingerprint
+
+
+MANIFEST = 'manifest.json'
+
+
+def _write_atomic(path: str, data: bytes):
+    """
+    Write a file under a temporary name and rename it into place.
+    """
+    temporary = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _read_pickle(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def worker_id() -> str:
+    """
+    An identifier of this process that is unique across hosts.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    A directory of shards that any number of processes can claim, complete and merge.
+    """
+
+    def __init__(self, directory: str, lease_seconds: float = 300.0):
+        """
+        :param directory: The queue directory, on a filesystem shared by every worker.
+        :param lease_seconds: How long a claim stays valid without being refreshed.
+        """
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.worker = worker_id()
+
+    def _path(self, *parts) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def _shard_path(self, index: int) -> str:
+        return self._path('shards', f"{index:06d}.pkl")
+
+    def _claim_path(self, index: int) -> str:
+        return self._path('claims', f"{index:06d}")
+
+    def _result_path(self, index: int) -> str:
+        return self._path('results', f"{index:06d}.pkl")
+
+    def publish(self, shards: list, context=None) -> bool:
+        """
+        Publish the shards. Publishing the same work again is a no-op, so every host may run it.
+
+        :param shards: The payload of each shard, picklable.
+        :param context: Data shared by every shard, stored once.
+        :return: True if the queue was created, False if it already held this work.
+        :raises ValueError: If the directory already holds different work.
+        """
+        key = fingerprint(shards, context)
+        if os.path.exists(self._path(MANIFEST)):
+            if self.manifest()['fingerprint'] != key:
+                raise ValueError(f"{self.directory} already holds a different queue")
+            return False
+
+        for part in ('shards', 'claims', 'results'):
+            os.makedirs(self._path(part), exist_ok=True)
+        _write_atomic(self._path('context.pkl'), pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL))
+        for index, shard in enumerate(shards):
+            _write_atomic(self._shard_path(index), pickle.dumps(shard, protocol=pickle.HIGHEST_PROTOCOL))
+        manifest = {'n_shards': len(shards), 'fingerprint': key, 'published_by': self.worker, 'published_at': time.time()}
+        _write_atomic(self._path(MANIFEST), json.dumps(manifest).encode())
+
+        return True
+
+    def manifest(self) -> dict:
+        """
+        :raises FileNotFoundError: If nothing has been published to the directory.
+        """
+        with open(self._path(MANIFEST)) as f:
+            return json.load(f)
+
+    @property
+    def n_shards(self) -> int:
+        return self.manifest()['n_shards']
+
+    def context(self):
+        return _read_pickle(self._path('context.pkl'))
+
+    def shard(self, index: int):
+        return _read_pickle(self._shard_path(index))
+
+    def is_done(self, index: int) -> bool:
+        return os.path.exists(self._result_path(index))
+
+    def pending(self) -> list:
+        """
+        The indices of the shards without a result, claimed or not.
+        """
+        done = set(os.listdir(self._path('results')))
+        return [index for index in range(self.n_shards) if f"{index:06d}.pkl" not in done]
+
+    def claim(self, index: int) -> bool:
+        """
+        Try to claim a shard. A claim older than the lease is taken over.
+
+        :return: True if this worker now holds the shard.
+        """
+        if self.is_done(index):
+            return False
+        path = self._claim_path(index)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                expired = time.time() - os.stat(path).st_mtime > self.lease_seconds
+            except FileNotFoundError:
+                expired = True
+            if not expired:
+                return False
+            # Only one of the workers racing for an expired claim renames it away
+            expired_path = f"{path}.expired.{self.worker.replace(':', '.')}"
+            try:
+                os.replace(path, expired_path)
+            except FileNotFoundError:
+                return False
+            # The claim may have been refreshed, or replaced by a new one, between the check and the
+            # rename; a fresh claim is put back unless another has been made since
+            if time.time() - os.stat(expired_path).st_mtime <= self.lease_seconds:
+                try:
+                    os.link(expired_path, path)
+                except FileExistsError:
+                    pass
+                os.remove(expired_path)
+                return False
+            os.remove(expired_path)
+            return self.claim(index)
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.worker)
+
+        # The shard may have completed between the check above and the claim
+        if self.is_done(index):
+            self.release(index)
+            return False
+        return True
+
+    def owner(self, index: int):
+        """
+        The worker holding the claim on a shard, or None if it is not claimed.
+        """
+        try:
+            with open(self._claim_path(index)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def refresh(self, index: int):
+        """
+        Renew the lease on a claimed shard. A claim that was taken over is left alone.
+        """
+        if self.owner(index) != self.worker:
+            return
+        try:
+            os.utime(self._claim_path(index))
+        except FileNotFoundError:
+            pass
+
+    def release(self, index: int):
+        """
+        Give up a claim without completing the shard. A claim that was taken over is left alone.
+        """
+        if self.owner(index) != self.worker:
+            return
+        try:
+            os.remove(self._claim_path(index))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, index: int, result):
+        """
+        Store the result of a claimed shard and release it.
+        """
+        _write_atomic(self._result_path(index), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        self.release(index)
+
+    def results(self) -> list:
+        """
+        The results of every shard, in shard order.
+
+        :raises RuntimeError: If some shards have not completed.
+        """
+        pending = self.pending()
+        if pending:
+            raise RuntimeError(f"{len(pending)} of {self.n_shards} shards are not complete, e.g. shard {pending[0]}")
+        return [_read_pickle(self._result_path(index)) for index in range(self.n_shards)]
+
+
+def run_worker(queue: WorkQueue, func, max_shards: int = None) -> int:
+    """
+    Claim and complete shards until none are left to claim.
+
+    Workers start their scan at different shards to spread out claims, and refresh the claim of
+    the shard in hand from a background thread so long shards keep their lease.
+
+    :param queue: The queue to work on.
+    :param func: Called as `func(context, shard)`; its return value is the shard's result.
+    :param max_shards: Stop after completing this many shards (default: no limit).
+    :return: The number of shards this worker completed.
+    """
+    context = queue.context()
+    n_shards = queue.n_shards
+    offset = hash(queue.worker) % max(n_shards, 1)
+    completed = 0
+
+    for index in [(offset + i) % n_shards for i in range(n_shards)]:
+        if max_shards is not None and completed >= max_shards:
+            break
+        if not queue.claim(index):
+            continue
+
+        stop = threading.Event()
+
+        def keep_alive(index=index):
+            while not stop.wait(queue.lease_seconds / 3):
+                queue.refresh(index)
+
+        heartbeat = threading.Thread(target=keep_alive, daemon=True)
+        heartbeat.start()
+        try:
+            result = func(context, queue.shard(index))
+        except BaseException:
+            queue.release(index)
+            raise
+        finally:
+            stop.set()
+            heartbeat.join()
+        queue.complete(index, result)
+        completed += 1
+
+    return completed